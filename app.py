@@ -91,7 +91,8 @@ st.title("BondTrack - Visão Geral")
 
 if data_ref:
     try:
-        df, erro = engine.load_data(data_ref)
+        # Universo enriquecido (spreads, classificações), em cache compartilhado pelas páginas
+        df, erro = engine.load_universo(data_ref)
     except Exception as e:
         st.error(f"Erro crítico: {e}")
         st.stop()
@@ -99,21 +100,7 @@ if data_ref:
     if erro: st.error(erro); st.stop()
     if df is None or df.empty: st.warning("Sem dados"); st.stop()
     
-    try:
-        curva_df = engine.load_curva_anbima(data_ref)
-        if not curva_df.empty:
-            df = engine.adicionar_spreads_ao_df(df, curva_df)
-            curva_disponivel = True
-        else: curva_disponivel = False
-    except: curva_disponivel = False
-    
-    # --- CORREÇÃO DE TIPOS (EVITA O CRASH DO NLARGEST) ---
-    # Força a conversão para numérico, transformando erros em NaN
-    cols_numericas = ['taxa', 'duration', 'spread_bps', 'volume_total']
-    for col in cols_numericas:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    # -----------------------------------------------------
+    curva_disponivel = 'spread_bps' in df.columns
 
     volume_summary = engine.get_volume_summary()
     
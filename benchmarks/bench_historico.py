@@ -0,0 +1,142 @@
+"""
+Benchmark - Leitura de histórico: SQLite (pd.read_sql) vs. Parquet particionado
+
+Gera uma tabela mercado_secundario sintética (N ativos x D datas úteis), exporta
+para Parquet com parquet_store e compara a leitura de um intervalo de datas com
+três colunas e a série de poucos ativos. A varredura por número de ativos mostra
+a partir de quantos códigos o Parquet passa o SQLite, sem e com índice por codigo
+(storage.LIMITE_CODIGOS_SQLITE).
+
+Uso:
+    python benchmarks/bench_historico.py [--ativos=1000] [--datas=756] [--repeticoes=3]
+                                         [--codigos=1,5,10,20,50,100,200]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import parquet_store
+from storage import LIMITE_CODIGOS_SQLITE
+
+
+def gerar_banco(db_path, ativos, datas, seed=42):
+    """mercado_secundario sintético com datas em DD/MM/YYYY (como o ETL grava)"""
+    rng = np.random.default_rng(seed)
+    dias = pd.bdate_range("2020-01-02", periods=datas)
+    codigos = np.array([f"ATIV{i:04d}" for i in range(ativos)])
+    df = pd.DataFrame({
+        "codigo": np.tile(codigos, datas),
+        "nome": np.tile(np.char.add("Emissor ", codigos), datas),
+        "data_referencia": np.repeat(dias.strftime("%d/%m/%Y"), ativos),
+        "taxa_indicativa": rng.uniform(5, 15, ativos * datas),
+        "pu": rng.uniform(900, 1100, ativos * datas),
+        "duration": rng.uniform(100, 2500, ativos * datas),
+    })
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE mercado_secundario (codigo TEXT, nome TEXT, data_referencia TEXT, "
+                 "taxa_indicativa REAL, pu REAL, duration REAL)")
+    conn.executemany("INSERT INTO mercado_secundario VALUES (?, ?, ?, ?, ?, ?)", df.itertuples(index=False, name=None))
+    conn.commit()
+    conn.close()
+    return dias, codigos
+
+
+def ler_sqlite(db_path, inicio, fim, codigos=None):
+    data_iso = ("substr(data_referencia, 7, 4) || '-' || substr(data_referencia, 4, 2) || '-' || "
+                "substr(data_referencia, 1, 2)")
+    filtro, params = f"{data_iso} BETWEEN ? AND ?", [inicio, fim]
+    if codigos is not None:
+        filtro += f" AND codigo IN ({', '.join('?' * len(codigos))})"
+        params += list(codigos)
+    conn = sqlite3.connect(db_path)
+    try:
+        return pd.read_sql(f"SELECT codigo, {data_iso} AS data, taxa_indicativa, pu, duration "
+                           f"FROM mercado_secundario WHERE {filtro}", conn, params=params)
+    finally:
+        conn.close()
+
+
+def cronometrar(func, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), saida
+
+
+def main():
+    ativos, datas, repeticoes = 1000, 756, 3
+    varredura = [1, 5, 10, 20, 50, 100, 200]
+    for arg in sys.argv[1:]:
+        if arg.startswith("--ativos="): ativos = int(arg.split("=")[1])
+        if arg.startswith("--datas="): datas = int(arg.split("=")[1])
+        if arg.startswith("--repeticoes="): repeticoes = int(arg.split("=")[1])
+        if arg.startswith("--codigos="): varredura = [int(n) for n in arg.split("=")[1].split(",")]
+
+    if not parquet_store.pyarrow_instalado():
+        print("❌ pyarrow não instalado")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        raiz = os.path.join(tmp, "parquet")
+        dias, codigos = gerar_banco(db_path, ativos, datas)
+
+        inicio = time.perf_counter()
+        parquet_store.exportar_tabela(db_path, "mercado_secundario", "data_referencia", raiz)
+        t_export = time.perf_counter() - inicio
+
+        ini, fim = dias[len(dias) // 4].strftime("%Y-%m-%d"), dias[-1].strftime("%Y-%m-%d")
+        colunas = ["codigo", "taxa_indicativa", "pu", "duration"]
+        poucos = list(codigos[:5])
+
+        t_sql, df_sql = cronometrar(lambda: ler_sqlite(db_path, ini, fim), repeticoes)
+        t_pq, df_pq = cronometrar(lambda: parquet_store.ler_tabela(raiz, "mercado_secundario", colunas, ini, fim), repeticoes)
+        t_sql_c, _ = cronometrar(lambda: ler_sqlite(db_path, ini, fim, poucos), repeticoes)
+        t_pq_c, _ = cronometrar(lambda: parquet_store.ler_tabela(raiz, "mercado_secundario", colunas, ini, fim, poucos), repeticoes)
+
+        tempos_codigos = []
+        for n in [n for n in varredura if n <= ativos]:
+            sel = list(codigos[:n])
+            t_s, _ = cronometrar(lambda: ler_sqlite(db_path, ini, fim, sel), repeticoes)
+            t_p, _ = cronometrar(lambda: parquet_store.ler_tabela(raiz, "mercado_secundario", colunas, ini, fim, sel), repeticoes)
+            tempos_codigos.append([n, t_s, t_p])
+
+        # Mesma varredura com índice por codigo (como spreads_historico e negociacao_snd)
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE INDEX idx_bench_codigo ON mercado_secundario (codigo, data_referencia)")
+        conn.close()
+        for linha in tempos_codigos:
+            sel = list(codigos[:linha[0]])
+            linha.append(cronometrar(lambda: ler_sqlite(db_path, ini, fim, sel), repeticoes)[0])
+
+    print("=" * 60)
+    print(f"🗄️ BENCHMARK HISTÓRICO - {ativos} ativos x {datas} datas ({ativos * datas:,} linhas)")
+    print("=" * 60)
+    print(f"   Exportação Parquet (todas as datas): {t_export:8.2f} s")
+    print(f"   Intervalo {ini} a {fim} ({len(df_sql):,} linhas)")
+    print(f"     SQLite (read_sql):  {t_sql * 1000:10.1f} ms")
+    print(f"     Parquet:            {t_pq * 1000:10.1f} ms   ({t_sql / t_pq:.1f}x)")
+    print(f"   Mesmo intervalo, {len(poucos)} ativos")
+    print(f"     SQLite (read_sql):  {t_sql_c * 1000:10.1f} ms")
+    print(f"     Parquet:            {t_pq_c * 1000:10.1f} ms   ({t_sql_c / t_pq_c:.1f}x)")
+    print(f"   Mesmo intervalo, por número de ativos (com índice, SQLite até {LIMITE_CODIGOS_SQLITE})")
+    print("     ativos   SQLite  SQLite+índice   Parquet   (Parquet vs. SQLite / SQLite+índice)")
+    for n, t_s, t_p, t_i in tempos_codigos:
+        print(f"     {n:6d} {t_s * 1000:8.1f} {t_i * 1000:14.1f} {t_p * 1000:9.1f}   "
+              f"({t_s / t_p:.1f}x / {t_i / t_p:.1f}x)   ms")
+    print("-" * 60)
+    print(f"   Linhas iguais: {len(df_sql) == len(df_pq)}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
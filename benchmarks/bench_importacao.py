@@ -0,0 +1,96 @@
+"""
+Benchmark - Custo de importação (cold start) do app e de cada página
+
+Para cada arquivo (app.py e pages/*), executa só os imports do topo do arquivo
+(extraídos com ast, inclusive os de blocos try) em um processo Python novo com
+`-X importtime`, e mede o tempo total e os módulos mais caros. Dois cenários:
+
+- frio: processo novo, paga streamlit e pandas (primeira página após subir o servidor)
+- servidor: streamlit e pandas já carregados (demais páginas no mesmo processo)
+
+Imports feitos dentro de funções ou seções não entram: é o que a página paga
+antes de mostrar qualquer coisa.
+
+Uso:
+    python benchmarks/bench_importacao.py [--repeticoes=5] [--top=5] [arquivo ...]
+"""
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARCO = "--bench-importacao--"
+PRELUDIO_SERVIDOR = "import streamlit, pandas"
+
+
+def arquivos_padrao():
+    pages = os.path.join(BASE_DIR, "pages")
+    return ["app.py"] + sorted(os.path.join("pages", n) for n in os.listdir(pages)
+                               if not n.startswith(("_", ".")) and os.path.isfile(os.path.join(pages, n)))
+
+
+def imports_do_topo(caminho):
+    """Código com os imports de nível de módulo do arquivo (try/except mantidos)"""
+    with open(caminho, encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    nos = [n for n in arvore.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    for no in arvore.body:
+        if isinstance(no, ast.Try) and any(isinstance(n, (ast.Import, ast.ImportFrom)) for n in no.body):
+            corpo = [n for n in no.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+            nos.append(ast.Try(body=corpo, handlers=[ast.ExceptHandler(type=None, name=None, body=[ast.Pass()])],
+                               orelse=[], finalbody=[]))
+    return ast.unparse(ast.Module(body=nos, type_ignores=[]))
+
+
+def medir(codigo, preludio=""):
+    """(segundos, [(módulo, ms cumulativos)]) dos imports após o prelúdio, em processo novo"""
+    script = "\n".join([
+        "import sys, time",
+        preludio,
+        f"sys.stderr.write({MARCO!r} + '\\n')",
+        "inicio = time.perf_counter()",
+        codigo,
+        "print(time.perf_counter() - inicio)",
+    ])
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(BASE_DIR, "src"), BASE_DIR]),
+                    BONDTRACK_AQUECER="0")
+    resultado = subprocess.run([sys.executable, "-X", "importtime", "-c", script], capture_output=True,
+                               text=True, cwd=BASE_DIR, env=ambiente)
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+
+    linhas = resultado.stderr.split(MARCO, 1)[-1].splitlines()
+    modulos = []
+    for linha in linhas:
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|")
+        # Só módulos de primeiro nível (o cumulativo já inclui os submódulos)
+        if not nome.startswith("  "):
+            modulos.append((nome.strip(), int(cumulativo) / 1000))
+    return float(resultado.stdout.strip().splitlines()[-1]), modulos
+
+
+def main():
+    repeticoes, top, arquivos = 5, 5, []
+    for arg in sys.argv[1:]:
+        if arg.startswith("--repeticoes="): repeticoes = int(arg.split("=")[1])
+        elif arg.startswith("--top="): top = int(arg.split("=")[1])
+        else: arquivos.append(arg)
+    arquivos = arquivos or arquivos_padrao()
+
+    print(f"{'arquivo':<32} {'frio (ms)':>10} {'servidor (ms)':>14}   mais caros no servidor (ms cumulativos)")
+    for arquivo in arquivos:
+        codigo = imports_do_topo(os.path.join(BASE_DIR, arquivo))
+        frio = statistics.median(medir(codigo)[0] for _ in range(repeticoes))
+        medicoes = [medir(codigo, PRELUDIO_SERVIDOR) for _ in range(repeticoes)]
+        servidor = statistics.median(m[0] for m in medicoes)
+        caros = sorted(medicoes[-1][1], key=lambda m: -m[1])[:top]
+        print(f"{arquivo:<32} {frio * 1000:>10.0f} {servidor * 1000:>14.0f}   "
+              + ", ".join(f"{nome} {ms:.0f}" for nome, ms in caros))
+
+
+if __name__ == "__main__":
+    main()
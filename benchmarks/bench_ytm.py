@@ -0,0 +1,84 @@
+"""
+Benchmark - YTM em lote vs. laço por título com scipy.optimize
+
+Compara financial_math.calcular_ytm_vetorizado com um laço de brentq por título
+sobre uma carteira sintética de debêntures com cupom e amortização.
+
+Uso:
+    python benchmarks/bench_ytm.py [--n=5000] [--repeticoes=3]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import optimize
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import financial_math as fm
+
+
+def gerar_carteira(n, seed=42):
+    """Títulos sintéticos: cupom semestral, prazos de 1 a 15 anos, PU a partir de uma YTM conhecida"""
+    rng = np.random.default_rng(seed)
+    anos = rng.integers(1, 16, n)
+    cupom = rng.uniform(0.04, 0.14, n)
+    ytm = rng.uniform(0.03, 0.20, n)
+    fluxos = []
+    for a, c in zip(anos, cupom):
+        t = np.arange(0.5, a + 0.01, 0.5)
+        v = np.full(len(t), 100 * ((1 + c) ** 0.5 - 1))
+        v[-1] += 100
+        fluxos.append(list(zip(t, v)))
+    prazos, valores = fm.montar_matriz_fluxos(fluxos)
+    pus = (valores * np.power(1 + ytm[:, None], -prazos)).sum(axis=1)
+    return fluxos, prazos, valores, pus, ytm * 100
+
+
+def ytm_scipy(pus, fluxos):
+    resultado = np.empty(len(pus))
+    for i, (pu, f) in enumerate(zip(pus, fluxos)):
+        t = np.array([x[0] for x in f])
+        v = np.array([x[1] for x in f])
+        resultado[i] = optimize.brentq(lambda y: (v / (1 + y) ** t).sum() - pu, -0.99, 10.0, xtol=1e-12) * 100
+    return resultado
+
+
+def cronometrar(func, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), saida
+
+
+def main():
+    n, repeticoes = 5000, 3
+    for arg in sys.argv[1:]:
+        if arg.startswith("--n="): n = int(arg.split("=")[1])
+        if arg.startswith("--repeticoes="): repeticoes = int(arg.split("=")[1])
+
+    fluxos, prazos, valores, pus, ytm_real = gerar_carteira(n)
+
+    t_vet, r = cronometrar(lambda: fm.calcular_ytm_vetorizado(pus, prazos, valores), repeticoes)
+    t_scipy, ytm_sp = cronometrar(lambda: ytm_scipy(pus, fluxos), repeticoes)
+
+    print("=" * 60)
+    print(f"📐 BENCHMARK YTM - {n} títulos, {prazos.shape[1]} fluxos máx.")
+    print("=" * 60)
+    print(f"   Vetorizado (Newton + bissecção): {t_vet * 1000:10.1f} ms")
+    print(f"   scipy.optimize.brentq por título: {t_scipy * 1000:10.1f} ms")
+    print(f"   Speedup: {t_scipy / t_vet:.1f}x")
+    print("-" * 60)
+    print(f"   Convergiram: {int(r['convergiu'].sum())}/{n}")
+    print(f"   Métodos: { {m: int((r['metodo'] == m).sum()) for m in np.unique(r['metodo'])} }")
+    print(f"   Iterações (média/máx): {r['iteracoes'].mean():.1f} / {r['iteracoes'].max()}")
+    print(f"   Erro máx. vs YTM real: {np.nanmax(np.abs(r['ytm'] - ytm_real)):.2e} p.p.")
+    print(f"   Erro máx. vs scipy:    {np.nanmax(np.abs(r['ytm'] - ytm_sp)):.2e} p.p.")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
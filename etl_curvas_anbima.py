@@ -16,23 +16,6 @@ DB_DIR = os.path.join(os.path.dirname(__file__), 'data')
 DB_PATH = os.path.join(DB_DIR, 'curvas_anbima.db')
 
 
-def get_ultimos_dias_uteis(n=3):
-    """
-    Retorna lista com os últimos N dias úteis (seg-sex)
-    """
-    dias = []
-    hoje = datetime.datetime.now()
-    d = hoje
-    
-    while len(dias) < n:
-        d = d - datetime.timedelta(days=1)
-        # Dias úteis: segunda (0) a sexta (4)
-        if d.weekday() < 5:
-            dias.append(d)
-    
-    return dias
-
-
 def baixar_dados_anbima():
     """Baixa dados da ANBIMA e retorna conteúdo + data de referência"""
     try:
@@ -0,0 +1,32 @@
+"""
+ETL de Fluxos de Caixa - Cronogramas de Pagamento das Debêntures
+Gera os cronogramas (juros e amortização) a partir do cadastro SND e grava na
+tabela fluxos_caixa. Apenas ativos com cadastro alterado são reconstruídos.
+"""
+import os
+import sys
+
+from src import cash_flows
+
+print("🚀 Iniciando ETL Fluxos de Caixa (Cadastro SND)...")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, 'data', 'debentures_anbima.db')
+
+
+def executar_etl_fluxos(forcar=False):
+    if not os.path.exists(DB_PATH):
+        print(f"❌ Banco não encontrado: {DB_PATH}")
+        return False
+
+    reconstruidos, removidos, total = cash_flows.atualizar_cronogramas(DB_PATH, forcar=forcar)
+
+    print(f"🔁 Cronogramas reconstruídos: {reconstruidos}")
+    print(f"🧹 Cronogramas removidos: {removidos}")
+    print(f"📊 Total no banco: {total} ativos com fluxo")
+    return total > 0
+
+
+if __name__ == "__main__":
+    forcar = "--forcar" in sys.argv
+    executar_etl_fluxos(forcar=forcar)
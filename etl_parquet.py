@@ -0,0 +1,40 @@
+"""
+ETL Parquet - Cópia Colunar do Histórico Particionada por Data
+Exporta as tabelas históricas do SQLite (taxas ANBIMA, negócios SND, curvas e
+spreads) para data/parquet, uma partição por data. Só as datas novas ou
+alteradas são regravadas. Sem pyarrow instalado, a etapa é ignorada e o app
+continua lendo do SQLite.
+"""
+import os
+import sys
+
+from src import parquet_store
+
+print("🚀 Iniciando ETL Parquet (histórico colunar por data)...")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+PARQUET_DIR = os.path.join(DATA_DIR, 'parquet')
+
+
+def executar_etl_parquet(forcar=False):
+    if not parquet_store.pyarrow_instalado():
+        print("⚠️ pyarrow não instalado; exportação Parquet ignorada")
+        return True
+
+    for tabela, (banco, coluna_data) in parquet_store.TABELAS.items():
+        db_path = os.path.join(DATA_DIR, banco)
+        if not os.path.exists(db_path):
+            print(f"⚠️ {tabela}: banco não encontrado ({banco})")
+            continue
+        try:
+            gravadas = parquet_store.exportar_tabela(db_path, tabela, coluna_data, PARQUET_DIR, forcar=forcar)
+            print(f"✅ {tabela}: {gravadas} partições gravadas")
+        except Exception as e:
+            print(f"⚠️ {tabela}: {e}")
+    return True
+
+
+if __name__ == "__main__":
+    forcar = "--forcar" in sys.argv
+    executar_etl_parquet(forcar=forcar)
@@ -5,11 +5,13 @@ Captura preços de negociação e calcula volume total por ativo
 import os
 import pandas as pd
 import sqlite3
-from datetime import datetime, timedelta
+from datetime import datetime
 from playwright.sync_api import sync_playwright
 import time
 import io
 
+from src import business_days
+
 # --- CONFIGURAÇÕES ---
 URL_FORM = "https://www.debentures.com.br/exploreosnd/consultaadados/mercadosecundario/precosdenegociacao_f.asp"
 URL_BASE_DOWNLOAD = "https://www.debentures.com.br/exploreosnd/consultaadados/mercadosecundario/precosdenegociacao_e.asp"
@@ -23,35 +25,6 @@ if not os.path.exists(DOWNLOAD_DIR):
     os.makedirs(DOWNLOAD_DIR)
 
 
-def get_d_minus_1():
-    """Retorna D-1 (dia útil anterior)"""
-    hoje = datetime.now()
-    if hoje.weekday() == 0:  # Segunda
-        d1 = hoje - timedelta(days=3)
-    elif hoje.weekday() == 6:  # Domingo
-        d1 = hoje - timedelta(days=2)
-    else:
-        d1 = hoje - timedelta(days=1)
-    return d1
-
-
-def get_ultimos_dias_uteis(n=3):
-    """
-    Retorna lista com os últimos N dias úteis (seg-sex)
-    """
-    dias = []
-    hoje = datetime.now()
-    d = hoje
-    
-    while len(dias) < n:
-        d = d - timedelta(days=1)
-        # Dias úteis: segunda (0) a sexta (4)
-        if d.weekday() < 5:
-            dias.append(d)
-    
-    return dias
-
-
 def extract_snd(data_alvo=None, headless=True, use_system_chrome=True):
     """
     Extrai dados de negociação do SND via web scraping
@@ -65,7 +38,7 @@ def extract_snd(data_alvo=None, headless=True, use_system_chrome=True):
     print("🚀 [ETL] Iniciando Extração SND - Preços de Negociação...")
     
     if data_alvo is None:
-        d1_obj = get_d_minus_1()
+        d1_obj = business_days.dia_util_anterior()
     else:
         d1_obj = data_alvo
         
@@ -208,7 +181,7 @@ def transform_data(file_path, data_alvo=None):
         if data_alvo:
             data_ref = data_alvo.strftime('%Y-%m-%d')
         else:
-            data_ref = get_d_minus_1().strftime('%Y-%m-%d')
+            data_ref = business_days.dia_util_anterior().strftime('%Y-%m-%d')
         df['data_base'] = data_ref
         df['data_atualizacao'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
@@ -480,7 +453,7 @@ def executar_etl_completo(headless=True, use_system_chrome=True, dias=3):
     print("="*50)
     
     # Obter lista de dias úteis a processar
-    datas = get_ultimos_dias_uteis(dias)
+    datas = business_days.ultimos_dias_uteis(dias)
     
     sucessos = 0
     erros = 0
@@ -527,7 +500,7 @@ def executar_etl_dia_unico(data_alvo=None, headless=True, use_system_chrome=True
     Executa ETL para um único dia (para compatibilidade)
     """
     if data_alvo is None:
-        data_alvo = get_d_minus_1()
+        data_alvo = business_days.dia_util_anterior()
     
     arquivo = extract_snd(data_alvo=data_alvo, headless=headless, use_system_chrome=use_system_chrome)
     if arquivo:
@@ -0,0 +1,75 @@
+"""
+ETL de Spreads - Spread (I-spread) e Z-spread por Ativo e Data
+Calcula os spreads de todos os ativos de cada data sobre a curva ANBIMA do mesmo
+dia e grava na tabela spreads_historico. Só são recalculadas as datas novas ou
+cujas taxas, negócios ou curva mudaram desde o último cálculo. Em seguida,
+atualiza as estatísticas móveis (30/90/252 datas) na tabela spreads_estatisticas
+(o estado incremental fica em data/estado/, fora do banco versionado e mantido
+entre execuções do workflow pelo actions/cache).
+"""
+import os
+import sys
+
+from src import data_engine as engine
+from src import spreads
+
+print("🚀 Iniciando ETL Spreads (spread e Z-spread sobre a curva ANBIMA)...")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, 'data', 'debentures_anbima.db')
+
+COLUNAS_ISPREAD = ['codigo', 'tipo_curva', 'taxa', 'duration', 'taxa_benchmark', 'spread_bps']
+
+
+def processar_data(data_ref, assinatura=None):
+    """Calcula e grava os spreads de uma data; retorna o número de ativos gravados"""
+    curva = engine.get_yield_curve(data_ref)
+    if curva is None:
+        print(f"⚠️ {data_ref}: sem curva ANBIMA na data")
+        return 0
+
+    df, erro = engine.load_data(data_ref)
+    if erro or df is None or df.empty:
+        print(f"⚠️ {data_ref}: sem dados ({erro})")
+        return 0
+
+    df = engine.adicionar_spreads_ao_df(df, curva)
+    df_i = df[[c for c in COLUNAS_ISPREAD if c in df.columns]].drop_duplicates('codigo')
+    df_z = engine.calcular_z_spreads(df, data_ref, curva)
+
+    df_spreads = df_i.merge(df_z, on='codigo', how='outer', suffixes=('', '_z'))
+    if 'tipo_curva_z' in df_spreads.columns:
+        df_spreads['tipo_curva'] = df_spreads['tipo_curva'].fillna(df_spreads.pop('tipo_curva_z'))
+    df_spreads = df_spreads[df_spreads[['spread_bps', 'z_spread_bps']].notna().any(axis=1)]
+    if df_spreads.empty:
+        print(f"⚠️ {data_ref}: nenhum spread calculado")
+        return 0
+
+    gravados = spreads.salvar_spreads(DB_PATH, df_spreads, data_ref, assinatura)
+    print(f"✅ {data_ref}: {gravados} ativos ({int(df_spreads['z_spread_bps'].notna().sum())} com Z-spread)")
+    return gravados
+
+
+def executar_etl_spreads(forcar=False):
+    if not os.path.exists(DB_PATH):
+        print(f"❌ Banco não encontrado: {DB_PATH}")
+        return False
+
+    atuais = spreads.assinaturas_fontes(DB_PATH, engine.DB_CURVAS)
+    gravadas = {} if forcar else spreads.assinaturas_gravadas(DB_PATH)
+    pendentes = [d for d in engine.get_available_dates()
+                 if atuais.get(spreads.data_para_iso(d)) != gravadas.get(spreads.data_para_iso(d), '')]
+    print(f"📅 Datas novas ou alteradas: {len(pendentes)}")
+
+    total = sum(processar_data(d, atuais.get(spreads.data_para_iso(d))) for d in pendentes)
+    print(f"📊 Total gravado: {total} linhas")
+
+    # Estatísticas móveis: só as datas posteriores à última processada entram nas janelas
+    novas = spreads.atualizar_estatisticas(DB_PATH, forcar=forcar)
+    print(f"📈 Estatísticas móveis atualizadas ({novas} datas novas)")
+    return True
+
+
+if __name__ == "__main__":
+    forcar = "--forcar" in sys.argv
+    executar_etl_spreads(forcar=forcar)
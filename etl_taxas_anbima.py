@@ -7,10 +7,12 @@ import pandas as pd
 import sqlite3
 import requests
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from io import StringIO
 import time
 
+from src import business_days
+
 print("🚀 Iniciando ETL Taxas Indicativas ANBIMA...")
 
 # --- CONFIGURAÇÕES ---
@@ -30,20 +32,6 @@ HEADERS = {
 }
 
 
-def get_ultimos_dias_uteis(n=3):
-    """Retorna lista com os últimos N dias úteis"""
-    dias = []
-    hoje = datetime.now()
-    d = hoje
-    
-    while len(dias) < n:
-        d = d - timedelta(days=1)
-        if d.weekday() < 5:  # Seg-Sex
-            dias.append(d)
-    
-    return dias
-
-
 def baixar_dados_anbima(data_obj):
     """
     Tenta baixar dados de taxas indicativas da ANBIMA para uma data específica.
@@ -353,7 +341,7 @@ def executar_etl_taxas_indicativas(dias=3):
     print(f"   Processando últimos {dias} dias úteis")
     print("="*60)
     
-    datas = get_ultimos_dias_uteis(dias)
+    datas = business_days.ultimos_dias_uteis(dias)
     
     total_registros = 0
     sucessos = 0
@@ -0,0 +1,42 @@
+"""
+ETL do Universo - Universo Enriquecido das Datas Mais Recentes
+Calcula o universo (merge SND + ANBIMA + cadastro, limpeza, spreads e Z-spreads)
+das datas mais recentes e grava na tabela universo_enriquecido do banco
+versionado, com a assinatura das fontes de cada data. O app publicado lê esse
+frame na primeira visita em vez de refazer o merge. Última etapa do main_etl:
+roda depois de todas as cargas, para a assinatura corresponder ao banco
+publicado.
+"""
+import os
+
+from src import data_engine as engine
+from src import universo_gravado
+
+print("🚀 Iniciando ETL Universo (universo enriquecido das datas mais recentes)...")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, 'data', 'debentures_anbima.db')
+
+
+def executar_etl_universo(n_datas=universo_gravado.N_DATAS):
+    if not os.path.exists(DB_PATH):
+        print(f"❌ Banco não encontrado: {DB_PATH}")
+        return False
+
+    universos = []
+    for data_ref in engine.get_available_dates()[:n_datas]:
+        df, erro = engine.calcular_universo(data_ref)
+        if erro or df is None or df.empty:
+            print(f"⚠️ {data_ref}: sem dados ({erro})")
+            continue
+        assinatura = universo_gravado.assinatura_fontes(DB_PATH, engine.DB_CURVAS, data_ref)
+        universos.append((data_ref, df, assinatura))
+        print(f"✅ {data_ref}: {len(df)} ativos, {len(df.columns)} colunas")
+
+    total = universo_gravado.salvar_universos(DB_PATH, universos)
+    print(f"📊 Total gravado: {total} linhas ({len(universos)} datas)")
+    return bool(universos)
+
+
+if __name__ == "__main__":
+    executar_etl_universo()
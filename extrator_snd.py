@@ -1,30 +1,10 @@
 import pandas as pd
 import sqlite3
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from playwright.sync_api import sync_playwright
 
-
-def get_last_business_day(date):
-    offset = 3 if date.weekday() == 0 else (2 if date.weekday() == 6 else 1)
-    return date - timedelta(days=offset)
-
-
-def get_ultimos_dias_uteis(n=3):
-    """
-    Retorna lista com os últimos N dias úteis (seg-sex)
-    """
-    dias = []
-    hoje = datetime.now()
-    d = hoje
-    
-    while len(dias) < n:
-        d = d - timedelta(days=1)
-        # Dias úteis: segunda (0) a sexta (4)
-        if d.weekday() < 5:
-            dias.append(d)
-    
-    return dias
+from src import business_days
 
 
 def salvar_cadastro_com_upsert(df, db_path):
@@ -112,7 +92,7 @@ def executar_automacao_snd(headless=True):
             download.save_as("temp_snd.xls")
 
             # PADRONIZAÇÃO DE DATA BR
-            data_br = get_last_business_day(datetime.now()).strftime('%d/%m/%Y')
+            data_br = business_days.dia_util_anterior().strftime('%d/%m/%Y')
 
             df = pd.read_csv("temp_snd.xls", sep='\t', encoding='latin-1', skiprows=4)
             df.columns = [str(c).strip() for c in df.columns]
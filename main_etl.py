@@ -29,6 +29,13 @@ PIPELINE = [
         "tabela": "cadastro_snd",
         "coluna_data": "data_referencia"
     },
+    {
+        "nome": "1b. FLUXOS DE CAIXA (CADASTRO SND)",
+        "script": "etl_fluxos_caixa.py",
+        "banco": "debentures_anbima.db",
+        "tabela": "fluxos_caixa",
+        "coluna_data": "data_atualizacao"
+    },
     {
         "nome": "2. CURVAS DE JUROS (ANBIMA)",
         "script": "etl_curvas_anbima.py",
@@ -49,6 +56,28 @@ PIPELINE = [
         "banco": "debentures_anbima.db",
         "tabela": "negociacao_snd",
         "coluna_data": "data_referencia"
+    },
+    {
+        "nome": "5. SPREADS (Z-SPREAD SOBRE A CURVA)",
+        "script": "etl_spreads.py",
+        "banco": "debentures_anbima.db",
+        "tabela": "spreads_historico",
+        "coluna_data": "data_referencia"
+    },
+    {
+        "nome": "6. HISTÓRICO PARQUET (PARTIÇÕES POR DATA)",
+        "script": "etl_parquet.py",
+        "banco": "debentures_anbima.db",
+        "tabela": "mercado_secundario",
+        "coluna_data": "data_referencia",
+        "so_local": True  # O workflow versiona só data/*.db: no Actions a saída seria descartada
+    },
+    {
+        "nome": "7. UNIVERSO PRÉ-CALCULADO (LIDO PELO APP)",
+        "script": "etl_universo.py",
+        "banco": "debentures_anbima.db",
+        "tabela": "universo_controle",
+        "coluna_data": "data_referencia"
     }
 ]
 
@@ -118,6 +147,10 @@ def rodar_pipeline():
         print(f"\n🚀 ETAPA: {tarefa['nome']}")
         print("." * 40)
 
+        if tarefa.get("so_local") and os.environ.get("GITHUB_ACTIONS") == "true":
+            log(f"{script} pulado no GitHub Actions (saída só usada localmente).", "INFO")
+            continue
+
         if not os.path.exists(caminho_script):
             log(f"Script não encontrado no repo: {script}", "ERRO")
             erros_totais += 1
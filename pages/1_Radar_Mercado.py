@@ -11,7 +11,6 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src
 
 import data_engine as engine
 import visuals
-import financial_math as fm
 import sidebar_utils
 
 st.set_page_config(page_title="Radar de Mercado", page_icon="📡", layout="wide")
@@ -47,7 +46,7 @@ with st.sidebar:
     # Filtros
     st.markdown("### Filtros")
     
-    df_full, erro = engine.load_data(data_ref)
+    df_full, erro = engine.load_universo(data_ref)
     
     if erro or df_full is None or df_full.empty:
         st.error(f"Erro ao carregar dados: {erro}")
@@ -111,119 +110,125 @@ with col4:
 
 st.divider()
 
+# ===== SEÇÕES =====
+# Só a seção escolhida é calculada e renderizada a cada rerun
+secao = st.radio(
+    "Seção",
+    ["Heatmap", "Curvas de Juros", "Top Performers", "Distribuições", "Tabela Completa"],
+    horizontal=True,
+    label_visibility="collapsed",
+    key="radar_secao"
+)
+
 # ===== HEATMAP DE RISCO =====
-st.markdown("### Heatmap de Taxas por Indexador")
+if secao == "Heatmap":
+    st.markdown("### Heatmap de Taxas por Indexador")
 
-if not df.empty and len(df) > 0:
-    # Selecionar principais indexadores
-    indexadores_principais = df['indexador'].value_counts().nlargest(5).index.tolist()
+    if not df.empty and len(df) > 0:
+        # Selecionar principais indexadores
+        indexadores_principais = df['indexador'].value_counts().nlargest(5).index.tolist()
     
-    fig_heatmap = visuals.create_heatmap_indexador(df, indexadores_principais)
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-else:
-    st.info("Dados insuficientes para gerar heatmap")
-
-st.divider()
+        fig_heatmap = visuals.create_heatmap_indexador(df, indexadores_principais)
+        st.plotly_chart(fig_heatmap, use_container_width=True)
+    else:
+        st.info("Dados insuficientes para gerar heatmap")
 
 # ===== CURVAS DE JUROS =====
-st.markdown("### Curvas de Juros por Indexador")
+if secao == "Curvas de Juros":
+    st.markdown("### Curvas de Juros por Indexador")
 
-col_curva1, col_curva2 = st.columns(2)
+    col_curva1, col_curva2 = st.columns(2)
 
-# Curva IPCA
-with col_curva1:
-    df_ipca = df[df['indexador'].str.contains('IPCA', na=False)]
-    df_ipca = df_ipca[(df_ipca['taxa'] > 0) & (df_ipca['duration'] > 0)]
+    # Curva IPCA
+    with col_curva1:
+        df_ipca = df[df['indexador'].str.contains('IPCA', na=False)]
+        df_ipca = df_ipca[(df_ipca['taxa'] > 0) & (df_ipca['duration'] > 0)]
     
-    if not df_ipca.empty:
-        fig_ipca = visuals.create_curva_juros(df_ipca, "IPCA", color="#00CC96")
-        st.plotly_chart(fig_ipca, use_container_width=True)
-    else:
-        st.info("Sem dados para curva IPCA")
+        if not df_ipca.empty:
+            fig_ipca = visuals.create_curva_juros(df_ipca, "IPCA", color="#00CC96")
+            st.plotly_chart(fig_ipca, use_container_width=True)
+        else:
+            st.info("Sem dados para curva IPCA")
 
-# Curva CDI
-with col_curva2:
-    df_cdi = df[df['indexador'].str.contains('CDI', na=False)]
-    df_cdi = df_cdi[(df_cdi['taxa'] > 0) & (df_cdi['duration'] > 0)]
+    # Curva CDI
+    with col_curva2:
+        df_cdi = df[df['indexador'].str.contains('CDI', na=False)]
+        df_cdi = df_cdi[(df_cdi['taxa'] > 0) & (df_cdi['duration'] > 0)]
     
-    if not df_cdi.empty:
-        fig_cdi = visuals.create_curva_juros(df_cdi, "CDI", color="#636EFA")
-        st.plotly_chart(fig_cdi, use_container_width=True)
-    else:
-        st.info("Sem dados para curva CDI")
-
-st.divider()
+        if not df_cdi.empty:
+            fig_cdi = visuals.create_curva_juros(df_cdi, "CDI", color="#636EFA")
+            st.plotly_chart(fig_cdi, use_container_width=True)
+        else:
+            st.info("Sem dados para curva CDI")
 
 # ===== TOP MOVERS =====
-st.markdown("### Top Performers")
-
-col_top1, col_top2 = st.columns(2)
-
-with col_top1:
-    st.markdown("#### Top 10 Maiores Taxas")
-    
-    # Filtro por indexador para Top Taxas
-    indexadores_top = ["Todos"] + sorted(df[df['taxa'] > 0]['indexador'].dropna().unique().tolist())
-    filtro_indexador_top = st.selectbox(
-        "Filtrar por Indexador",
-        indexadores_top,
-        key="filtro_indexador_top_taxas"
-    )
-    
-    df_for_top = df[df['taxa'] > 0].copy()
-    if filtro_indexador_top != "Todos":
-        df_for_top = df_for_top[df_for_top['indexador'] == filtro_indexador_top]
-    
-    df_top_taxas = df_for_top.nlargest(10, 'taxa')[['codigo', 'emissor', 'taxa', 'indexador', 'duration']]
-    st.dataframe(
-        df_top_taxas.style.format({'taxa': '{:.2f}%', 'duration': '{:.2f}'}),
-        hide_index=True,
-        use_container_width=True,
-        height=350
-    )
-
-with col_top2:
-    st.markdown("#### Top 10 Maiores Durations")
-    df_top_duration = df[df['duration'] > 0].nlargest(10, 'duration')[['codigo', 'emissor', 'duration', 'indexador', 'taxa']]
-    st.dataframe(
-        df_top_duration.style.format({'taxa': '{:.2f}%', 'duration': '{:.2f}'}),
-        hide_index=True,
-        use_container_width=True,
-        height=400
-    )
-
-st.divider()
+if secao == "Top Performers":
+    st.markdown("### Top Performers")
+
+    col_top1, col_top2 = st.columns(2)
+
+    with col_top1:
+        st.markdown("#### Top 10 Maiores Taxas")
+    
+        # Filtro por indexador para Top Taxas
+        indexadores_top = ["Todos"] + sorted(df[df['taxa'] > 0]['indexador'].dropna().unique().tolist())
+        filtro_indexador_top = st.selectbox(
+            "Filtrar por Indexador",
+            indexadores_top,
+            key="filtro_indexador_top_taxas"
+        )
+    
+        df_for_top = df[df['taxa'] > 0].copy()
+        if filtro_indexador_top != "Todos":
+            df_for_top = df_for_top[df_for_top['indexador'] == filtro_indexador_top]
+    
+        df_top_taxas = df_for_top.nlargest(10, 'taxa')[['codigo', 'emissor', 'taxa', 'indexador', 'duration']]
+        st.dataframe(
+            df_top_taxas.style.format({'taxa': '{:.2f}%', 'duration': '{:.2f}'}),
+            hide_index=True,
+            use_container_width=True,
+            height=350
+        )
+
+    with col_top2:
+        st.markdown("#### Top 10 Maiores Durations")
+        df_top_duration = df[df['duration'] > 0].nlargest(10, 'duration')[['codigo', 'emissor', 'duration', 'indexador', 'taxa']]
+        st.dataframe(
+            df_top_duration.style.format({'taxa': '{:.2f}%', 'duration': '{:.2f}'}),
+            hide_index=True,
+            use_container_width=True,
+            height=400
+        )
 
 # ===== DISTRIBUIÇÕES =====
-st.markdown("### Distribuições")
-
-col_dist1, col_dist2 = st.columns(2)
-
-with col_dist1:
-    fig_box_taxa = visuals.create_box_plot_categoria(
-        df[df['taxa'] > 0],
-        x_col='categoria_grafico',
-        y_col='taxa',
-        title="Distribuição de Taxas por Categoria"
-    )
-    st.plotly_chart(fig_box_taxa, use_container_width=True)
-
-with col_dist2:
-    fig_box_duration = visuals.create_box_plot_categoria(
-        df[df['duration'] > 0],
-        x_col='categoria_grafico',
-        y_col='duration',
-        title="Distribuição de Duration por Categoria"
-    )
-    st.plotly_chart(fig_box_duration, use_container_width=True)
-
-st.divider()
+if secao == "Distribuições":
+    st.markdown("### Distribuições")
+
+    col_dist1, col_dist2 = st.columns(2)
+
+    with col_dist1:
+        fig_box_taxa = visuals.create_box_plot_categoria(
+            df[df['taxa'] > 0],
+            x_col='categoria_grafico',
+            y_col='taxa',
+            title="Distribuição de Taxas por Categoria"
+        )
+        st.plotly_chart(fig_box_taxa, use_container_width=True)
+
+    with col_dist2:
+        fig_box_duration = visuals.create_box_plot_categoria(
+            df[df['duration'] > 0],
+            x_col='categoria_grafico',
+            y_col='duration',
+            title="Distribuição de Duration por Categoria"
+        )
+        st.plotly_chart(fig_box_duration, use_container_width=True)
 
 # ===== TABELA COMPLETA =====
-with st.expander("Ver Tabela Completa"):
+if secao == "Tabela Completa":
     cols_view = ['codigo', 'emissor', 'categoria_grafico', 'indexador', 'taxa', 'duration', 'pu', 'FONTE']
     cols_disponiveis = [c for c in cols_view if c in df.columns]
-    
+
     st.dataframe(
         df[cols_disponiveis].sort_values('taxa', ascending=False),
         use_container_width=True,
@@ -5,8 +5,6 @@ import streamlit as st
 import sys
 import os
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 
 # Adiciona o diretório src ao path
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
@@ -60,22 +58,15 @@ with st.sidebar:
     st.session_state['global_data_ref'] = data_ref
 
 # ===== CARREGAR DADOS =====
-df_full, erro = engine.load_data(data_ref)
+df_full, erro = engine.load_universo(data_ref)
 
 if erro or df_full is None or df_full.empty:
     st.error(f"Erro ao carregar dados: {erro}")
     st.stop()
 
-# Carregar curva ANBIMA e adicionar spreads
-try:
-    curva_df = engine.load_curva_anbima(data_ref)
-    if not curva_df.empty:
-        df_full = engine.adicionar_spreads_ao_df(df_full, curva_df)
-        curva_disponivel = True
-    else:
-        curva_disponivel = False
-except:
-    curva_disponivel = False
+# Spread sobre a curva ANBIMA e Z-spread (ETL) já vêm no universo enriquecido
+curva_disponivel = 'spread_bps' in df_full.columns
+z_disponivel = 'z_spread_bps' in df_full.columns and df_full['z_spread_bps'].notna().any()
 
 # ===== CONTEÚDO PRINCIPAL =====
 st.title("Screener Pro - Filtros Avançados")
@@ -164,6 +155,41 @@ with st.expander("Filtros de Spread vs Curva ANBIMA"):
     else:
         st.warning("Curva ANBIMA indisponível para esta data.")
 
+    if z_disponivel:
+        col_z1, col_z2 = st.columns(2)
+        df_z_valid = df_full[df_full['z_spread_bps'].notna()]
+        min_z = float(df_z_valid['z_spread_bps'].min())
+        max_z = float(df_z_valid['z_spread_bps'].max())
+
+        with col_z1:
+            z_min, z_max = st.slider("Z-spread (bps)", min_z, max_z, (min_z, max_z), 1.0)
+            filtros['z_spread_min'] = z_min
+            filtros['z_spread_max'] = z_max
+
+        with col_z2:
+            st.info("Z-spread = spread constante sobre toda a curva que reprecifica os fluxos do ativo.")
+
+    # Estatísticas móveis gravadas pelo ETL (spread atual vs. histórico do próprio ativo)
+    janela_est = st.radio("Janela do histórico (datas)", [30, 90, 252], index=1, horizontal=True)
+    df_full = engine.adicionar_estatisticas_ao_df(df_full, 'spread_bps', janela_est)
+    est_disponivel = 'spread_bps_zscore' in df_full.columns and df_full['spread_bps_zscore'].notna().any()
+
+    if est_disponivel:
+        col_e1, col_e2 = st.columns(2)
+        df_e_valid = df_full[df_full['spread_bps_zscore'].notna()]
+        min_e = float(df_e_valid['spread_bps_zscore'].min())
+        max_e = float(df_e_valid['spread_bps_zscore'].max())
+
+        with col_e1:
+            if max_e > min_e:
+                e_min, e_max = st.slider("Z-score do spread", min_e, max_e, (min_e, max_e), 0.1)
+                filtros['spread_zscore_min'] = e_min
+                filtros['spread_zscore_max'] = e_max
+
+        with col_e2:
+            st.info(f"Z-score = (spread atual - média de {janela_est} datas) / desvio. "
+                    "Positivo = spread acima do próprio histórico.")
+
 # Accordion 4 - Filtros de Liquidez
 with st.expander("Filtros de Liquidez"):
     if 'cluster_duration' in df_full.columns:
@@ -183,6 +209,18 @@ if 'spread_min' in filtros and 'spread_bps' in df.columns:
         ((df['spread_bps'] >= filtros['spread_min']) & (df['spread_bps'] <= filtros['spread_max']))
     ]
 
+if 'z_spread_min' in filtros and 'z_spread_bps' in df.columns:
+    df = df[
+        (df['z_spread_bps'].isna()) |
+        ((df['z_spread_bps'] >= filtros['z_spread_min']) & (df['z_spread_bps'] <= filtros['z_spread_max']))
+    ]
+
+if 'spread_zscore_min' in filtros and 'spread_bps_zscore' in df.columns:
+    df = df[
+        (df['spread_bps_zscore'].isna()) |
+        ((df['spread_bps_zscore'] >= filtros['spread_zscore_min']) & (df['spread_bps_zscore'] <= filtros['spread_zscore_max']))
+    ]
+
 if df.empty:
     st.warning("Nenhum ativo encontrado com esses filtros.")
     st.stop()
@@ -205,21 +243,29 @@ else:
 st.divider()
 
 # ===== GRÁFICOS =====
-tab1, tab2 = st.tabs(["Risco x Retorno", "Spread x Duration"])
+# Seletor de gráfico: só o escolhido é montado a cada rerun
+grafico = st.radio("Gráfico", ["Risco x Retorno", "Spread x Duration"], horizontal=True,
+                   label_visibility="collapsed", key="screener_grafico")
 
-with tab1:
+if grafico == "Risco x Retorno":
     if 'taxa' in df.columns and 'duration' in df.columns:
-        df_g = df[(df['taxa'] > 0) & (df['duration'] > 0)].copy()
+        df_g = df[(df['taxa'] > 0) & (df['duration'] > 0)]
         if not df_g.empty:
-            fig = visuals.create_scatter_risco_retorno(df_g, height=600)
+            # Ativos destacados (e os dos emissores filtrados) nunca saem na amostragem do gráfico
+            destaques = st.multiselect("Destacar ativos", sorted(df_g['codigo'].astype(str).unique())) if 'codigo' in df_g else []
+            if filtros.get('emissor') and 'emissor' in df_g:
+                destaques = destaques + df_g.loc[df_g['emissor'].isin(filtros['emissor']), 'codigo'].astype(str).tolist()
+            fig = visuals.create_scatter_risco_retorno(df_g, height=600, destaques=destaques)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("Dados insuficientes para gráfico.")
 
-with tab2:
+if grafico == "Spread x Duration":
     if curva_disponivel and 'spread_bps' in df.columns:
         df_s = df[(df['spread_bps'].notna()) & (df['duration'] > 0)].copy()
         if not df_s.empty:
+            import plotly.express as px
+            
             fig_s = px.scatter(
                 df_s, x='duration', y='spread_bps', color='categoria_grafico',
                 hover_name='codigo' if 'codigo' in df_s else None,
@@ -241,16 +287,36 @@ st.markdown("### Tabela Detalhada")
 # Colunas
 cols = ['codigo', 'emissor', 'categoria_grafico', 'indexador', 'taxa', 'duration', 'pu']
 if curva_disponivel and 'spread_bps' in df.columns: cols.extend(['spread_bps'])
+if z_disponivel: cols.append('z_spread_bps')
+if est_disponivel: cols.extend(['spread_bps_media', 'spread_bps_zscore', 'spread_bps_percentil_atual'])
 cols = [c for c in cols if c in df.columns]
 
+# Ordenação e paginação no engine: só a página visível vai para o navegador
+p1, p2, p3, p4 = st.columns([2, 1, 1, 1])
+ordenar_por = p1.selectbox("Ordenar por", cols, index=cols.index('taxa') if 'taxa' in cols else 0, key="screener_ordem")
+decrescente = p2.toggle("Decrescente", value=True, key="screener_decrescente")
+tamanho_pagina = p3.selectbox("Linhas por página", [25, 50, 100, 200], index=1, key="screener_tamanho")
+total_paginas = max(1, -(-len(df) // tamanho_pagina))
+if st.session_state.get("screener_pagina", 1) > total_paginas:
+    st.session_state["screener_pagina"] = total_paginas
+pagina = p4.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, step=1, key="screener_pagina")
+
+resultado = engine.paginar(df, pagina, tamanho_pagina, ordenar_por, ascendente=not decrescente, colunas=cols)
+inicio = (resultado.pagina - 1) * tamanho_pagina
+st.caption(f"Linhas {inicio + 1}–{inicio + len(resultado.dados)} de {resultado.total_linhas}")
+
 st.dataframe(
-    df[cols].sort_values('taxa', ascending=False),
+    resultado.dados,
     use_container_width=True,
-    height=500,
+    height=min(500, 38 + 35 * len(resultado.dados)),
     column_config={
         "taxa": st.column_config.NumberColumn(format="%.2f%%"),
         "duration": st.column_config.NumberColumn(format="%.2f"),
         "pu": st.column_config.NumberColumn(format="R$ %.2f"),
-        "spread_bps": st.column_config.NumberColumn(format="%.0f bps")
+        "spread_bps": st.column_config.NumberColumn(format="%.0f bps"),
+        "z_spread_bps": st.column_config.NumberColumn("z_spread_bps", format="%.0f bps"),
+        "spread_bps_media": st.column_config.NumberColumn(f"Spread médio {janela_est}d", format="%.0f bps"),
+        "spread_bps_zscore": st.column_config.NumberColumn("Z-score spread", format="%.2f"),
+        "spread_bps_percentil_atual": st.column_config.NumberColumn("Percentil spread", format="%.0f%%")
     }
 )
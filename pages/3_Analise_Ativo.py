@@ -5,6 +5,7 @@ import streamlit as st
 import sys
 import os
 import pandas as pd
+import numpy as np
 from datetime import datetime
 
 # Adiciona o diretório src ao path
@@ -52,18 +53,14 @@ with st.sidebar:
     data_ref = st.selectbox("Data de Referência", datas_disponiveis)
 
 # ===== CARREGAR DADOS =====
-df_full, erro = engine.load_data(data_ref)
+df_full, erro = engine.load_universo(data_ref)
 
 if erro or df_full is None or df_full.empty:
     st.error(f"Erro ao carregar dados: {erro}")
     st.stop()
 
-# Carregar curva ANBIMA e adicionar spreads
-curva_df = engine.load_curva_anbima()
-curva_disponivel = not curva_df.empty
-
-if curva_disponivel:
-    df_full = engine.adicionar_spreads_ao_df(df_full, curva_df)
+# Spreads sobre a curva ANBIMA já vêm no universo enriquecido
+curva_disponivel = 'spread_bps' in df_full.columns
 
 # ===== CONTEÚDO PRINCIPAL =====
 st.title("Análise Detalhada de Ativo")
@@ -140,6 +137,10 @@ taxa = ativo_data['taxa'] if ativo_data['taxa'] > 0 else 0
 pu = ativo_data.get('pu', 0)
 duration = ativo_data['duration'] if ativo_data['duration'] > 0 else 0
 
+# Risco a partir dos fluxos projetados (cronograma do cadastro SND), quando houver
+df_risco = engine.calcular_risco_fluxos(df_ativo, data_ref)
+risco_fluxos = df_risco.iloc[0] if not df_risco.empty else None
+
 with col_m1:
     st.metric("Taxa Indicativa", f"{taxa:.2f}%")
 
@@ -151,7 +152,9 @@ with col_m3:
 
 with col_m4:
     # Calcular DV01 se possível
-    if pd.notna(pu) and pu > 0 and duration > 0:
+    if risco_fluxos is not None and pd.notna(pu) and pu > 0:
+        st.metric("DV01", f"R$ {risco_fluxos['dv01']:.4f}", help="Calculado a partir dos fluxos projetados")
+    elif pd.notna(pu) and pu > 0 and duration > 0:
         dv01 = fm.calcular_dv01(pu, duration)
         st.metric("DV01", f"R$ {dv01:.4f}")
     else:
@@ -214,6 +217,25 @@ if curva_disponivel:
     
     st.divider()
 
+# ===== HISTÓRICO DE SPREAD =====
+df_hist_spread = engine.load_historico_spreads([codigo_selecionado])
+
+if len(df_hist_spread) > 1:
+    st.markdown("### Histórico de Spread")
+    st.line_chart(
+        df_hist_spread.set_index('data_referencia')[['spread_bps', 'z_spread_bps']]
+        .rename_axis("Data").rename(columns={'spread_bps': "I-spread (bps)", 'z_spread_bps': "Z-spread (bps)"})
+    )
+    st.divider()
+
+# ===== HISTÓRICO DE TAXA =====
+df_hist_taxa = engine.load_historico_mercado([codigo_selecionado], colunas=('taxa_indicativa',))
+
+if len(df_hist_taxa) > 1:
+    st.markdown("### Histórico de Taxa Indicativa")
+    st.line_chart(df_hist_taxa.set_index('data_referencia')['taxa_indicativa'].rename_axis("Data").rename("Taxa (%)"))
+    st.divider()
+
 # ===== FICHA TÉCNICA =====
 st.markdown("### Ficha Técnica Completa")
 
@@ -266,12 +288,17 @@ st.dataframe(df_ficha, hide_index=True, use_container_width=True)
 st.markdown("### Simulação de Cenários de Taxa")
 
 if pd.notna(pu) and pu > 0 and duration > 0:
-    # Estimar convexidade (placeholder - idealmente precisaríamos dos fluxos)
-    convexidade = duration * 0.5  # Aproximação simples
+    if risco_fluxos is not None:
+        duration_mod = risco_fluxos['duration_modificada']
+        convexidade = risco_fluxos['convexidade']
+    else:
+        # Sem cronograma: aproximação simples
+        duration_mod = duration
+        convexidade = duration * 0.5
     
     df_cenarios = fm.simular_cenarios_taxa(
         pu_atual=pu,
-        duration=duration,
+        duration=duration_mod,
         convexidade=convexidade,
         cenarios=[-0.02, -0.01, 0, 0.01, 0.02]
     )
@@ -286,13 +313,39 @@ if pd.notna(pu) and pu > 0 and duration > 0:
             "variacao_pct": st.column_config.NumberColumn("Variação", format="%.2f%%")
         }
     )
-    
-    st.info("""
+
+    # Grade densa: -300 a +300 bps em passos de 5 bps
+    df_grade = fm.simular_cenarios_carteira(
+        [pu], [duration_mod], [convexidade],
+        np.arange(-300, 305, 5) / 10000,
+        codigos=[codigo_selecionado]
+    )
+    df_grade['choque_bps'] = (df_grade['delta_taxa'] * 10000).round().astype(int)
+    # Nomes do índice e da série viram os títulos dos eixos (x_label/y_label só existem a partir do Streamlit 1.36)
+    st.line_chart(df_grade.set_index('choque_bps')['pu_estimado'].rename_axis("Choque na taxa (bps)").rename("PU Estimado"))
+
+    # Reavaliação completa: fluxos redescontados na curva ANBIMA deslocada
+    df_curva_cen = engine.simular_cenarios_curva(df_ativo, data_ref) if risco_fluxos is not None else pd.DataFrame()
+    if not df_curva_cen.empty:
+        st.markdown("#### Reavaliação Completa (choques na curva ANBIMA)")
+        st.dataframe(
+            df_curva_cen[['cenario', 'pu_estimado', 'variacao_pct']],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "cenario": "Cenário de curva",
+                "pu_estimado": st.column_config.NumberColumn("PU Estimado", format="R$ %.2f"),
+                "variacao_pct": st.column_config.NumberColumn("Variação", format="%.2f%%")
+            }
+        )
+
+    origem_risco = "dos fluxos projetados" if risco_fluxos is not None else "estimada"
+    st.info(f"""
     **Interpretação:**
     - Cenários simulam variações de taxa de juros
     - Valores negativos = queda na taxa = aumento no preço
     - Valores positivos = alta na taxa = queda no preço
-    - Cálculo usa Duration e Convexidade estimada
+    - Cálculo usa Duration e Convexidade {origem_risco}
     """)
 else:
     st.warning("Dados insuficientes para simulação de cenários")
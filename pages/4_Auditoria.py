@@ -10,6 +10,7 @@ import pandas as pd
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
 
 import data_engine as engine
+import metricas
 import visuals
 import sidebar_utils
 
@@ -327,6 +328,54 @@ else:
 
 st.divider()
 
+# ===== EXPLORADOR DE DADOS BRUTOS =====
+st.markdown("### 🗂️ Explorador de Dados Brutos")
+st.caption("Tabelas como gravadas pelos ETLs. Ordenação e paginação no banco: só a página visível é lida.")
+
+TABELAS_BRUTAS = {
+    "Mercado Secundário (ANBIMA)": "mercado_secundario",
+    "Negociação SND": "negociacao_snd",
+    "Cadastro SND": "cadastro_snd",
+    "Curvas ANBIMA": "curvas_anbima",
+}
+
+col_tab, col_data, col_ord, col_desc, col_tam = st.columns([2, 1, 2, 1, 1])
+tabela_bruta = TABELAS_BRUTAS[col_tab.selectbox("Tabela", list(TABELAS_BRUTAS), key="bruto_tabela")]
+so_data = col_data.checkbox("Só a data selecionada", value=tabela_bruta != "cadastro_snd",
+                            disabled=tabela_bruta == "cadastro_snd", key=f"bruto_data_{tabela_bruta}")
+colunas_brutas = engine.get_colunas_tabela(tabela_bruta)
+
+if not colunas_brutas:
+    st.info("Tabela não encontrada no banco.")
+else:
+    ordem_bruta = col_ord.selectbox("Ordenar por", ["(ordem do banco)"] + colunas_brutas, key=f"bruto_ordem_{tabela_bruta}")
+    desc_bruta = col_desc.toggle("Decrescente", value=False, key="bruto_decrescente")
+    tamanho_bruto = col_tam.selectbox("Linhas por página", [25, 50, 100, 200], index=1, key="bruto_tamanho")
+
+    pagina_bruta = engine.load_pagina(
+        tabela_bruta,
+        data_ref if so_data else None,
+        pagina=st.session_state.get("bruto_pagina", 1),
+        tamanho=tamanho_bruto,
+        ordenar_por=None if ordem_bruta == "(ordem do banco)" else ordem_bruta,
+        ascendente=not desc_bruta
+    )
+    # Página pedida fora do intervalo (ex.: trocou de tabela) volta para a última válida
+    if st.session_state.get("bruto_pagina", 1) != pagina_bruta.pagina:
+        st.session_state["bruto_pagina"] = pagina_bruta.pagina
+
+    col_pag, col_info = st.columns([1, 4])
+    col_pag.number_input(f"Página (de {pagina_bruta.total_paginas})", min_value=1,
+                         max_value=pagina_bruta.total_paginas, step=1, key="bruto_pagina")
+    inicio_bruto = (pagina_bruta.pagina - 1) * tamanho_bruto
+    col_info.caption(f"Linhas {inicio_bruto + 1 if pagina_bruta.total_linhas else 0}–"
+                     f"{inicio_bruto + len(pagina_bruta.dados)} de {pagina_bruta.total_linhas:,}")
+
+    st.dataframe(pagina_bruta.dados, hide_index=True, use_container_width=True,
+                 height=min(500, 38 + 35 * len(pagina_bruta.dados)))
+
+st.divider()
+
 # ===== EXPORT DE DADOS CSV =====
 st.markdown("### 💾 Exportar Dados")
 
@@ -396,3 +445,58 @@ if st.button("📊 Gerar Relatório Completo (JSON)"):
     )
     
     st.success("✅ Relatório gerado com sucesso!")
+
+st.divider()
+
+# ===== PERFORMANCE =====
+st.markdown("### ⏱️ Performance")
+st.caption(f"Latência das funções do engine e das leituras SQL/Parquet neste processo "
+           f"(últimas {metricas.TAMANHO_BUFFER:,} medições). Cache: % de chamadas servidas do cache.")
+
+# Grava a cada abertura do painel o lote ainda incompleto (se BONDTRACK_METRICAS_DB estiver definido)
+gravadas = metricas.gravar_pendentes()
+df_perf = metricas.resumo()
+if df_perf.empty:
+    st.info("Nenhuma medição registrada ainda (BONDTRACK_METRICAS=0 desliga a instrumentação).")
+else:
+    col_tabela_perf, col_grafico_perf = st.columns([3, 2])
+    with col_tabela_perf:
+        st.dataframe(
+            df_perf,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "funcao": "Função",
+                "chamadas": st.column_config.NumberColumn("Chamadas", format="%d"),
+                "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+                "max_ms": st.column_config.NumberColumn("Máx (ms)", format="%.1f"),
+                "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.0f"),
+                "linhas_entrada": st.column_config.NumberColumn("Linhas entrada", format="%d"),
+                "linhas_saida": st.column_config.NumberColumn("Linhas saída", format="%d"),
+                "acerto_cache": st.column_config.NumberColumn("Cache (%)", format="%.0f%%"),
+            }
+        )
+    with col_grafico_perf:
+        import plotly.graph_objects as go
+
+        df_graf = df_perf.head(15).iloc[::-1]
+        fig_perf = go.Figure([
+            go.Bar(y=df_graf['funcao'], x=df_graf['p50_ms'], name="p50", orientation='h'),
+            go.Bar(y=df_graf['funcao'], x=df_graf['p95_ms'], name="p95", orientation='h'),
+        ])
+        fig_perf.update_layout(barmode='group', template='plotly_dark', height=max(300, 28 * len(df_graf) + 120),
+                               xaxis_title="ms", margin=dict(l=10, r=10, t=30, b=10),
+                               title="p50 / p95 por função (maior tempo total)")
+        st.plotly_chart(fig_perf, use_container_width=True)
+
+    col_limpar, col_banco = st.columns([1, 4])
+    if col_limpar.button("🧹 Limpar medições", key="perf_limpar"):
+        metricas.limpar()
+        st.rerun()
+    if os.environ.get("BONDTRACK_METRICAS_DB"):
+        col_banco.caption(f"Histórico na tabela {metricas.TABELA_METRICAS} de "
+                          f"{os.environ['BONDTRACK_METRICAS_DB']} ({gravadas} medições gravadas agora).")
+    else:
+        col_banco.caption("Defina BONDTRACK_METRICAS_DB (um SQLite separado dos bancos do app) "
+                          f"para guardar o histórico na tabela {metricas.TABELA_METRICAS}.")
@@ -0,0 +1,178 @@
+"""
+Carteira - Métricas de Risco de um Livro de Posições
+"""
+import streamlit as st
+import sys
+import os
+import hashlib
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
+
+import data_engine as engine
+import portfolio
+import sidebar_utils
+
+st.set_page_config(page_title="Carteira", page_icon="💼", layout="wide")
+
+# CSS Customizado
+st.markdown("""
+<style>
+    [data-testid="stMetricValue"] { font-size: 1.5rem; font-weight: 700; }
+    h1, h2, h3 { color: #19D3F3; }
+</style>
+""", unsafe_allow_html=True)
+
+# ===== SIDEBAR =====
+with st.sidebar:
+    sidebar_utils.render_logo()
+    st.title("Carteira")
+
+    datas_disponiveis = engine.get_available_dates()
+
+    if not datas_disponiveis:
+        st.error("Nenhuma data disponível")
+        st.stop()
+
+    if st.session_state.get('global_data_ref') not in datas_disponiveis:
+        st.session_state['global_data_ref'] = datas_disponiveis[0]
+
+    data_ref = st.selectbox(
+        "Data de Referência",
+        datas_disponiveis,
+        index=datas_disponiveis.index(st.session_state['global_data_ref']),
+        key='carteira_date_widget',
+        on_change=lambda: st.session_state.update({'global_data_ref': st.session_state.carteira_date_widget})
+    )
+    st.session_state['global_data_ref'] = data_ref
+
+    st.divider()
+    st.markdown("""
+    ### Formato do arquivo
+    CSV ou Excel com as colunas:
+    - **codigo**: código do ativo
+    - **quantidade**: quantidade em carteira
+    """)
+
+# ===== CONTEÚDO PRINCIPAL =====
+st.title("💼 Carteira")
+st.markdown(f"**Data de Referência:** {data_ref}")
+
+arquivo = st.file_uploader("Arquivo de posições", type=["csv", "txt", "xlsx", "xls"])
+
+if arquivo is None:
+    st.info("Envie um arquivo de posições (codigo, quantidade) para calcular as métricas")
+    st.stop()
+
+conteudo = arquivo.getvalue()
+chave = (hashlib.md5(conteudo).hexdigest(), data_ref)
+
+# A junção com o universo só é refeita quando muda o arquivo ou a data
+if st.session_state.get('carteira_chave') != chave:
+    try:
+        posicoes = portfolio.ler_carteira(arquivo)
+    except Exception as e:
+        st.error(f"Erro ao ler arquivo: {e}")
+        st.stop()
+
+    df_full, erro = engine.load_universo(data_ref)
+    if erro or df_full is None or df_full.empty:
+        st.error(f"Erro ao carregar dados: {erro}")
+        st.stop()
+
+    df_na_carteira = df_full[df_full['codigo'].isin(posicoes['codigo'])]
+    risco = engine.calcular_risco_fluxos(df_na_carteira, data_ref)
+    st.session_state['carteira'] = portfolio.Carteira(posicoes, df_full, risco)
+    st.session_state['carteira_chave'] = chave
+    st.session_state['carteira_precos'] = None
+
+carteira = st.session_state['carteira']
+
+# Preços atualizados: só os PUs são reindexados, sem refazer a junção
+with st.expander("Atualizar preços (codigo, pu)"):
+    arquivo_precos = st.file_uploader("Arquivo de preços", type=["csv", "txt", "xlsx", "xls"], key="carteira_precos_upload")
+    if arquivo_precos is not None:
+        chave_precos = hashlib.md5(arquivo_precos.getvalue()).hexdigest()
+        if st.session_state.get('carteira_precos') != chave_precos:
+            try:
+                carteira.atualizar_precos(portfolio.ler_precos(arquivo_precos))
+                st.session_state['carteira_precos'] = chave_precos
+            except Exception as e:
+                st.error(f"Erro ao ler preços: {e}")
+
+metricas = carteira.metricas()
+
+if carteira.nao_encontrados:
+    st.warning(f"{len(carteira.nao_encontrados)} código(s) sem dados em {data_ref}: {', '.join(carteira.nao_encontrados[:20])}")
+if carteira.sem_preco:
+    st.warning(f"{len(carteira.sem_preco)} código(s) sem PU em {data_ref}, fora do valor de mercado e das métricas: "
+               f"{', '.join(carteira.sem_preco[:20])}")
+
+st.divider()
+
+# ===== MÉTRICAS DA CARTEIRA =====
+st.markdown("### Métricas da Carteira")
+
+col_m1, col_m2, col_m3, col_m4, col_m5 = st.columns(5)
+
+with col_m1:
+    st.metric("Valor de Mercado", f"R$ {metricas['valor_mercado']:,.2f}")
+
+with col_m2:
+    st.metric("Duration", f"{metricas['duration']:.2f} anos", help="Ponderada pelo valor de mercado")
+
+with col_m3:
+    st.metric("DV01", f"R$ {metricas['dv01']:,.2f}")
+
+with col_m4:
+    st.metric("Convexidade", f"{metricas['convexidade']:.2f}")
+
+with col_m5:
+    spread = metricas['spread_bps']
+    st.metric("Spread vs ANBIMA", f"{spread:.0f} bps" if pd.notna(spread) else "N/D")
+
+st.divider()
+
+# ===== EXPOSIÇÃO POR VÉRTICE =====
+st.markdown("### DV01 por Vértice (Key Rate)")
+
+df_vertices = carteira.exposicao_vertices(engine.load_matriz_key_rate(data_ref))
+
+if not df_vertices.empty:
+    df_vertices['prazo'] = (df_vertices['vertice'] / 252).map(lambda a: f"{a:g}A" if a >= 1 else f"{a * 12:g}M")
+    st.bar_chart(df_vertices.set_index('prazo')['dv01'].rename_axis("Vértice").rename("DV01 (R$)"))
+    st.caption(f"Ativos prefixados e IPCA+ com fluxos projetados: {df_vertices['cobertura_pct'].iloc[0]:.1f}% do valor de mercado")
+else:
+    st.info("Sem ativos prefixados ou IPCA+ com fluxos projetados para calcular a exposição por vértice")
+
+st.divider()
+
+# ===== CONTRIBUIÇÕES =====
+st.markdown("### Contribuição por Posição")
+
+df_contrib = carteira.contribuicoes().sort_values('valor_mercado', ascending=False)
+
+st.dataframe(
+    df_contrib,
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "pu": st.column_config.NumberColumn("PU", format="R$ %.2f"),
+        "valor_mercado": st.column_config.NumberColumn("Valor de Mercado", format="R$ %.2f"),
+        "peso_pct": st.column_config.NumberColumn("Peso", format="%.2f%%"),
+        "duration": st.column_config.NumberColumn("Duration", format="%.2f"),
+        "contrib_duration": st.column_config.NumberColumn("Contrib. Duration", format="%.3f"),
+        "dv01": st.column_config.NumberColumn("DV01", format="R$ %.2f"),
+        "contrib_convexidade": st.column_config.NumberColumn("Contrib. Convexidade", format="%.3f"),
+        "spread_bps": st.column_config.NumberColumn("Spread (bps)", format="%.0f"),
+        "contrib_spread_bps": st.column_config.NumberColumn("Contrib. Spread (bps)", format="%.1f"),
+    }
+)
+
+st.download_button(
+    "Baixar contribuições (CSV)",
+    df_contrib.to_csv(index=False).encode('utf-8'),
+    file_name=f"carteira_{data_ref.replace('/', '-')}.csv",
+    mime="text/csv"
+)
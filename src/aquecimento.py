@@ -0,0 +1,128 @@
+"""
+Aquecimento - Pré-carga dos Caches
+Calcula de antemão o que a primeira visita do dia pediria às páginas do app:
+datas disponíveis, universo enriquecido (load_data + spreads + Z-spreads) das N
+datas mais recentes, estatísticas móveis do Screener e os gráficos da página
+inicial.
+
+aquecer_em_segundo_plano() roda em uma thread uma vez por versão dos dados,
+enchendo os caches em memória do data_engine e do visuals. Quem o dispara é o
+próprio engine (data_engine.versao_dados), na primeira leitura do processo do
+app com uma versão nova: a primeira visita, por qualquer página, e a primeira
+depois de cada carga do ETL. Importado pelo engine, o aquecimento usa o mesmo
+módulo data_engine das páginas (os caches do Streamlit são identificados pelo
+módulo da função).
+"""
+import os
+import threading
+import time
+
+try:
+    from . import data_engine as engine
+    from . import visuals
+except ImportError:
+    import data_engine as engine
+    import visuals
+
+# Datas mais recentes a aquecer; BONDTRACK_AQUECER=0 desliga o aquecimento no app
+N_DATAS_PADRAO = int(os.environ.get("BONDTRACK_AQUECER_DATAS", "2"))
+
+# Janela padrão das estatísticas móveis no Screener (st.radio com index=1)
+JANELA_SCREENER = 90
+
+_THREAD = None
+_VERSAO = None  # Versão dos dados do último aquecimento pedido
+_LOCK = threading.Lock()
+
+
+def _etapa(tempos, nome, func, *args, **kwargs):
+    """Executa uma etapa e registra a duração (None se falhou); uma falha não interrompe as demais"""
+    inicio = time.perf_counter()
+    try:
+        func(*args, **kwargs)
+        tempos[nome] = time.perf_counter() - inicio
+    except Exception:
+        tempos[nome] = None
+
+
+def _figuras_pagina_inicial(data_ref):
+    """Gráfico da página inicial com os mesmos argumentos do app.py (mesma chave no cache de figuras)"""
+    df, erro = engine.load_universo(data_ref)
+    if erro or df is None or df.empty or 'taxa' not in df or 'duration' not in df:
+        return
+    dfg = df[(df['taxa'] > 0) & (df['duration'] > 0)].copy()
+    if not dfg.empty:
+        visuals.create_scatter_risco_retorno(dfg, title=f"Curva {data_ref}", height=500)
+
+
+def aquecer(n_datas=N_DATAS_PADRAO, figuras=True):
+    """
+    Pré-carrega os caches para as n_datas datas mais recentes
+
+    Só o que as páginas registradas (app.py e pages/*.py) pedem ao abrir, com
+    os mesmos argumentos padrão.
+
+    Args:
+        n_datas: Quantas datas (da mais recente para trás)
+        figuras: Gera os gráficos da página inicial (cache em memória do visuals)
+
+    Returns:
+        Dicionário {etapa: segundos}, com None nas etapas que falharam
+    """
+    tempos = {}
+    inicio = time.perf_counter()
+    datas = engine.get_available_dates()[:n_datas]
+    tempos["datas"] = time.perf_counter() - inicio
+
+    for i, data in enumerate(datas):
+        _etapa(tempos, f"universo {data}", engine.load_universo, data)
+        _etapa(tempos, f"load_data {data}", engine.load_data, data)
+        if figuras and i == 0:
+            _etapa(tempos, f"figuras {data}", _figuras_pagina_inicial, data)
+
+    _etapa(tempos, "estatísticas de spread", engine.load_estatisticas_spreads, 'spread_bps', JANELA_SCREENER)
+    return tempos
+
+
+def _aquecer_versoes(n_datas):
+    """Corpo da thread: aquece e repete enquanto uma versão nova chegou durante o aquecimento"""
+    global _THREAD
+    aquecida = None
+    while True:
+        with _LOCK:
+            if _VERSAO == aquecida:
+                _THREAD = None
+                return
+            versao = _VERSAO
+        try:
+            aquecer(n_datas)
+        except Exception:  # a thread não pode morrer com _THREAD preenchido: pararia de aquecer
+            pass
+        aquecida = versao
+
+
+def aquecer_em_segundo_plano(versao=None, n_datas=N_DATAS_PADRAO):
+    """
+    Dispara aquecer() em uma thread daemon, uma vez por versão dos dados
+
+    Chamadas com a versão já aquecida não fazem nada; uma versão nova que chega
+    durante o aquecimento é aquecida em seguida pela mesma thread. Uma página
+    que pede a mesma entrada enquanto a thread calcula espera o resultado do
+    cache em vez de calcular de novo.
+
+    Args:
+        versao: Versão dos dados (padrão: engine.versao_dados())
+        n_datas: Quantas datas aquecer
+    """
+    global _THREAD, _VERSAO
+    if os.environ.get("BONDTRACK_AQUECER", "1") == "0":
+        return None
+    versao = engine.versao_dados() if versao is None else versao
+    with _LOCK:
+        if versao != _VERSAO:
+            _VERSAO = versao
+            if _THREAD is None:
+                _THREAD = threading.Thread(target=_aquecer_versoes, args=(n_datas,),
+                                           name="bondtrack-aquecimento", daemon=True)
+                _THREAD.start()
+        return _THREAD
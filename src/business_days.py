@@ -0,0 +1,188 @@
+"""
+Calendário de Dias Úteis - Feriados ANBIMA/B3 e Contagens Vetorizadas
+Feriados nacionais pré-calculados em calendários np.busdaycalendar; contagem de
+dias úteis, rolagem de datas e conversões DU <-> DC sobre arrays.
+
+- 'anbima': feriados nacionais (calendário usado em taxas, curvas e duration)
+- 'b3': feriados nacionais + 24/12 e 31/12 (dias sem pregão)
+"""
+import datetime
+from functools import lru_cache
+
+import numpy as np
+
+DIAS_UTEIS_ANO = 252
+DIAS_CORRIDOS_ANO = 365
+ANO_INICIAL = 1990
+ANO_FINAL = 2080
+
+# (mês, dia) dos feriados nacionais de data fixa
+FERIADOS_FIXOS = [(1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (12, 25)]
+# Dia da Consciência Negra: feriado nacional a partir de 2024 (Lei 14.759/2023)
+CONSCIENCIA_NEGRA = (11, 20, 2024)
+# Deslocamentos (dias) em relação à Páscoa: Carnaval (seg/ter), Sexta-feira Santa, Corpus Christi
+FERIADOS_PASCOA = [-48, -47, -2, 60]
+# Sem pregão na B3, mas dias úteis no calendário ANBIMA
+DIAS_SEM_PREGAO_B3 = [(12, 24), (12, 31)]
+
+
+def _pascoa(ano):
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)"""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes = (h + l - 7 * m + 114) // 31
+    dia = (h + l - 7 * m + 114) % 31 + 1
+    return datetime.date(ano, mes, dia)
+
+
+def feriados(ano_inicial=ANO_INICIAL, ano_final=ANO_FINAL, calendario='anbima'):
+    """
+    Feriados do calendário entre dois anos (inclusive)
+
+    Args:
+        ano_inicial, ano_final: Intervalo de anos
+        calendario: 'anbima' ou 'b3'
+
+    Returns:
+        Array datetime64[D] ordenado e sem repetições
+    """
+    datas = []
+    for ano in range(ano_inicial, ano_final + 1):
+        datas += [datetime.date(ano, m, d) for m, d in FERIADOS_FIXOS]
+        if ano >= CONSCIENCIA_NEGRA[2]:
+            datas.append(datetime.date(ano, CONSCIENCIA_NEGRA[0], CONSCIENCIA_NEGRA[1]))
+        pascoa = _pascoa(ano)
+        datas += [pascoa + datetime.timedelta(days=n) for n in FERIADOS_PASCOA]
+        if calendario == 'b3':
+            datas += [datetime.date(ano, m, d) for m, d in DIAS_SEM_PREGAO_B3]
+        elif calendario != 'anbima':
+            raise ValueError(f"Calendário desconhecido: {calendario}")
+    return np.unique(np.array(datas, dtype='datetime64[D]'))
+
+
+@lru_cache(maxsize=None)
+def get_calendario(calendario='anbima'):
+    """np.busdaycalendar (seg-sex menos feriados), construído uma vez por calendário"""
+    return np.busdaycalendar(weekmask='1111100', holidays=feriados(calendario=calendario))
+
+
+def _datas(datas):
+    """Converte escalares/arrays (datetime, Timestamp, string ISO) para datetime64[D]"""
+    if isinstance(datas, datetime.datetime):
+        return np.datetime64(datas.date(), 'D')
+    if isinstance(datas, (datetime.date, np.datetime64, str)):
+        return np.datetime64(datas, 'D')
+    if hasattr(datas, 'to_numpy'):
+        datas = datas.to_numpy()
+    return np.asarray(datas).astype('datetime64[D]')
+
+
+def dias_uteis(inicio, fim, calendario='anbima'):
+    """
+    Dias úteis entre datas, contando o início e excluindo o fim (convenção ANBIMA)
+
+    Args:
+        inicio, fim: Datas (escalares ou arrays compatíveis)
+        calendario: 'anbima' ou 'b3'
+
+    Returns:
+        Número de dias úteis (negativo se fim < inicio)
+    """
+    return np.busday_count(_datas(inicio), _datas(fim), busdaycal=get_calendario(calendario))
+
+
+def eh_dia_util(datas, calendario='anbima'):
+    """True onde a data é dia útil"""
+    return np.is_busday(_datas(datas), busdaycal=get_calendario(calendario))
+
+
+def somar_dias_uteis(datas, n, calendario='anbima'):
+    """
+    Desloca datas em n dias úteis (datas não úteis rolam antes para frente)
+
+    Returns:
+        datetime64[D] com a forma do broadcasting de datas e n
+    """
+    return np.busday_offset(_datas(datas), n, roll='forward', busdaycal=get_calendario(calendario))
+
+
+def rolar(datas, convencao='following', calendario='anbima'):
+    """
+    Ajusta datas não úteis
+
+    Args:
+        datas: Datas (escalar ou array)
+        convencao: 'following', 'preceding', 'modifiedfollowing' ou 'modifiedpreceding'
+
+    Returns:
+        datetime64[D] ajustado
+    """
+    return np.busday_offset(_datas(datas), 0, roll=convencao, busdaycal=get_calendario(calendario))
+
+
+def ultimos_dias_uteis(n=3, referencia=None, calendario='anbima'):
+    """
+    Últimos N dias úteis anteriores à data de referência (padrão: hoje)
+
+    Returns:
+        Lista de datetime, do mais recente para o mais antigo
+    """
+    referencia = referencia or datetime.datetime.now()
+    datas = np.busday_offset(_datas(referencia), -np.arange(1, n + 1), roll='forward',
+                             busdaycal=get_calendario(calendario))
+    return [datetime.datetime.combine(d.astype(datetime.date), datetime.time()) for d in datas]
+
+
+def dia_util_anterior(referencia=None, calendario='anbima'):
+    """Dia útil imediatamente anterior à referência (D-1), como datetime"""
+    return ultimos_dias_uteis(1, referencia, calendario)[0]
+
+
+def du_para_dc(du, data_base=None, calendario='anbima'):
+    """
+    Converte dias úteis em dias corridos
+
+    Com data_base, a conversão é exata no calendário; sem ela, usa 365/252.
+
+    Args:
+        du: Dias úteis (escalar ou array)
+        data_base: Data inicial opcional (escalar ou array compatível)
+
+    Returns:
+        Dias corridos
+    """
+    du = np.asarray(du)
+    if data_base is None:
+        return du * DIAS_CORRIDOS_ANO / DIAS_UTEIS_ANO
+    base = rolar(data_base, 'following', calendario)
+    fim = np.busday_offset(base, np.round(du).astype(np.int64), roll='forward', busdaycal=get_calendario(calendario))
+    return (fim - _datas(data_base)).astype(np.int64)
+
+
+def dc_para_du(dc, data_base=None, calendario='anbima'):
+    """
+    Converte dias corridos em dias úteis
+
+    Com data_base, conta os dias úteis no calendário; sem ela, usa 252/365.
+    """
+    dc = np.asarray(dc)
+    if data_base is None:
+        return dc * DIAS_UTEIS_ANO / DIAS_CORRIDOS_ANO
+    base = _datas(data_base)
+    return dias_uteis(base, base + np.round(dc).astype(np.int64), calendario)
+
+
+def anos_para_du(anos):
+    """Prazo em anos (base 252) para dias úteis"""
+    return np.asarray(anos, dtype=np.float64) * DIAS_UTEIS_ANO
+
+
+def du_para_anos(du):
+    """Dias úteis para prazo em anos (base 252)"""
+    return np.asarray(du, dtype=np.float64) / DIAS_UTEIS_ANO
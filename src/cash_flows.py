@@ -0,0 +1,485 @@
+"""
+Fluxos de Caixa - Cronogramas de Pagamento a partir do Cadastro SND
+Gera, persiste e projeta os fluxos (juros e amortização) de cada debênture.
+
+Os cronogramas são guardados por ativo na tabela fluxos_caixa, com as datas e
+percentuais em colunas BLOB (arrays NumPy compactos). Só os ativos cuja linha do
+cadastro mudou são reconstruídos.
+"""
+import os
+import sqlite3
+import unicodedata
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import financial_math as fm
+    from . import business_days as bd
+    from . import metricas
+except ImportError:
+    import financial_math as fm
+    import business_days as bd
+    import metricas
+
+TABELA_FLUXOS = "fluxos_caixa"
+MESES_JUROS_PADRAO = 6  # Periodicidade semestral quando o cadastro não informa
+
+# Palavras-chave para localizar os campos do cadastro (colunas normalizadas)
+CAMPOS_CADASTRO = {
+    "codigo": [["codigo_do_ativo"], ["codigo_ativo"], ["codigo"]],
+    "data_emissao": [["data", "emissao"]],
+    "data_vencimento": [["data", "vencimento"], ["vencimento"]],
+    "data_inicio": [["inicio", "rentabilidade"]],
+    "indexador": [["indice"], ["indexador"]],
+    "taxa_juros": [["juros", "taxa"], ["taxa_de_juros"], ["taxa_emissao"]],
+    "percentual": [["percentual", "multiplicador"]],
+    "juros_cada": [["juros", "cada"]],
+    "juros_unidade": [["juros", "unidade"]],
+    "amort_taxa": [["amortizacao", "taxa"]],
+    "amort_cada": [["amortizacao", "cada"]],
+    "amort_unidade": [["amortizacao", "unidade"]],
+    "amort_carencia": [["amortizacao", "carencia"]],
+}
+
+
+def _normalizar_coluna(col):
+    """Mesma normalização de nomes de coluna usada em data_engine.smart_clean"""
+    nfkd = unicodedata.normalize('NFKD', str(col))
+    clean = "".join([c for c in nfkd if not unicodedata.combining(c)])
+    return clean.lower().strip().replace(" ", "_").replace(".", "").replace("/", "_").replace("-", "_")
+
+
+def mapear_campos_cadastro(colunas):
+    """
+    Localiza no cadastro as colunas necessárias para montar o cronograma
+
+    Args:
+        colunas: Colunas originais de cadastro_snd
+
+    Returns:
+        Dict campo -> coluna original (apenas campos encontrados)
+    """
+    normalizadas = {_normalizar_coluna(c): c for c in colunas}
+    mapa = {}
+    for campo, alternativas in CAMPOS_CADASTRO.items():
+        for palavras in alternativas:
+            col = next((orig for norm, orig in normalizadas.items()
+                        if all(p in norm for p in palavras) and orig not in mapa.values()), None)
+            if col is not None:
+                mapa[campo] = col
+                break
+    return mapa
+
+
+def _para_data(serie):
+    """Converte datas do cadastro (DD/MM/YYYY ou ISO) para datetime64[D]"""
+    s = serie.astype(str).str.strip()
+    dt = pd.to_datetime(s, format="%d/%m/%Y", errors="coerce")
+    faltantes = dt.isna()
+    if faltantes.any():
+        dt[faltantes] = pd.to_datetime(s[faltantes], format="%Y-%m-%d", errors="coerce")
+    return dt.to_numpy(dtype="datetime64[D]")
+
+
+def para_numero(serie):
+    """
+    Converte números (formato brasileiro ou não) para um array float64
+
+    "." só é separador de milhar quando há "," (1.234,5); "1000.5" vale 1000.5.
+    Valores não numéricos viram NaN.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64)
+    s = serie.astype(str).str.strip()
+    br = s.str.contains(",", regex=False)
+    s = s.where(~br, s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _periodo_em_meses(cada, unidade):
+    """Converte (cada, unidade) do cadastro em meses; NaN quando não informado"""
+    unidade = pd.Series(unidade).astype(str).str.upper().str.strip().to_numpy()
+    fator = np.where(np.char.startswith(unidade.astype(str), "ANO"), 12.0,
+                     np.where(np.char.startswith(unidade.astype(str), "DIA"), 1 / 30, 1.0))
+    meses = np.round(cada * fator)
+    return np.where(meses > 0, meses, np.nan)
+
+
+def _classificar_indexador(indexador, taxa, percentual):
+    """Tipo de fluxo: 'IPCA', 'PRE', 'CDI+' (spread), '%CDI' (percentual) ou 'OUTROS'"""
+    idx = str(indexador).upper()
+    if "IPCA" in idx or "IPC-A" in idx: return "IPCA"
+    if "PRE" in idx or "PRÉ" in idx: return "PRE"
+    if "DI" in idx:
+        if (pd.notna(percentual) and percentual > 0 and percentual != 100) or (pd.notna(taxa) and taxa > 30):
+            return "%CDI"
+        return "CDI+"
+    return "OUTROS"
+
+
+def somar_meses(datas, meses):
+    """
+    Soma meses a datas (vetorizado), preservando o dia e limitando ao fim do mês
+
+    Args:
+        datas: Array datetime64[D]
+        meses: Inteiro(s) de meses (pode ser negativo)
+
+    Returns:
+        Array datetime64[D]
+    """
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    mes = datas.astype("datetime64[M]")
+    dia = (datas - mes.astype("datetime64[D]")).astype(np.int64)
+    novo_mes = mes + np.asarray(meses, dtype=np.int64)
+    dias_no_mes = ((novo_mes + 1).astype("datetime64[D]") - novo_mes.astype("datetime64[D]")).astype(np.int64)
+    return novo_mes.astype("datetime64[D]") + np.minimum(dia, dias_no_mes - 1)
+
+
+def gerar_cronograma(inicio, vencimento, meses_juros=None, primeira_amortizacao=None,
+                     meses_amortizacao=None, pct_amortizacao=None):
+    """
+    Gera o cronograma de pagamentos de uma debênture
+
+    Os juros são contados para trás a partir do vencimento. Sem dados de
+    amortização, o principal é pago no vencimento (bullet); com carência e
+    periodicidade, as parcelas vão da primeira amortização até o vencimento.
+
+    Args:
+        inicio: Início da rentabilidade (datetime64[D])
+        vencimento: Data de vencimento (datetime64[D])
+        meses_juros: Periodicidade dos juros em meses (padrão semestral)
+        primeira_amortizacao: Data da primeira parcela de amortização
+        meses_amortizacao: Periodicidade da amortização em meses
+        pct_amortizacao: Percentual do VNE por parcela (opcional; padrão: parcelas iguais)
+
+    Returns:
+        Tupla (datas, amortizacao, paga_juros): datas datetime64[D], fração do VNE
+        amortizada em cada data e flag de pagamento de juros. Vazia se datas inválidas.
+    """
+    vazio = (np.array([], dtype="datetime64[D]"), np.array([]), np.array([], dtype=np.uint8))
+    if np.isnat(vencimento) or np.isnat(inicio) or vencimento <= inicio:
+        return vazio
+
+    meses_juros = int(meses_juros) if meses_juros and meses_juros > 0 else MESES_JUROS_PADRAO
+    n_max = int((vencimento - inicio).astype(np.int64) // 28 // meses_juros) + 2
+    datas_juros = somar_meses(np.full(n_max, vencimento), -meses_juros * np.arange(n_max))
+    datas_juros = datas_juros[datas_juros > inicio]
+
+    datas_amort = np.array([vencimento])
+    if (primeira_amortizacao is not None and not np.isnat(primeira_amortizacao)
+            and inicio < primeira_amortizacao < vencimento and meses_amortizacao and meses_amortizacao > 0):
+        n_max = int((vencimento - primeira_amortizacao).astype(np.int64) // 28 // int(meses_amortizacao)) + 2
+        datas_amort = somar_meses(np.full(n_max, primeira_amortizacao), int(meses_amortizacao) * np.arange(n_max))
+        datas_amort = np.union1d(datas_amort[datas_amort < vencimento], [vencimento])
+
+    n_parcelas = len(datas_amort)
+    if pct_amortizacao and 0 < pct_amortizacao < 100 and n_parcelas > 1:
+        parcelas = np.full(n_parcelas, pct_amortizacao / 100)
+        acumulado = np.minimum(np.cumsum(parcelas), 1.0)
+        parcelas = np.diff(np.concatenate(([0.0], acumulado)))
+        parcelas[-1] = 1.0 - acumulado[-2]
+    else:
+        parcelas = np.full(n_parcelas, 1.0 / n_parcelas)
+
+    datas = np.union1d(datas_juros, datas_amort)
+    amortizacao = np.zeros(len(datas))
+    amortizacao[np.searchsorted(datas, datas_amort)] = parcelas
+    paga_juros = np.isin(datas, datas_juros).astype(np.uint8)
+    return datas, amortizacao, paga_juros
+
+
+def construir_cronogramas(df_cadastro):
+    """
+    Monta os cronogramas de todas as linhas do cadastro SND
+
+    Args:
+        df_cadastro: DataFrame de cadastro_snd (colunas originais)
+
+    Returns:
+        DataFrame com uma linha por ativo: codigo, hash_cadastro, tipo_fluxo,
+        taxa_cupom (% a.a.), percentual_indexador, data_inicio, datas,
+        amortizacao e paga_juros (arrays)
+    """
+    colunas = ["codigo", "hash_cadastro", "tipo_fluxo", "taxa_cupom", "percentual_indexador",
+               "data_inicio", "datas", "amortizacao", "paga_juros"]
+    if df_cadastro is None or df_cadastro.empty:
+        return pd.DataFrame(columns=colunas)
+
+    mapa = mapear_campos_cadastro(df_cadastro.columns)
+    if "codigo" not in mapa or "data_vencimento" not in mapa:
+        return pd.DataFrame(columns=colunas)
+
+    def coluna(campo):
+        return df_cadastro[mapa[campo]] if campo in mapa else pd.Series(np.nan, index=df_cadastro.index)
+
+    n = len(df_cadastro)
+    codigos = coluna("codigo").astype(str).str.strip().str.upper().to_numpy()
+    vencimento = _para_data(coluna("data_vencimento"))
+    inicio = _para_data(coluna("data_inicio"))
+    emissao = _para_data(coluna("data_emissao"))
+    inicio = np.where(np.isnat(inicio), emissao, inicio)
+    taxa = para_numero(coluna("taxa_juros"))
+    percentual = para_numero(coluna("percentual"))
+    meses_juros = _periodo_em_meses(para_numero(coluna("juros_cada")), coluna("juros_unidade"))
+    meses_amort = _periodo_em_meses(para_numero(coluna("amort_cada")), coluna("amort_unidade"))
+    pct_amort = para_numero(coluna("amort_taxa"))
+    carencia = _para_data(coluna("amort_carencia"))
+    indexador = coluna("indexador").astype(str).to_numpy()
+    hashes = hash_linhas_cadastro(df_cadastro)
+
+    registros = []
+    for i in range(n):
+        datas, amortizacao, paga_juros = gerar_cronograma(
+            inicio[i], vencimento[i],
+            None if np.isnan(meses_juros[i]) else meses_juros[i],
+            carencia[i],
+            None if np.isnan(meses_amort[i]) else meses_amort[i],
+            None if np.isnan(pct_amort[i]) else pct_amort[i],
+        )
+        if not len(datas):
+            continue
+        tipo = _classificar_indexador(indexador[i], taxa[i], percentual[i])
+        cupom = taxa[i] if not np.isnan(taxa[i]) else 0.0
+        pct = percentual[i] if not np.isnan(percentual[i]) and percentual[i] > 0 else 100.0
+        if tipo == "%CDI" and cupom > 30:
+            pct, cupom = cupom, 0.0
+        registros.append((codigos[i], hashes[i], tipo, cupom, pct, str(inicio[i]),
+                          datas, amortizacao, paga_juros))
+    return pd.DataFrame(registros, columns=colunas)
+
+
+def hash_linhas_cadastro(df_cadastro):
+    """
+    Hash (hex) de cada linha do cadastro, para detectar mudanças
+
+    Só entram as colunas que montam o cronograma (mapear_campos_cadastro): as de
+    controle do ETL (data_referencia, data_atualizacao) mudam a cada carga sem
+    mudar o cronograma.
+    """
+    mapa = mapear_campos_cadastro(df_cadastro.columns)
+    colunas = [mapa[campo] for campo in CAMPOS_CADASTRO if campo in mapa]
+    h = pd.util.hash_pandas_object(df_cadastro[colunas].astype(str), index=False).to_numpy()
+    return np.char.mod("%016x", h.astype(np.uint64))
+
+
+# --- PERSISTÊNCIA ---
+
+def _criar_tabela(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_FLUXOS} (
+            codigo TEXT PRIMARY KEY,
+            hash_cadastro TEXT,
+            tipo_fluxo TEXT,
+            taxa_cupom REAL,
+            percentual_indexador REAL,
+            data_inicio TEXT,
+            datas BLOB,
+            amortizacao BLOB,
+            paga_juros BLOB,
+            data_atualizacao TEXT
+        )
+    """)
+
+
+def _linha_para_registro(row, data_atualizacao):
+    return (
+        row["codigo"], row["hash_cadastro"], row["tipo_fluxo"], float(row["taxa_cupom"]),
+        float(row["percentual_indexador"]), row["data_inicio"],
+        np.asarray(row["datas"], dtype="datetime64[D]").astype(np.int32).tobytes(),
+        np.asarray(row["amortizacao"], dtype=np.float64).tobytes(),
+        np.asarray(row["paga_juros"], dtype=np.uint8).tobytes(),
+        data_atualizacao,
+    )
+
+
+def atualizar_cronogramas(db_path, forcar=False):
+    """
+    Reconstrói os cronogramas apenas dos ativos cujo cadastro mudou
+
+    Args:
+        db_path: Caminho do banco com cadastro_snd
+        forcar: Se True, reconstrói todos os ativos
+
+    Returns:
+        Tupla (reconstruidos, removidos, total)
+    """
+    if not os.path.exists(db_path):
+        return 0, 0, 0
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            df_cad = pd.read_sql("SELECT * FROM cadastro_snd", conn)
+        except Exception:
+            return 0, 0, 0
+        _criar_tabela(conn)
+        existentes = dict(conn.execute(f"SELECT codigo, hash_cadastro FROM {TABELA_FLUXOS}").fetchall())
+
+        mapa = mapear_campos_cadastro(df_cad.columns)
+        if "codigo" not in mapa:
+            return 0, 0, len(existentes)
+        codigos = df_cad[mapa["codigo"]].astype(str).str.strip().str.upper().to_numpy()
+        hashes = hash_linhas_cadastro(df_cad)
+        mudou = np.array([forcar or existentes.get(c) != h for c, h in zip(codigos, hashes)], dtype=bool)
+
+        df_novos = construir_cronogramas(df_cad[mudou])
+        agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        conn.executemany(f"""
+            INSERT OR REPLACE INTO {TABELA_FLUXOS}
+            (codigo, hash_cadastro, tipo_fluxo, taxa_cupom, percentual_indexador, data_inicio,
+             datas, amortizacao, paga_juros, data_atualizacao)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [_linha_para_registro(row, agora) for _, row in df_novos.iterrows()])
+
+        atuais = set(codigos)
+        removidos = [c for c in existentes if c not in atuais]
+        conn.executemany(f"DELETE FROM {TABELA_FLUXOS} WHERE codigo = ?", [(c,) for c in removidos])
+        conn.commit()
+        total = conn.execute(f"SELECT COUNT(*) FROM {TABELA_FLUXOS}").fetchone()[0]
+        return len(df_novos), len(removidos), total
+    finally:
+        conn.close()
+
+
+def carregar_cronogramas(db_path, codigos=None):
+    """
+    Lê os cronogramas persistidos, decodificando os BLOBs em arrays
+
+    Args:
+        db_path: Caminho do banco
+        codigos: Lista opcional de códigos a carregar
+
+    Returns:
+        DataFrame no formato de construir_cronogramas (vazio se não houver tabela)
+    """
+    if not os.path.exists(db_path):
+        return pd.DataFrame()
+    conn = sqlite3.connect(db_path)
+    try:
+        query = f"SELECT * FROM {TABELA_FLUXOS}"
+        params = ()
+        if codigos is not None:
+            codigos = list(codigos)
+            if not codigos:
+                return pd.DataFrame()
+            query += f" WHERE codigo IN ({','.join('?' * len(codigos))})"
+            params = tuple(codigos)
+        with metricas.medir(f"sql {TABELA_FLUXOS}") as medicao:
+            df = pd.read_sql(query, conn, params=params)
+            medicao.linhas_saida = len(df)
+    except Exception:
+        return pd.DataFrame()
+    finally:
+        conn.close()
+    df["datas"] = [np.frombuffer(b, dtype=np.int32).astype("datetime64[D]") for b in df["datas"]]
+    df["amortizacao"] = [np.frombuffer(b, dtype=np.float64) for b in df["amortizacao"]]
+    df["paga_juros"] = [np.frombuffer(b, dtype=np.uint8) for b in df["paga_juros"]]
+    return df
+
+
+# --- PROJEÇÃO ---
+
+def projetar_fluxos(df_cronogramas, data_base, curva=None):
+    """
+    Projeta os fluxos futuros de todos os ativos em formato longo
+
+    Os valores são expressos por unidade do saldo devedor atual (saldo = 1 na
+    data-base), de modo que duration e convexidade independem da escala e o PU
+    pode ser usado para escalar os fluxos. Juros acumulam desde o último
+    pagamento (PU sujo). Para ativos CDI, a curva pré (YieldCurve) projeta o
+    CDI pelas taxas a termo; sem curva, usa só a taxa do cadastro.
+
+    Args:
+        df_cronogramas: DataFrame de carregar_cronogramas/construir_cronogramas
+        data_base: Data-base da projeção (datetime, string ou datetime64)
+        curva: YieldCurve opcional para projetar o CDI
+
+    Returns:
+        DataFrame longo com codigo, data, du (dias úteis), prazo_anos, juros,
+        amortizacao e fluxo (juros + amortização)
+    """
+    colunas = ["codigo", "data", "du", "prazo_anos", "juros", "amortizacao", "fluxo"]
+    if df_cronogramas is None or df_cronogramas.empty:
+        return pd.DataFrame(columns=colunas)
+    base = np.datetime64(pd.Timestamp(data_base).date(), "D")
+
+    tamanhos = df_cronogramas["datas"].map(len).to_numpy()
+    linha = np.repeat(np.arange(len(df_cronogramas)), tamanhos)
+    datas = np.concatenate(df_cronogramas["datas"].to_list()).astype("datetime64[D]")
+    amort = np.concatenate(df_cronogramas["amortizacao"].to_list())
+    paga_juros = np.concatenate(df_cronogramas["paga_juros"].to_list()).astype(bool)
+
+    # Saldo devedor (fração do VNE) antes de cada pagamento e na data-base
+    inicio_grupo = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+    amort_acum = np.cumsum(amort)
+    amort_acum_ant = amort_acum - amort
+    amort_acum_ant -= np.repeat(amort_acum_ant[inicio_grupo], tamanhos)
+    saldo_antes = 1.0 - amort_acum_ant
+    futuro = datas > base
+    pago_ate_base = np.bincount(linha, weights=np.where(futuro, 0.0, amort), minlength=len(df_cronogramas))
+    saldo_base = 1.0 - pago_ate_base[linha]
+
+    # Início do período de juros: último pagamento de juros anterior (ou início da rentabilidade),
+    # via máximo acumulado por grupo (o deslocamento por linha isola cada ativo)
+    inicio_rent = pd.to_datetime(df_cronogramas["data_inicio"], errors="coerce").to_numpy(dtype="datetime64[D]").astype(np.int64)
+    datas_int = datas.astype(np.int64)
+    marcos = np.where(paga_juros, datas_int, inicio_rent[linha])
+    deslocamento = linha.astype(np.int64) * 10**7
+    acumulado = np.maximum.accumulate(marcos - marcos.min() + deslocamento) - deslocamento + marcos.min()
+    periodo_ini = np.empty_like(datas_int)
+    periodo_ini[1:] = acumulado[:-1]
+    periodo_ini[inicio_grupo] = inicio_rent
+    periodo_ini = periodo_ini.astype("datetime64[D]")
+
+    du_base = bd.dias_uteis(base, datas)
+    du_periodo = bd.dias_uteis(periodo_ini, datas)
+    du_inicio = np.maximum(bd.dias_uteis(base, periodo_ini), 0) * (periodo_ini > base)
+
+    tipo = df_cronogramas["tipo_fluxo"].to_numpy()[linha]
+    cupom = df_cronogramas["taxa_cupom"].to_numpy(dtype=np.float64)[linha] / 100
+    pct = df_cronogramas["percentual_indexador"].to_numpy(dtype=np.float64)[linha] / 100
+    fator_fixo = np.power(1 + cupom, bd.du_para_anos(du_periodo))
+    fator = fator_fixo
+    if curva is not None:
+        # CDI projetado: parte já corrida até a data-base fica em 1 (sem histórico de CDI)
+        fd_ini = curva.discount_factor(du_inicio, 'pre')
+        fd_fim = curva.discount_factor(np.maximum(du_base, 0), 'pre')
+        fator_cdi = fd_ini / fd_fim
+        fator = np.where(tipo == "CDI+", fator_cdi * fator_fixo, fator)
+        fator = np.where(tipo == "%CDI", 1 + (fator_cdi - 1) * pct, fator)
+
+    juros = np.where(paga_juros, saldo_antes * (fator - 1), 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        escala = np.where(saldo_base > 1e-12, 1.0 / saldo_base, 0.0)
+    valores_juros = juros * escala
+    valores_amort = amort * escala
+
+    df = pd.DataFrame({
+        "codigo": df_cronogramas["codigo"].to_numpy()[linha],
+        "data": datas,
+        "du": du_base,
+        "prazo_anos": bd.du_para_anos(du_base),
+        "juros": valores_juros,
+        "amortizacao": valores_amort,
+        "fluxo": valores_juros + valores_amort,
+    })
+    return df[futuro & (escala > 0)].reset_index(drop=True)
+
+
+def matriz_fluxos_universo(df_fluxos, codigos):
+    """
+    Matrizes (N, M) de prazos e fluxos alinhadas a uma lista de códigos
+
+    Args:
+        df_fluxos: Saída de projetar_fluxos
+        codigos: Ordem dos ativos nas linhas (códigos sem fluxo ficam zerados)
+
+    Returns:
+        Tupla (prazos, valores) para as funções vetorizadas de financial_math
+    """
+    _, prazos, valores = fm.matriz_fluxos_de_tabela(
+        df_fluxos["codigo"].to_numpy(), df_fluxos["prazo_anos"].to_numpy(),
+        df_fluxos["fluxo"].to_numpy(), ordem=np.asarray(codigos))
+    return prazos, valores
@@ -9,13 +9,157 @@ import os
 import unicodedata
 import streamlit as st
 from datetime import datetime
+from collections import namedtuple
+import functools
+import threading
+from functools import lru_cache
+
+try:
+    from . import financial_math as fm
+    from . import cash_flows as cf
+    from . import business_days as bd
+    from . import spreads
+    from . import storage
+    from . import metricas
+    from . import universo_gravado
+except ImportError:
+    import financial_math as fm
+    import cash_flows as cf
+    import business_days as bd
+    import spreads
+    import storage
+    import metricas
+    import universo_gravado
 
 # --- CONFIGURAÇÃO DE CAMINHOS ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 DB_DEBENTURES = os.path.join(DATA_DIR, "debentures_anbima.db")
 DB_CURVAS = os.path.join(DATA_DIR, "curvas_anbima.db")
+PARQUET_DIR = os.path.join(DATA_DIR, "parquet")
+
+# Backend de dados (storage.Storage); None = SQLite nos caminhos acima
+_STORAGE = None
+
+def get_storage():
+    """
+    Backend de dados em uso
+
+    Padrão: SQLiteStorage sobre DB_DEBENTURES/DB_CURVAS, com o store Parquet para
+    intervalos longos (desligável com BONDTRACK_PARQUET=0). Outro backend pode ser
+    definido com set_storage sem mudar as páginas.
+    """
+    if _STORAGE is not None: return _STORAGE
+    parquet_dir = PARQUET_DIR if os.environ.get("BONDTRACK_PARQUET", "1") != "0" else None
+    return storage.SQLiteStorage(DB_DEBENTURES, DB_CURVAS, parquet_dir)
+
+def set_storage(backend):
+    """Troca o backend (ex.: storage.MemoriaStorage em testes) e descarta os caches de leitura"""
+    global _STORAGE
+    _STORAGE = backend
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    _carregar_curva_arrays.cache_clear()
+
+_VERSAO_VISTA = None
+
+def versao_dados():
+    """Versão dos dados no backend (muda a cada carga dos ETLs); entra na chave dos caches do engine"""
+    try: versao = get_storage().versao()
+    except Exception: return None
+    if versao != _VERSAO_VISTA: _nova_versao(versao)
+    return versao
+
+def _nova_versao(versao):
+    """
+    Primeira leitura do processo com uma versão nova dos dados: dispara o aquecimento
+
+    Vale para qualquer página (a primeira leitura de dados do processo, ou a
+    primeira depois de uma carga). Só no app: ETLs e scripts importam o engine
+    sem o Streamlit rodando e não aquecem nada.
+    """
+    global _VERSAO_VISTA
+    _VERSAO_VISTA = versao
+    if not st.runtime.exists(): return
+    try: from . import aquecimento
+    except ImportError: import aquecimento
+    aquecimento.aquecer_em_segundo_plano(versao)
+
+def _somente_leitura(resultado):
+    """
+    Marca como somente leitura os arrays numpy dos DataFrames de um resultado do cache compartilhado
+
+    No pandas 3 (Copy-on-Write) uma escrita na cópia rasa copia antes o bloco. Antes
+    dele, sem o Copy-on-Write ligado, a escrita no lugar (df.loc[...] = ...) em uma
+    cópia rasa levanta ValueError em vez de alterar o frame de todas as sessões.
+    Colunas novas ou substituídas (df['x'] = ...) e as operações que devolvem um
+    frame novo funcionam nas duas versões.
+    """
+    if isinstance(resultado, pd.DataFrame):
+        for bloco in resultado._mgr.blocks:
+            valores = getattr(bloco.values, "_ndarray", bloco.values)  # datas e categorias guardam o ndarray em _ndarray
+            if isinstance(valores, np.ndarray): valores.flags.writeable = False
+    elif isinstance(resultado, tuple):
+        for r in resultado: _somente_leitura(r)
+    return resultado
+
+def _copia_rasa(resultado):
+    """Cópia rasa (sem copiar dados) dos DataFrames de um resultado em cache"""
+    if isinstance(resultado, pd.DataFrame): return resultado.copy(deep=False)
+    if isinstance(resultado, tuple): return tuple(_copia_rasa(r) for r in resultado)
+    return resultado
+
+_LOCAL = threading.local()
+
+def _chamadas_em_cache():
+    """Pilha (por thread) das chamadas em curso a funções com cache_por_versao; True = calculada"""
+    if not hasattr(_LOCAL, "chamadas"): _LOCAL.chamadas = []
+    return _LOCAL.chamadas
+
+def cache_por_versao(max_entries=32, compartilhado=False):
+    """
+    st.cache_data sem TTL, com a versão dos dados como parte da chave
+
+    A entrada vale até os bancos mudarem (nova carga do ETL) e uma carga nova
+    aparece na próxima leitura; entradas de versões antigas saem por max_entries.
+    A função decorada mantém a assinatura original.
+
+    Com compartilhado=True, usa st.cache_resource: um único objeto por chave
+    para todas as sessões, sem pickle a cada acesso. O frame em cache fica com
+    os arrays somente leitura (_somente_leitura) e cada chamada recebe uma cópia
+    rasa (_copia_rasa), sem copiar dados: as alterações da página não chegam ao
+    frame em cache, com ou sem Copy-on-Write.
 
+    Cada chamada informa às métricas (metricas.marcar_cache) se foi acerto de cache.
+    """
+    def decorador(func):
+        def em_cache(versao, *args, **kwargs):
+            # Só roda em falta de cache: marca a chamada corrente desta thread como calculada
+            calculadas = _chamadas_em_cache()
+            if calculadas: calculadas[-1] = True
+            resultado = func(*args, **kwargs)
+            return _somente_leitura(resultado) if compartilhado else resultado
+        # O st.cache_data identifica a função pelo __qualname__: um por função decorada
+        em_cache.__name__, em_cache.__qualname__ = func.__name__, f"{func.__qualname__}__versao"
+        if compartilhado:
+            em_cache = st.cache_resource(max_entries=max_entries)(em_cache)
+        else:
+            em_cache = st.cache_data(max_entries=max_entries)(em_cache)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            calculadas = _chamadas_em_cache()
+            calculadas.append(False)
+            try:
+                resultado = em_cache(versao_dados(), *args, **kwargs)
+            finally:
+                metricas.marcar_cache(func.__name__, acerto=not calculadas.pop())
+            return _copia_rasa(resultado) if compartilhado else resultado
+        wrapper.clear = em_cache.clear
+        return wrapper
+    return decorador
+
+@metricas.instrumentar()
 def smart_clean(df):
     """Higienização e padronização de dados"""
     if df.empty: return pd.DataFrame()
@@ -61,7 +205,7 @@ def smart_clean(df):
         df['pu'] = pd.to_numeric(df['pu'], errors='coerce')
 
     if not df.empty and 'duration' in df.columns and df['duration'].mean() > 50:
-        df['duration'] = df['duration'] / 252
+        df['duration'] = bd.du_para_anos(df['duration'])  # veio em dias úteis
 
     if 'indexador' not in df.columns: df['indexador'] = 'N/D'
     df['indexador'] = df['indexador'].fillna('N/D').astype(str).str.upper().str.strip()
@@ -104,76 +248,19 @@ def smart_clean(df):
 
     return df
 
-@st.cache_data(ttl=60)
+@cache_por_versao(max_entries=4)
 def get_available_dates():
-    datas = set()
-    if os.path.exists(DB_DEBENTURES):
-        try:
-            conn = sqlite3.connect(DB_DEBENTURES)
-            try:
-                df = pd.read_sql("SELECT DISTINCT data_base FROM negociacao_snd", conn)
-                datas.update(df['data_base'].dropna().tolist())
-            except: pass
-            try:
-                df = pd.read_sql("SELECT DISTINCT data_referencia FROM mercado_secundario", conn)
-                datas.update(df['data_referencia'].dropna().tolist())
-            except: pass
-            conn.close()
-        except: pass
-    
-    lista_fmt = []
-    for d in datas:
-        try:
-            dt = datetime.strptime(d, "%Y-%m-%d")
-            lista_fmt.append(dt.strftime("%d/%m/%Y"))
-        except:
-            try:
-                dt = datetime.strptime(d, "%d/%m/%Y")
-                lista_fmt.append(dt.strftime("%d/%m/%Y"))
-            except: pass
-            
-    return sorted(list(set(lista_fmt)), reverse=True)
+    try: datas = get_storage().get_datas()
+    except Exception: return []
+    return [datetime.strptime(d, "%Y-%m-%d").strftime("%d/%m/%Y") for d in datas]
 
-@st.cache_data(ttl=60)
+@metricas.instrumentar()
+@cache_por_versao(compartilhado=True)
 def load_data(selected_date_str):
-    if not os.path.exists(DB_DEBENTURES):
-        return None, "Banco de dados não encontrado."
-
-    try:
-        dt_obj = datetime.strptime(selected_date_str, "%d/%m/%Y")
-        date_iso = dt_obj.strftime("%Y-%m-%d")
-        date_br = selected_date_str
-    except:
-        date_iso = selected_date_str
-        date_br = selected_date_str
-
-    conn = sqlite3.connect(DB_DEBENTURES)
-    df_snd = pd.DataFrame()
-    df_anbima = pd.DataFrame()
-    df_cadastro = pd.DataFrame()
-
     try:
-        try:
-            q_snd = f"SELECT * FROM negociacao_snd WHERE data_base = '{date_iso}'"
-            df_snd = pd.read_sql(q_snd, conn)
-        except: pass
-        
-        try:
-            q_anb = f"SELECT * FROM mercado_secundario WHERE data_referencia = '{date_br}'"
-            df_anbima = pd.read_sql(q_anb, conn)
-            if df_anbima.empty:
-                q_anb = f"SELECT * FROM mercado_secundario WHERE data_referencia = '{date_iso}'"
-                df_anbima = pd.read_sql(q_anb, conn)
-        except: pass
-
-        try:
-            df_cadastro = pd.read_sql("SELECT * FROM cadastro_snd", conn)
-        except: pass
+        df_snd, df_anbima, df_cadastro = get_storage().load_snapshot(selected_date_str)
     except Exception as e:
-        conn.close()
         return None, str(e)
-    finally:
-        conn.close()
 
     if df_snd.empty and df_anbima.empty and df_cadastro.empty:
         return pd.DataFrame(), None
@@ -219,26 +306,62 @@ def load_data(selected_date_str):
     df_final['data_referencia'] = selected_date_str
     return df_final, None
 
-@st.cache_data(ttl=300)
+@cache_por_versao()
 def load_curva_anbima(target_date=None):
-    if not os.path.exists(DB_CURVAS): return pd.DataFrame()
-    conn = sqlite3.connect(DB_CURVAS)
+    try: return get_storage().load_curva(target_date)
+    except Exception: return pd.DataFrame()
+
+CurvaArrays = namedtuple("CurvaArrays", ["data_referencia", "dias", "taxa_ipca", "taxa_pre", "inflacao_implicita"])
+
+def _curva_df_para_arrays(df_curva, data_referencia=None):
+    """Decodifica o DataFrame da curva em arrays NumPy ordenados e somente-leitura"""
+    df_c = df_curva.dropna(subset=['dias_corridos']).sort_values('dias_corridos').drop_duplicates('dias_corridos')
+    arrays = []
+    for col in ['dias_corridos', 'taxa_ipca', 'taxa_pre', 'inflacao_implicita']:
+        if col in df_c.columns: arr = pd.to_numeric(df_c[col], errors='coerce').to_numpy(dtype=np.float64)
+        else: arr = np.full(len(df_c), np.nan)
+        arr.flags.writeable = False
+        arrays.append(arr)
+    if data_referencia is None and 'data_referencia' in df_c.columns and not df_c.empty:
+        data_referencia = df_c['data_referencia'].iloc[0]
+    return CurvaArrays(data_referencia, *arrays)
+
+@lru_cache(maxsize=32)
+def _carregar_curva_arrays(data_referencia, versao=None):
+    try: df = get_storage().load_curva(data_referencia)
+    except Exception: return None
+    if df.empty: return None
+    return _curva_df_para_arrays(df, data_referencia)
+
+def get_curva_arrays(target_date=None):
+    """
+    Retorna a curva ANBIMA decodificada em arrays NumPy, pronta para interpolação.
+
+    As curvas ficam em um cache LRU por data e versão dos dados (em memória, no
+    processo), evitando reler e reordenar o banco a cada rerun. Sem data, usa a
+    curva mais recente.
+
+    Returns:
+        CurvaArrays (data_referencia, dias, taxa_ipca, taxa_pre, inflacao_implicita) ou None
+    """
+    if not target_date:
+        try: target_date = get_storage().ultima_data_curva()
+        except Exception: target_date = None
+        if not target_date: return None
+    return _carregar_curva_arrays(target_date, versao_dados())
+
+def get_yield_curve(target_date=None):
+    """
+    Retorna a YieldCurve (financial_math) da data informada, ou a mais recente.
+    Reaproveita os arrays do cache LRU de curvas; retorna None sem curva.
+    """
+    arrays = get_curva_arrays(target_date)
+    if arrays is None: return None
     try:
-        if target_date:
-            df = pd.read_sql(f"SELECT * FROM curvas_anbima WHERE data_referencia = '{target_date}'", conn)
-            if df.empty:
-                try:
-                    iso = datetime.strptime(target_date, "%d/%m/%Y").strftime("%Y-%m-%d")
-                    df = pd.read_sql(f"SELECT * FROM curvas_anbima WHERE data_referencia = '{iso}'", conn)
-                except: pass
-        else:
-            df = pd.read_sql("SELECT * FROM curvas_anbima", conn)
-            if not df.empty:
-                df = df.tail(len(df[df['data_referencia'] == df.iloc[-1]['data_referencia']]))
-        return df
-    except: return pd.DataFrame()
-    finally: conn.close()
+        return fm.YieldCurve(arrays.dias, arrays.taxa_pre, arrays.taxa_ipca, arrays.inflacao_implicita, arrays.data_referencia)
+    except ValueError: return None
 
+@metricas.instrumentar()
 def apply_filters(df, filtros):
     df_f = df.copy()
     if filtros.get("emissor"): df_f = df_f[df_f["emissor"].isin(filtros["emissor"])]
@@ -253,6 +376,58 @@ def apply_filters(df, filtros):
     if "duration_max" in filtros: df_f = df_f[df_f["duration"] <= filtros["duration_max"]]
     return df_f
 
+# --- PAGINAÇÃO ---
+Pagina = namedtuple("Pagina", ["dados", "pagina", "total_paginas", "total_linhas"])
+
+def _limitar_pagina(pagina, total_linhas, tamanho):
+    """(página dentro do intervalo válido, total de páginas); sempre há ao menos uma página"""
+    total_paginas = max(1, -(-int(total_linhas) // int(tamanho)))
+    return min(max(1, int(pagina)), total_paginas), total_paginas
+
+def paginar(df, pagina=1, tamanho=50, ordenar_por=None, ascendente=True, colunas=None):
+    """
+    Uma página de um DataFrame em memória (ex.: universo filtrado do Screener)
+
+    Ordena só a coluna escolhida e monta apenas as linhas e colunas da página,
+    então a página envia ao navegador tamanho linhas em vez do frame inteiro.
+    Nulos ficam no fim; página fora do intervalo vai para a primeira/última.
+    """
+    pagina, total_paginas = _limitar_pagina(pagina, len(df), tamanho)
+    inicio = (pagina - 1) * int(tamanho)
+    if ordenar_por in df.columns:
+        valores = df[ordenar_por].reset_index(drop=True)
+        try: ordem = valores.sort_values(ascending=ascendente, na_position='last', kind='stable').index
+        except TypeError: ordem = valores.astype(str).sort_values(ascending=ascendente, kind='stable').index
+        posicoes = ordem[inicio:inicio + int(tamanho)]
+    else:
+        posicoes = np.arange(inicio, min(inicio + int(tamanho), len(df)))
+    dados = df.iloc[posicoes]
+    if colunas is not None: dados = dados[[c for c in colunas if c in dados.columns]]
+    return Pagina(dados, pagina, total_paginas, len(df))
+
+@cache_por_versao(max_entries=64)
+def load_pagina(tabela, data_ref=None, pagina=1, tamanho=50, ordenar_por=None, ascendente=True):
+    """
+    Uma página de uma tabela bruta do banco (na data, se informada)
+
+    A ordenação e o corte (ORDER BY / LIMIT / OFFSET no SQLite) acontecem no
+    backend: só as linhas da página são lidas, em qualquer tamanho de tabela.
+    """
+    try:
+        backend = get_storage()
+        total = backend.contar(tabela, data_ref) or 0
+        pagina, total_paginas = _limitar_pagina(pagina, total, tamanho)
+        dados = backend.load_pagina(tabela, data_ref, ordenar_por, ascendente, (pagina - 1) * int(tamanho), tamanho)
+    except Exception:
+        return Pagina(pd.DataFrame(), 1, 1, 0)
+    return Pagina(dados, pagina, total_paginas, total)
+
+@cache_por_versao()
+def get_colunas_tabela(tabela):
+    """Colunas de uma tabela do banco ([] se ela não existe)"""
+    try: return get_storage().colunas(tabela)
+    except Exception: return []
+
 # === AQUI ESTAVA O ERRO: Função get_data_quality_report corrigida ===
 def get_data_quality_report(df):
     report = {
@@ -286,24 +461,105 @@ def get_data_quality_report(df):
     return report
 
 def get_volume_summary():
-    if not os.path.exists(DB_DEBENTURES): return None
-    try:
-        conn = sqlite3.connect(DB_DEBENTURES)
-        last = pd.read_sql("SELECT MAX(data_base) as d FROM negociacao_snd", conn).iloc[0]['d']
-        df = pd.read_sql(f"SELECT * FROM negociacao_snd WHERE data_base = '{last}'", conn)
-        conn.close()
-        return {"volume_total": df['volume_total'].sum(), "qtd_ativos": df['codigo'].nunique(), "data_ref": last}
-    except: return None
+    try: df = get_storage().volume_por_ativo()
+    except Exception: return None
+    if df.empty: return None
+    return {"volume_total": df['volume_total'].sum(), "qtd_ativos": df['codigo'].nunique(), "data_ref": df['data_base'].iloc[0]}
 
 def get_top_volume(n=5):
-    if not os.path.exists(DB_DEBENTURES): return pd.DataFrame()
-    conn = sqlite3.connect(DB_DEBENTURES)
-    try:
-        last = pd.read_sql("SELECT MAX(data_base) as d FROM negociacao_snd", conn).iloc[0]['d']
-        df = pd.read_sql(f"SELECT * FROM negociacao_snd WHERE data_base = '{last}' ORDER BY volume_total DESC LIMIT {n}", conn)
-        conn.close()
-        return df
-    except: return pd.DataFrame()
+    try: return get_storage().volume_por_ativo(limit=n)
+    except Exception: return pd.DataFrame()
+
+@cache_por_versao()
+def load_volume_historico(dias=30):
+    """Volume agregado por data (data_base, volume_total, total_negocios, qtd_ativos) das últimas N datas"""
+    try: df = get_storage().volume_agregado()
+    except Exception: return pd.DataFrame(columns=storage.COLUNAS_VOLUME)
+    return df.tail(dias).reset_index(drop=True)
+
+@cache_por_versao()
+def load_volume_por_ativo(limit=100, data_ref=None):
+    """Negócios SND por ativo na data (padrão: a mais recente), por volume decrescente"""
+    try: df = get_storage().volume_por_ativo(data_ref, limit)
+    except Exception: return pd.DataFrame()
+    if not df.empty and 'codigo' in df.columns:
+        df['codigo'] = df['codigo'].str.strip().str.upper()
+    return df
+
+def detectar_negociacoes_atipicas(df_volume, threshold_zscore=2.0):
+    """
+    Marca negociações atípicas do dia em relação ao restante do mercado
+
+    Critérios (|z| acima do limite, z-scores em log para volumes assimétricos):
+    - Volume alto: z-score do volume
+    - Ticket alto: z-score do volume por negócio
+    - Concentração: volume alto feito em poucos negócios (abaixo da mediana)
+
+    Returns:
+        Cópia do DataFrame com zscore_volume, ticket_medio, zscore_ticket,
+        atipico (bool) e motivo_atipicidade
+    """
+    df = df_volume.copy()
+    if df.empty or 'volume_total' not in df.columns:
+        return df.assign(atipico=False, motivo_atipicidade="")
+
+    volume = pd.to_numeric(df['volume_total'], errors='coerce').to_numpy(dtype=np.float64)
+    negocios = pd.to_numeric(df.get('numero_negocios', pd.Series(np.nan, index=df.index)), errors='coerce').to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ticket = np.where(negocios > 0, volume / negocios, np.nan)
+
+    def zscore(valores):
+        log = np.log(np.where(valores > 0, valores, np.nan))
+        desvio = np.nanstd(log)
+        if not np.isfinite(desvio) or desvio == 0: return np.zeros(len(valores))
+        return np.nan_to_num((log - np.nanmean(log)) / desvio)
+
+    df['zscore_volume'] = zscore(volume)
+    df['ticket_medio'] = ticket
+    df['zscore_ticket'] = zscore(ticket)
+
+    volume_alto = df['zscore_volume'].to_numpy() > threshold_zscore
+    ticket_alto = df['zscore_ticket'].to_numpy() > threshold_zscore
+    concentrado = volume_alto & (negocios <= np.nanmedian(negocios) if np.isfinite(negocios).any() else False)
+
+    motivos = np.full(len(df), "", dtype=object)
+    for mascara, texto in [(volume_alto, "Volume alto"), (concentrado, "Concentração"), (ticket_alto, "Ticket alto")]:
+        motivos[mascara] = np.where(motivos[mascara] == "", texto, motivos[mascara] + ", " + texto)
+    df['atipico'] = volume_alto | ticket_alto
+    df['motivo_atipicidade'] = motivos
+    return df
+
+@cache_por_versao(max_entries=16)
+def load_negociacoes_atipicas(threshold_zscore=2.0, limit=100, data_ref=None):
+    """Negócios por ativo já marcados por detectar_negociacoes_atipicas (um cache por limite de z-score)"""
+    return detectar_negociacoes_atipicas(load_volume_por_ativo(limit=limit, data_ref=data_ref), threshold_zscore=threshold_zscore)
+
+@cache_por_versao()
+def load_concentracao_volume(limit=100, data_ref=None):
+    """
+    Concentração do volume negociado por ativo na data
+
+    Returns:
+        (df por volume decrescente com volume_acum, pct_acum e rank,
+         dict com ativos_80 (nº de ativos até 80% do volume), top3_pct e hhi)
+    """
+    df = load_volume_por_ativo(limit=limit, data_ref=data_ref)
+    if df.empty or 'volume_total' not in df.columns:
+        return pd.DataFrame(), {}
+
+    df = df.sort_values('volume_total', ascending=False)
+    total = df['volume_total'].sum()
+    df['volume_acum'] = df['volume_total'].cumsum()
+    df['pct_acum'] = df['volume_acum'] / total * 100
+    df['rank'] = range(1, len(df) + 1)
+
+    market_shares = df['volume_total'] / total
+    indicadores = {
+        'ativos_80': df[df['pct_acum'] <= 80]['rank'].max(),
+        'top3_pct': df.head(3)['volume_total'].sum() / total * 100,
+        'hhi': (market_shares ** 2).sum() * 10000,
+    }
+    return df, indicadores
 
 def interpolar_taxa_curva(df_curva, dias, coluna_taxa):
     if df_curva.empty or coluna_taxa not in df_curva.columns: return None
@@ -313,65 +569,366 @@ def interpolar_taxa_curva(df_curva, dias, coluna_taxa):
         return np.interp(dias, df_c['dias_corridos'], df_c[coluna_taxa])
     except: return None
 
+@metricas.instrumentar()
 def adicionar_spreads_ao_df(df_ativos, df_curva):
-    if df_ativos.empty or df_curva.empty or 'duration' not in df_ativos.columns: return df_ativos
-    df_ativos['dias_interpolacao'] = df_ativos['duration'] * 252
-    
-    def calc(row):
-        try:
-            d = row.get('dias_interpolacao', 0)
-            t = row.get('taxa', 0)
-            idx = str(row.get('indexador', '')).upper()
-            if d<=0 or t<=0: return None
-            
-            ref = 'taxa_pre'
-            if 'IPCA' in idx: ref = 'taxa_ipca'
-            
-            bench = interpolar_taxa_curva(df_curva, d, ref)
-            if bench is not None: return (t - bench)*100
-        except: return None
+    if df_ativos.empty or df_curva is None or 'duration' not in df_ativos.columns: return df_ativos
+    if isinstance(df_curva, pd.DataFrame) and df_curva.empty: return df_ativos
+    try:
+        curva = df_curva if isinstance(df_curva, fm.YieldCurve) else fm.YieldCurve.from_dataframe(df_curva)
+    except (ValueError, KeyError): return df_ativos
+
+    dias = bd.anos_para_du(pd.to_numeric(df_ativos['duration'], errors='coerce'))
+    taxa = pd.to_numeric(df_ativos['taxa'], errors='coerce').to_numpy(dtype=np.float64) if 'taxa' in df_ativos.columns else np.full(len(df_ativos), np.nan)
+    idx = df_ativos['indexador'].astype(str).str.upper() if 'indexador' in df_ativos.columns else pd.Series('', index=df_ativos.index)
+    usa_ipca = idx.str.contains('IPCA', regex=False).to_numpy()
+
+    bench = np.full(len(df_ativos), np.nan)
+    for nome, mascara in (('taxa_ipca', usa_ipca), ('taxa_pre', ~usa_ipca)):
+        if not mascara.any(): continue
+        try: bench[mascara] = curva.zero_rate(dias[mascara], nome)
+        except KeyError: pass
+    valido = (dias > 0) & (taxa > 0)
+    bench[~valido] = np.nan
+
+    df_ativos['dias_interpolacao'] = dias
+    df_ativos['taxa_benchmark'] = bench
+    df_ativos['tipo_curva'] = np.where(usa_ipca, 'taxa_ipca', 'taxa_pre')
+    df_ativos['spread_bps'] = (taxa - bench) * 100
+    return df_ativos
+
+@cache_por_versao()
+def load_cronogramas():
+    """Cronogramas de fluxos de caixa gerados pelo ETL (tabela fluxos_caixa)"""
+    return cf.carregar_cronogramas(DB_DEBENTURES)
+
+def _fluxos_ativos(df_ativos, data_ref, curva=None):
+    """Cronogramas, dados de mercado alinhados e matrizes de fluxos dos ativos (ou None)"""
+    cron = load_cronogramas()
+    if cron.empty or df_ativos.empty or 'codigo' not in df_ativos.columns: return None
+    cron = cron[cron['codigo'].isin(df_ativos['codigo'])]
+    if cron.empty: return None
+
+    if curva is None: curva = get_yield_curve(data_ref) or get_yield_curve()
+    fluxos = cf.projetar_fluxos(cron, spreads.data_para_iso(data_ref), curva)
+    ativos = df_ativos.drop_duplicates('codigo').set_index('codigo').reindex(cron['codigo'])
+    prazos, valores = cf.matriz_fluxos_universo(fluxos, cron['codigo'].to_numpy())
+    return cron, ativos, prazos, valores, curva
+
+def _taxas_desconto(cron, ativos, curva):
+    """Taxa de desconto (decimal) de cada ativo: indicativa, ou curva pré combinada para CDI (-1 sem taxa)"""
+    taxa = pd.to_numeric(ativos['taxa'], errors='coerce').to_numpy(dtype=np.float64) / 100
+    tipo = cron['tipo_fluxo'].to_numpy()
+    if curva is not None and 'duration' in ativos.columns:
+        du = bd.anos_para_du(pd.to_numeric(ativos['duration'], errors='coerce').fillna(0))
+        pre = curva.zero_rate(du, 'pre') / 100
+        taxa = np.where(tipo == 'CDI+', (1 + pre) * (1 + taxa) - 1, taxa)
+        taxa = np.where(tipo == '%CDI', pre * taxa, taxa)
+    return np.where(np.isnan(taxa), -1, taxa)
+
+def calcular_risco_fluxos(df_ativos, data_ref, curva=None):
+    """
+    Duration, convexidade e DV01 a partir dos fluxos projetados de cada ativo
+
+    Os fluxos vêm dos cronogramas do cadastro SND e são descontados à taxa
+    indicativa (IPCA e PRÉ). Para ativos CDI, a taxa de desconto combina a curva
+    pré no prazo do ativo com o spread/percentual indicativo.
+
+    Args:
+        df_ativos: DataFrame com codigo, taxa, pu, duration
+        data_ref: Data-base (DD/MM/YYYY ou ISO)
+        curva: YieldCurve opcional (padrão: curva da data ou a mais recente)
+
+    Returns:
+        DataFrame com codigo, duration_fluxos, duration_modificada, convexidade e dv01
+        (apenas ativos com cronograma)
+    """
+    cols = ['codigo', 'duration_fluxos', 'duration_modificada', 'convexidade', 'dv01']
+    dados = _fluxos_ativos(df_ativos, data_ref, curva)
+    if dados is None: return pd.DataFrame(columns=cols)
+    cron, ativos, prazos, valores, curva = dados
+
+    taxa = _taxas_desconto(cron, ativos, curva)
+    r = fm.calcular_duration_convexidade_vetorizado(prazos, valores, taxa, freq_cupom=1)
+    pu = pd.to_numeric(ativos['pu'], errors='coerce').to_numpy(dtype=np.float64) if 'pu' in ativos.columns else np.full(len(cron), np.nan)
+    df = pd.DataFrame({
+        'codigo': cron['codigo'].to_numpy(),
+        'duration_fluxos': r['duration_macaulay'],
+        'duration_modificada': r['duration_modificada'],
+        'convexidade': r['convexidade'],
+        'dv01': fm.calcular_dv01(pu, r['duration_modificada']),
+    })
+    return df[r['valor_presente'] > 0].reset_index(drop=True)
+
+def _dados_reavaliacao(df_ativos, data_ref, curva=None):
+    """
+    Fluxos, curva e spread dos ativos PRE e IPCA+ para reprecificação pela curva
+
+    O spread de cada ativo é a taxa indicativa menos a taxa zero da sua curva no
+    prazo da duration. Retorna (codigos, prazos, valores, nome_curva, spreads, pu,
+    curva) ou None.
+    """
+    dados = _fluxos_ativos(df_ativos, data_ref, curva)
+    if dados is None or dados[4] is None: return None
+    cron, ativos, prazos, valores, curva = dados
+
+    tipo = cron['tipo_fluxo'].to_numpy()
+    nome_curva = np.where(tipo == 'IPCA', 'ipca', 'pre')
+    elegivel = np.isin(tipo, ['IPCA', 'PRE']) & np.isin(nome_curva, curva.curvas)
+    if not elegivel.any(): return None
+
+    taxa = pd.to_numeric(ativos['taxa'], errors='coerce').to_numpy(dtype=np.float64)[elegivel]
+    du = bd.anos_para_du(pd.to_numeric(ativos['duration'], errors='coerce').fillna(0))[elegivel]
+    nome_curva = nome_curva[elegivel]
+    zero = np.full(len(taxa), np.nan)
+    for nome in ('pre', 'ipca'):
+        linhas = nome_curva == nome
+        if linhas.any(): zero[linhas] = curva.zero_rate(du[linhas], nome)
+    spreads = np.nan_to_num((taxa - zero) * 100)
+    pu = pd.to_numeric(ativos['pu'], errors='coerce').to_numpy(dtype=np.float64)[elegivel]
+    return cron['codigo'].to_numpy()[elegivel], prazos[elegivel], valores[elegivel], nome_curva, spreads, pu, curva
+
+def simular_cenarios_curva(df_ativos, data_ref, cenarios=None, curva=None):
+    """
+    Reavaliação completa dos ativos prefixados e IPCA+ sob choques na curva ANBIMA
+
+    O spread de cada ativo sobre a curva fica constante; os fluxos são
+    redescontados em cada curva deslocada e a variação relativa é aplicada ao PU.
+    Ativos CDI ficam de fora: seus fluxos acompanham a curva e o risco de taxa é
+    residual.
+
+    Args:
+        df_ativos: DataFrame com codigo, taxa, pu, duration
+        data_ref: Data-base (DD/MM/YYYY ou ISO)
+        cenarios: Lista de (nome, tipo, bps) (padrão: fm.CENARIOS_CURVA_PADRAO)
+        curva: YieldCurve opcional
+
+    Returns:
+        DataFrame longo com codigo, cenario, pu_atual, pu_estimado e variacao_pct
+    """
+    cols = ['codigo', 'cenario', 'pu_atual', 'pu_estimado', 'variacao_pct']
+    dados = _dados_reavaliacao(df_ativos, data_ref, curva)
+    if dados is None: return pd.DataFrame(columns=cols)
+    codigos, prazos, valores, nome_curva, spreads, pu, curva = dados
+
+    r = fm.reprecificar_curva_cenarios(prazos, valores, curva, cenarios, curva_ativo=nome_curva, spreads_bps=spreads)
+    n, s = r['variacao_pct'].shape
+    df = pd.DataFrame({
+        'codigo': np.repeat(codigos, s),
+        'cenario': np.tile(r['cenarios'], n),
+        'pu_atual': np.repeat(pu, s),
+        'pu_estimado': (pu[:, None] * (1 + r['variacao_pct'] / 100)).ravel(),
+        'variacao_pct': r['variacao_pct'].ravel(),
+    })
+    return df.dropna(subset=['variacao_pct']).reset_index(drop=True)
+
+def calcular_key_rate_durations(df_ativos, data_ref, vertices=fm.VERTICES_CHAVE, curva=None):
+    """
+    Key rate durations dos ativos PRE e IPCA+ nos vértices-chave da ETTJ ANBIMA
+
+    Args:
+        df_ativos: DataFrame com codigo, taxa, pu, duration
+        data_ref: Data-base (DD/MM/YYYY ou ISO)
+        vertices: Vértices-chave em dias úteis
+        curva: YieldCurve opcional
+
+    Returns:
+        DataFrame indexado por codigo, uma coluna por vértice (dias úteis)
+    """
+    dados = _dados_reavaliacao(df_ativos, data_ref, curva)
+    if dados is None: return pd.DataFrame(columns=list(vertices))
+    codigos, prazos, valores, nome_curva, spreads, _, curva = dados
+
+    krd = fm.calcular_key_rate_durations(prazos, valores, curva, nome_curva, spreads, vertices)
+    df = pd.DataFrame(krd, index=pd.Index(codigos, name='codigo'), columns=list(vertices))
+    return df.dropna()
+
+def calcular_z_spreads(df_ativos, data_ref, curva=None):
+    """
+    Z-spread de todos os ativos com cronograma, resolvido de uma vez
+
+    O preço-alvo é o valor presente dos fluxos (por unidade de saldo) à taxa
+    indicativa, que é como a ANBIMA chega ao PU; assim o PU é reproduzido sem
+    precisar do VNA. O spread é somado à curva IPCA (ativos IPCA) ou pré (demais).
+
+    Args:
+        df_ativos: DataFrame com codigo, taxa, duration
+        data_ref: Data-base (DD/MM/YYYY ou ISO)
+        curva: YieldCurve opcional
+
+    Returns:
+        DataFrame com codigo, tipo_curva, z_spread_bps e z_convergiu
+    """
+    cols = ['codigo', 'tipo_curva', 'z_spread_bps', 'z_convergiu']
+    dados = _fluxos_ativos(df_ativos, data_ref, curva)
+    if dados is None or dados[4] is None: return pd.DataFrame(columns=cols)
+    cron, ativos, prazos, valores, curva = dados
+
+    taxa = _taxas_desconto(cron, ativos, curva)
+    valida = taxa > 0  # taxa zerada = sem taxa indicativa (mesmo critério de adicionar_spreads_ao_df)
+    preco_alvo = np.where(valida, (valores * np.power(1 + np.where(valida, taxa, 0)[:, None], -prazos)).sum(axis=1), np.nan)
+
+    tipo = cron['tipo_fluxo'].to_numpy()
+    nome_curva = np.where((tipo == 'IPCA') & ('ipca' in curva.curvas), 'ipca', 'pre')
+    zero = np.empty_like(prazos)
+    for nome in ('pre', 'ipca'):
+        linhas = nome_curva == nome
+        if linhas.any(): zero[linhas] = curva.zero_rate(bd.anos_para_du(prazos[linhas]), nome) / 100
+
+    r = fm.calcular_z_spread_vetorizado(preco_alvo, prazos, valores, zero)
+    df = pd.DataFrame({
+        'codigo': cron['codigo'].to_numpy(),
+        'tipo_curva': np.where(nome_curva == 'ipca', 'taxa_ipca', 'taxa_pre'),
+        'z_spread_bps': r['z_spread_bps'],
+        'z_convergiu': r['convergiu'],
+    })
+    return df[valida & (valores.sum(axis=1) > 0)].reset_index(drop=True)
+
+@cache_por_versao()
+def load_z_spreads(data_ref):
+    """Z-spreads gravados pelo ETL para a data (codigo, z_spread_bps)"""
+    if not os.path.exists(DB_DEBENTURES): return pd.DataFrame(columns=['codigo', 'z_spread_bps'])
+    try:
+        df = spreads.carregar_spreads(DB_DEBENTURES, data_ref)
+    except Exception:  # banco sem a tabela/colunas (ETL de spreads ainda não rodou)
+        return pd.DataFrame(columns=['codigo', 'z_spread_bps'])
+    return df[['codigo', 'z_spread_bps']]
+
+@cache_por_versao()
+def load_historico_spreads(codigos=None, inicio=None, fim=None):
+    """Série histórica de spreads (I-spread e Z-spread) gravada pelo ETL, em uma consulta"""
+    try:
+        df = get_storage().load_range(spreads.TABELA_SPREADS, inicio, fim, codigos, spreads.COLUNAS_SPREADS[1:])
+    except Exception:
+        return pd.DataFrame(columns=spreads.COLUNAS_SPREADS)
+    if df.empty: return pd.DataFrame(columns=spreads.COLUNAS_SPREADS)
+    df['data_referencia'] = pd.to_datetime(df.pop('data'))
+    return df[spreads.COLUNAS_SPREADS].sort_values(['codigo', 'data_referencia'], ignore_index=True)
+
+@cache_por_versao()
+def load_historico_mercado(codigos=None, inicio=None, fim=None, colunas=('taxa_indicativa', 'pu', 'duration')):
+    """
+    Histórico de taxas indicativas ANBIMA (mercado_secundario) em um intervalo
+
+    No backend padrão, intervalos longos vêm do store Parquet (só as colunas e
+    partições pedidas) quando ele existe; senão, uma consulta ao SQLite.
+
+    Returns:
+        DataFrame com codigo, data_referencia (datetime) e as colunas pedidas,
+        ordenado por codigo e data
+    """
+    colunas = [c for c in colunas if c not in ('codigo', 'data_referencia')]
+    if codigos is not None:
+        codigos = [str(c).strip().upper() for c in codigos]
+    try:
+        df = get_storage().load_range(storage.TABELA_MERCADO, inicio, fim, codigos, ['codigo'] + colunas)
+    except Exception:
+        return pd.DataFrame(columns=['codigo', 'data_referencia'] + colunas)
+    df['data_referencia'] = pd.to_datetime(df.pop('data'))
+    return df[['codigo', 'data_referencia'] + colunas].sort_values(['codigo', 'data_referencia'], ignore_index=True)
+
+def adicionar_z_spreads_ao_df(df_ativos, data_ref):
+    """Junta a coluna z_spread_bps (gravada pelo ETL) ao DataFrame de ativos"""
+    df_z = load_z_spreads(data_ref)
+    if df_ativos.empty or df_z.empty: return df_ativos
+    z = pd.Series(df_z['z_spread_bps'].to_numpy(), index=df_z['codigo'])
+    df_ativos = df_ativos.copy()
+    df_ativos['z_spread_bps'] = df_ativos['codigo'].map(z)
+    return df_ativos
+
+def calcular_universo(data_ref):
+    """
+    Universo enriquecido da data, sem cache e sem o universo gravado pelo ETL
+
+    load_data (merge SND + ANBIMA, limpeza e classificações) + spread sobre a
+    curva ANBIMA da data (ou a mais recente, se a da data não existir) + Z-spread
+    gravado pelo ETL. Base de load_universo e do etl_universo.py.
+
+    Returns:
+        (DataFrame, erro); sem curva, o DataFrame não tem a coluna spread_bps
+    """
+    df, erro = load_data(data_ref)
+    if erro or df is None or df.empty: return df, erro
+
+    curva = get_yield_curve(data_ref)
+    if curva is None: curva = get_yield_curve()
+    if curva is not None:
+        df = adicionar_spreads_ao_df(df, curva)
+    df = adicionar_z_spreads_ao_df(df, data_ref)
+    for col in ['taxa', 'duration', 'spread_bps', 'volume_total']:
+        if col in df.columns: df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df, None
+
+def _universo_gravado(data_ref):
+    """Universo gravado pelo ETL (universo_enriquecido) se ainda corresponde às fontes; None para calcular"""
+    if _STORAGE is not None: return None  # outro backend: a tabela no banco não é dele
+    try:
+        assinatura = universo_gravado.assinatura_fontes(DB_DEBENTURES, DB_CURVAS, data_ref)
+        return universo_gravado.carregar_universo(DB_DEBENTURES, data_ref, assinatura)
+    except Exception:  # tabela de outro formato ou banco incompleto: calcula
         return None
-    
-    df_ativos['spread_bps'] = df_ativos.apply(calc, axis=1)
+
+@metricas.instrumentar()
+@cache_por_versao(max_entries=16, compartilhado=True)
+def load_universo(data_ref):
+    """
+    Universo enriquecido da data (calcular_universo), uma vez por versão dos dados
+
+    Nas datas gravadas pela última etapa do ETL (universo_gravado), lê o frame
+    pronto do banco, se as fontes não mudaram desde a gravação, em vez de
+    refazer merge e spreads. Fica no cache compartilhado do engine: um único
+    frame para todas as páginas e sessões, entregue como cópia (_copia_rasa).
+
+    Returns:
+        (DataFrame, erro); sem curva, o DataFrame não tem a coluna spread_bps
+    """
+    df = _universo_gravado(data_ref)
+    if df is not None: return df, None
+    return calcular_universo(data_ref)
+
+@cache_por_versao()
+def load_estatisticas_spreads(metrica='spread_bps', janela=90):
+    """Estatísticas móveis (média, desvio, extremos, percentis e z-score) gravadas pelo ETL"""
+    if not os.path.exists(DB_DEBENTURES): return pd.DataFrame(columns=['codigo'])
+    try:
+        return spreads.carregar_estatisticas(DB_DEBENTURES, metrica, janela)
+    except sqlite3.Error:
+        return pd.DataFrame(columns=['codigo'])
+
+def adicionar_estatisticas_ao_df(df_ativos, metrica='spread_bps', janela=90, colunas=('media', 'zscore', 'percentil_atual')):
+    """Junta as estatísticas móveis da métrica ao DataFrame de ativos (colunas <metrica>_<estatística>)"""
+    df_est = load_estatisticas_spreads(metrica, janela)
+    if df_ativos.empty or df_est.empty: return df_ativos
+    df_est = df_est.set_index('codigo')
+    df_ativos = df_ativos.copy()
+    for col in colunas:
+        df_ativos[f"{metrica}_{col}"] = df_ativos['codigo'].map(df_est[col])
     return df_ativos
 
+@cache_por_versao(compartilhado=True)
+def load_matriz_key_rate(data_ref):
+    """
+    Matriz de key rate durations do universo na data (ativos x vértices), em cache
+
+    A exposição de uma carteira por vértice é um único produto matricial
+    (ver portfolio.Carteira.exposicao_vertices).
+    """
+    df, erro = load_data(data_ref)
+    if erro or df is None or df.empty: return pd.DataFrame(columns=list(fm.VERTICES_CHAVE))
+    return calcular_key_rate_durations(df, data_ref)
+
 def get_curvas_anbima_dates():
-    if not os.path.exists(DB_CURVAS): return []
-    conn = sqlite3.connect(DB_CURVAS)
-    try:
-        df = pd.read_sql("SELECT DISTINCT data_referencia FROM curvas_anbima", conn)
-        conn.close()
-        return sorted(df['data_referencia'].tolist(), reverse=True)
-    except: return []
+    try: return get_storage().get_datas_curva()
+    except Exception: return []
 
 def get_database_status_full(data_ref=None):
     status = {'snd_cadastro': {'loaded': False, 'count': 0}, 'snd_negociacao': {'loaded': False, 'count': 0}, 'anbima_indicativa': {'loaded': False, 'count': 0}, 'anbima_precos': {'loaded': False, 'count': 0}, 'anbima_curvas': {'loaded': False, 'count': 0}}
-    if not os.path.exists(DB_DEBENTURES): return status
-    try:
-        conn = sqlite3.connect(DB_DEBENTURES)
-        try:
-            status['snd_cadastro'] = {'loaded': True, 'count': int(conn.execute("SELECT count(*) FROM cadastro_snd").fetchone()[0])}
-        except: pass
-        try:
-            if data_ref:
-                dt_iso = datetime.strptime(data_ref, "%d/%m/%Y").strftime("%Y-%m-%d")
-                c = conn.execute(f"SELECT count(*) FROM negociacao_snd WHERE data_base = '{dt_iso}'").fetchone()[0]
-            else: c = conn.execute("SELECT count(*) FROM negociacao_snd").fetchone()[0]
-            status['snd_negociacao'] = {'loaded': True, 'count': c}
-        except: pass
-        try:
-            if data_ref: c = conn.execute(f"SELECT count(*) FROM mercado_secundario WHERE data_referencia = '{data_ref}'").fetchone()[0]
-            else: c = conn.execute("SELECT count(*) FROM mercado_secundario").fetchone()[0]
-            status['anbima_indicativa'] = {'loaded': True, 'count': c}
-            status['anbima_precos'] = {'loaded': True, 'count': c}
-        except: pass
-        conn.close()
-    except: pass
-    if os.path.exists(DB_CURVAS):
-        try:
-            conn = sqlite3.connect(DB_CURVAS)
-            c = conn.execute("SELECT count(*) FROM curvas_anbima").fetchone()[0]
-            status['anbima_curvas'] = {'loaded': True, 'count': c}
-            conn.close()
-        except: pass
+    backend = get_storage()
+    for chaves, tabela, data in [(['snd_cadastro'], storage.TABELA_CADASTRO, None),
+                                 (['snd_negociacao'], storage.TABELA_NEGOCIOS, data_ref),
+                                 (['anbima_indicativa', 'anbima_precos'], storage.TABELA_MERCADO, data_ref),
+                                 (['anbima_curvas'], storage.TABELA_CURVAS, None)]:
+        try: c = backend.contar(tabela, data)
+        except Exception: c = None
+        if c is not None:
+            for chave in chaves: status[chave] = {'loaded': True, 'count': c}
     return status
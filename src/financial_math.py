@@ -1,4 +1,4 @@
-"""Cálculos Financeiros - Duration, Convexidade, Spreads"""
+"""Cálculos Financeiros - Duration, Convexidade, Spreads, Curvas de Juros"""
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -65,6 +65,107 @@ def calcular_convexidade(fluxos, taxa_desconto):
     
     return convexidade_soma / (vp_total * ((1 + taxa_desconto) ** 2)) if vp_total > 0 else 0
 
+def montar_matriz_fluxos(fluxos):
+    """
+    Converte fluxos de N títulos (formato ragged) em matrizes preenchidas
+
+    Args:
+        fluxos: Lista com, para cada título, a lista de tuplas (periodo_anos, valor_fluxo)
+
+    Returns:
+        Tupla (prazos, valores) de arrays (N, M), com zeros nas posições vazias
+    """
+    n = len(fluxos)
+    m = max((len(f) for f in fluxos), default=0)
+    prazos = np.zeros((n, m))
+    valores = np.zeros((n, m))
+    for i, f in enumerate(fluxos):
+        if len(f):
+            arr = np.asarray(f, dtype=np.float64)
+            prazos[i, :len(f)] = arr[:, 0]
+            valores[i, :len(f)] = arr[:, 1]
+    return prazos, valores
+
+def matriz_fluxos_de_tabela(ids, prazos, valores, ordem=None):
+    """
+    Converte fluxos em formato longo (uma linha por fluxo) em matrizes preenchidas
+
+    Args:
+        ids: Identificador do título de cada fluxo (ex: código)
+        prazos: Prazo de cada fluxo em anos
+        valores: Valor de cada fluxo
+        ordem: Ordem desejada dos títulos nas linhas (opcional; padrão: ids ordenados)
+
+    Returns:
+        Tupla (ids_linhas, prazos, valores) com matrizes (N, M) preenchidas com zeros.
+        Títulos de 'ordem' sem fluxos ficam com linhas zeradas.
+    """
+    ids = np.asarray(ids)
+    prazos = np.asarray(prazos, dtype=np.float64)
+    valores = np.asarray(valores, dtype=np.float64)
+    ids_linhas = np.unique(ids) if ordem is None else np.asarray(ordem)
+    linha = pd.Index(ids_linhas).get_indexer(ids)
+    ok = linha >= 0
+    linha, prazos, valores = linha[ok], prazos[ok], valores[ok]
+
+    ordem_fluxos = np.lexsort((prazos, linha))
+    linha, prazos, valores = linha[ordem_fluxos], prazos[ordem_fluxos], valores[ordem_fluxos]
+    contagem = np.bincount(linha, minlength=len(ids_linhas))
+    inicio = np.concatenate(([0], np.cumsum(contagem)[:-1]))
+    coluna = np.arange(len(linha)) - inicio[linha]
+
+    m = int(contagem.max()) if len(contagem) else 0
+    mat_prazos = np.zeros((len(ids_linhas), m))
+    mat_valores = np.zeros((len(ids_linhas), m))
+    mat_prazos[linha, coluna] = prazos
+    mat_valores[linha, coluna] = valores
+    return ids_linhas, mat_prazos, mat_valores
+
+def _padronizar_fluxos(prazos, valores):
+    """Aceita matrizes preenchidas ou listas ragged e devolve arrays 2D sem NaN"""
+    if not isinstance(prazos, np.ndarray) and len(prazos) and np.ndim(prazos[0]) > 0:
+        prazos, valores = montar_matriz_fluxos([list(zip(p, v)) for p, v in zip(prazos, valores)])
+    prazos = np.atleast_2d(np.asarray(prazos, dtype=np.float64))
+    valores = np.atleast_2d(np.asarray(valores, dtype=np.float64))
+    vazio = np.isnan(prazos) | np.isnan(valores)
+    return np.where(vazio, 0.0, prazos), np.where(vazio, 0.0, valores)
+
+def calcular_duration_convexidade_vetorizado(prazos, valores, taxas_desconto, freq_cupom=2):
+    """
+    Duration de Macaulay, Duration Modificada e Convexidade de N títulos de uma vez
+
+    Versão em arrays de calcular_duration_macaulay, calcular_duration_modified e
+    calcular_convexidade (mesmas fórmulas e convenções), sem laço por título ou fluxo.
+
+    Args:
+        prazos: Matriz (N, M) de prazos em anos, ou lista ragged de arrays por título
+        valores: Matriz (N, M) de valores dos fluxos (zero/NaN nas posições vazias)
+        taxas_desconto: Taxa de desconto anual de cada título (decimal, ex: 0.12), escalar ou (N,)
+        freq_cupom: Frequência usada na Duration Modificada (ver calcular_duration_modified)
+
+    Returns:
+        Dict com arrays (N,): 'valor_presente', 'duration_macaulay',
+        'duration_modificada' e 'convexidade' (zero para títulos inválidos)
+    """
+    prazos, valores = _padronizar_fluxos(prazos, valores)
+    taxas = np.broadcast_to(np.asarray(taxas_desconto, dtype=np.float64), (prazos.shape[0],))
+
+    valida = taxas >= 0
+    base = np.where(valida, 1 + taxas, 1.0)[:, None]
+    vp = valores * np.power(base, -prazos)
+    vp_total = vp.sum(axis=1)
+    ok = valida & (vp_total > 0)
+    denominador = np.where(ok, vp_total, 1.0)
+
+    duration = np.where(ok, (prazos * vp).sum(axis=1) / denominador, 0.0)
+    convexidade = np.where(ok, (prazos * (prazos + 1) * vp).sum(axis=1) / (denominador * base[:, 0] ** 2), 0.0)
+    return {
+        'valor_presente': np.where(ok, vp_total, 0.0),
+        'duration_macaulay': duration,
+        'duration_modificada': duration / (1 + taxas / freq_cupom),
+        'convexidade': convexidade,
+    }
+
 def calcular_spread(taxa_ativo, taxa_benchmark):
     """
     Calcula spread simples em pontos base
@@ -97,7 +198,7 @@ def estimar_preco_mudanca_taxa(preco_atual, duration_mod, convexidade, delta_tax
 def calcular_ytm_aproximado(pu, taxa_cupom, anos_vencimento, valor_face=1000):
     """
     Calcula YTM (Yield to Maturity) aproximado
-    Método simplificado - para cálculo preciso usar solver numérico
+    Método simplificado - para cálculo preciso usar calcular_ytm_vetorizado
     
     Args:
         pu: Preço unitário
@@ -118,6 +219,163 @@ def calcular_ytm_aproximado(pu, taxa_cupom, anos_vencimento, valor_face=1000):
     
     return ytm * 100  # Retorna em percentual
 
+def _resolver_taxa_vetorizado(pus, prazos, valores, taxas_base=None, chute=None, tolerancia=1e-10,
+                              max_iter=50, limites=(-0.99, 10.0)):
+    """
+    Resolve y em sum(valores * (1 + base + y) ^ -prazos) = PU para N títulos
+
+    Newton-Raphson vetorizado com fallback por bissecção. Com taxas_base nulas, y
+    é a YTM; com a curva zero em taxas_base, y é o Z-spread. Retorna 'taxa' em
+    decimal e os diagnósticos descritos em calcular_ytm_vetorizado.
+    """
+    prazos, valores = _padronizar_fluxos(prazos, valores)
+    n = prazos.shape[0]
+    base = np.zeros_like(prazos) if taxas_base is None else np.broadcast_to(np.asarray(taxas_base, dtype=np.float64), prazos.shape)
+    pus = np.broadcast_to(np.asarray(pus, dtype=np.float64), (n,)).copy()
+    lo, hi = limites
+
+    def preco(y, linhas):
+        return (valores[linhas] * np.power(1 + base[linhas] + y[:, None], -prazos[linhas])).sum(axis=1)
+
+    def preco_e_derivada(y, linhas):
+        fator = 1 + base[linhas] + y[:, None]
+        vp = valores[linhas] * np.power(fator, -prazos[linhas])
+        return vp.sum(axis=1), -(prazos[linhas] * vp / fator).sum(axis=1)
+
+    todas = np.arange(n)
+    escala = np.where(np.abs(pus) > 0, np.abs(pus), 1.0)
+    p_lo, p_hi = preco(np.full(n, lo), todas), preco(np.full(n, hi), todas)
+    tem_solucao = np.isfinite(pus) & (pus > 0) & (p_lo >= pus) & (p_hi <= pus)
+
+    if chute is None:
+        soma = valores.sum(axis=1)
+        prazo_medio = np.where(soma > 0, (prazos * valores).sum(axis=1) / np.where(soma > 0, soma, 1), 1.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            y = np.power(soma / pus, 1 / np.maximum(prazo_medio, 1e-6)) - 1
+    else:
+        y = np.broadcast_to(np.asarray(chute, dtype=np.float64), (n,)).copy()
+    y = np.where(np.isfinite(y), np.clip(y, lo, hi), 0.1)
+
+    iteracoes = np.zeros(n, dtype=np.int64)
+    convergiu = np.zeros(n, dtype=bool)
+    ativos = np.flatnonzero(tem_solucao)
+    for _ in range(max_iter):
+        if not len(ativos): break
+        p, dp = preco_e_derivada(y[ativos], ativos)
+        erro = p - pus[ativos]
+        ok = np.abs(erro) <= tolerancia * escala[ativos]
+        convergiu[ativos[ok]] = True
+        passo = np.divide(erro, dp, out=np.full_like(erro, np.nan), where=dp != 0)
+        novo = y[ativos] - passo
+        falhou = ~ok & (~np.isfinite(novo) | (novo <= lo) | (novo >= hi))
+        continua = ~ok & ~falhou
+        y[ativos[continua]] = novo[continua]
+        iteracoes[ativos[continua]] += 1
+        ativos = ativos[continua]
+
+    metodo = np.where(convergiu, 'newton', 'sem_solucao').astype(object)
+    pendentes = np.flatnonzero(tem_solucao & ~convergiu)
+    if len(pendentes):
+        a, b = np.full(len(pendentes), lo), np.full(len(pendentes), hi)
+        ativos = np.arange(len(pendentes))
+        for _ in range(200):
+            if not len(ativos): break
+            meio = (a[ativos] + b[ativos]) / 2
+            erro = preco(meio, pendentes[ativos]) - pus[pendentes[ativos]]
+            acima = erro > 0
+            a[ativos[acima]] = meio[acima]
+            b[ativos[~acima]] = meio[~acima]
+            iteracoes[pendentes[ativos]] += 1
+            y[pendentes[ativos]] = meio
+            ok = np.abs(erro) <= tolerancia * escala[pendentes[ativos]]
+            ativos = ativos[~ok]
+        convergiu[pendentes] = True
+        convergiu[pendentes[ativos]] = False
+        metodo[pendentes] = 'bisseccao'
+
+    y = np.where(tem_solucao, y, np.nan)
+    residuo = np.full(n, np.nan)
+    if tem_solucao.any():
+        residuo[tem_solucao] = preco(y[tem_solucao], todas[tem_solucao]) - pus[tem_solucao]
+    return {
+        'taxa': y,
+        'convergiu': convergiu,
+        'iteracoes': iteracoes,
+        'residuo': residuo,
+        'metodo': metodo,
+    }
+
+def calcular_ytm_vetorizado(pus, prazos, valores, chute=None, tolerancia=1e-10, max_iter=50, limites=(-0.99, 10.0)):
+    """
+    Calcula YTM de N títulos simultaneamente a partir do PU e dos fluxos
+
+    Newton-Raphson vetorizado, com fallback por bissecção (também vetorizada)
+    para os títulos que não convergem ou saem do intervalo. Desconto anual
+    (1 + y) ^ t, mesma convenção de calcular_duration_macaulay.
+
+    Args:
+        pus: PU de cada título, array (N,)
+        prazos: Matriz (N, M) de prazos em anos (ou lista ragged)
+        valores: Matriz (N, M) de valores dos fluxos, na mesma escala do PU
+        chute: YTM inicial (decimal), escalar ou (N,); padrão: estimativa pelos fluxos
+        tolerancia: Tolerância no preço, relativa ao PU
+        max_iter: Máximo de iterações de Newton
+        limites: Intervalo (mínimo, máximo) de YTM aceito, em decimal
+
+    Returns:
+        Dict com arrays (N,):
+            'ytm': YTM em % a.a. (NaN sem solução no intervalo)
+            'convergiu': Se atingiu a tolerância
+            'iteracoes': Iterações usadas (Newton + bissecção)
+            'residuo': Valor presente na YTM encontrada menos o PU
+            'metodo': 'newton', 'bisseccao' ou 'sem_solucao'
+    """
+    r = _resolver_taxa_vetorizado(pus, prazos, valores, None, chute, tolerancia, max_iter, limites)
+    r['ytm'] = r.pop('taxa') * 100
+    return r
+
+def calcular_z_spread_vetorizado(pus, prazos, valores, taxas_zero, chute=0.0, tolerancia=1e-10, max_iter=50,
+                                 limites=(-0.5, 2.0)):
+    """
+    Calcula o Z-spread de N títulos simultaneamente
+
+    Spread constante que, somado à taxa zero da curva em cada fluxo, faz o valor
+    presente igualar o PU: sum(CF * (1 + zero(t) + s) ^ -t) = PU.
+
+    Args:
+        pus: PU de cada título, array (N,), na escala dos fluxos
+        prazos: Matriz (N, M) de prazos em anos
+        valores: Matriz (N, M) de valores dos fluxos
+        taxas_zero: Taxas zero (decimal) em cada fluxo, matriz (N, M)
+        chute: Spread inicial (decimal)
+        tolerancia: Tolerância no preço, relativa ao PU
+        max_iter: Máximo de iterações de Newton
+        limites: Intervalo (mínimo, máximo) de spread aceito, em decimal
+
+    Returns:
+        Dict com 'z_spread_bps' (NaN sem solução), 'convergiu', 'iteracoes',
+        'residuo' e 'metodo', arrays (N,)
+    """
+    r = _resolver_taxa_vetorizado(pus, prazos, valores, taxas_zero, chute, tolerancia, max_iter, limites)
+    r['z_spread_bps'] = r.pop('taxa') * 10000
+    return r
+
+def calcular_ytm(pu, fluxos):
+    """
+    Calcula YTM exato de um título (solver numérico)
+
+    Args:
+        pu: Preço unitário
+        fluxos: Lista de tuplas (periodo_anos, valor_fluxo), na escala do PU
+
+    Returns:
+        YTM em % a.a. (None se não houver solução)
+    """
+    if not fluxos or pu <= 0:
+        return None
+    r = calcular_ytm_vetorizado([pu], *montar_matriz_fluxos([fluxos]))
+    return float(r['ytm'][0]) if r['convergiu'][0] else None
+
 def calcular_retorno_periodo(pu_inicial, pu_final, cupons_recebidos=0):
     """
     Calcula retorno total do período
@@ -140,8 +398,8 @@ def calcular_duration_portfolio(pesos, durations):
     Calcula duration de um portfólio
     
     Args:
-        pesos: Lista com pesos de cada ativo (soma = 1)
-        durations: Lista com duration de cada ativo
+        pesos: Lista ou array com pesos de cada ativo (soma = 1)
+        durations: Lista ou array com duration de cada ativo
     
     Returns:
         Duration do portfólio
@@ -149,7 +407,7 @@ def calcular_duration_portfolio(pesos, durations):
     if len(pesos) != len(durations):
         return 0
     
-    return sum([p * d for p, d in zip(pesos, durations)])
+    return float(np.dot(np.asarray(pesos, dtype=np.float64), np.asarray(durations, dtype=np.float64)))
 
 def calcular_dv01(preco, duration_modified):
     """
@@ -186,6 +444,65 @@ def classificar_risco_credito(rating):
     else:
         return 'Muito Alto'
 
+def reprecificar_cenarios(pus, durations, convexidades, cenarios):
+    """
+    Reprecifica N títulos em S cenários de taxa de uma só vez (Duration + Convexidade)
+
+    Versão em matriz de estimar_preco_mudanca_taxa, por broadcasting (N, 1) x (1, S).
+
+    Args:
+        pus: PU atual de cada título, array (N,)
+        durations: Duration modificada de cada título, array (N,)
+        convexidades: Convexidade de cada título, array (N,)
+        cenarios: Variações de taxa em decimal, array (S,) (ex: 0.01 = +1%)
+
+    Returns:
+        Tupla (pu_estimado, variacao_pct) de matrizes (N, S)
+    """
+    pus = np.atleast_1d(np.asarray(pus, dtype=np.float64))[:, None]
+    durations = np.atleast_1d(np.asarray(durations, dtype=np.float64))[:, None]
+    convexidades = np.atleast_1d(np.asarray(convexidades, dtype=np.float64))[:, None]
+    delta = np.atleast_1d(np.asarray(cenarios, dtype=np.float64))[None, :]
+
+    variacao = -durations * delta + 0.5 * convexidades * delta ** 2
+    return pus * (1 + variacao), variacao * 100
+
+def simular_cenarios_carteira(pus, durations, convexidades, cenarios, codigos=None):
+    """
+    Simula cenários de taxa para vários ativos e devolve um DataFrame "tidy"
+
+    Args:
+        pus: PU atual de cada ativo, array (N,)
+        durations: Duration modificada de cada ativo
+        convexidades: Convexidade de cada ativo
+        cenarios: Variações de taxa em decimal, array (S,)
+        codigos: Identificação dos ativos (padrão: posição)
+
+    Returns:
+        DataFrame com N x S linhas: codigo, cenario_taxa, delta_taxa, pu_atual,
+        pu_estimado, variacao_pct
+    """
+    cenarios = np.atleast_1d(np.asarray(cenarios, dtype=np.float64))
+    pu_est, var_pct = reprecificar_cenarios(pus, durations, convexidades, cenarios)
+    n, s = pu_est.shape
+    if codigos is None:
+        codigos = np.arange(n)
+    # Rótulos repetidos N vezes: categórico evita N x S strings
+    rotulos = [f"{d*100:+.2f}%" for d in cenarios]
+    if len(set(rotulos)) == s:
+        rotulos = pd.Categorical.from_codes(np.tile(np.arange(s), n), rotulos)
+    else:
+        rotulos = np.tile(rotulos, n)
+
+    return pd.DataFrame({
+        'codigo': np.repeat(np.asarray(codigos), s),
+        'cenario_taxa': rotulos,
+        'delta_taxa': np.tile(cenarios, n),
+        'pu_atual': np.repeat(np.atleast_1d(np.asarray(pus, dtype=np.float64)), s),
+        'pu_estimado': pu_est.ravel(),
+        'variacao_pct': var_pct.ravel(),
+    })
+
 def simular_cenarios_taxa(pu_atual, duration, convexidade, cenarios=[-0.02, -0.01, 0, 0.01, 0.02]):
     """
     Simula preços para diferentes cenários de taxa
@@ -199,16 +516,286 @@ def simular_cenarios_taxa(pu_atual, duration, convexidade, cenarios=[-0.02, -0.0
     Returns:
         DataFrame com cenários e preços estimados
     """
-    resultados = []
-    
-    for delta in cenarios:
-        novo_pu = estimar_preco_mudanca_taxa(pu_atual, duration, convexidade, delta)
-        variacao_pct = ((novo_pu - pu_atual) / pu_atual) * 100
-        
-        resultados.append({
-            'cenario_taxa': f"{delta*100:+.1f}%",
-            'pu_estimado': round(novo_pu, 2),
-            'variacao_pct': round(variacao_pct, 2)
-        })
-    
-    return pd.DataFrame(resultados)
+    df = simular_cenarios_carteira([pu_atual], [duration], [convexidade], cenarios)
+    return pd.DataFrame({
+        'cenario_taxa': [f"{delta*100:+.1f}%" for delta in cenarios],
+        'pu_estimado': df['pu_estimado'].round(2).to_numpy(),
+        'variacao_pct': df['variacao_pct'].round(2).to_numpy()
+    })
+
+# Cenários de curva: (nome, tipo, choque em bps)
+CENARIOS_CURVA_PADRAO = [
+    ('Paralelo -100', 'paralelo', -100),
+    ('Paralelo +100', 'paralelo', 100),
+    ('Paralelo +200', 'paralelo', 200),
+    ('Steepener 100', 'inclinacao', 100),
+    ('Flattener 100', 'inclinacao', -100),
+    ('Borboleta +50', 'borboleta', 50),
+]
+
+def deslocamento_curva(dias, tipo, bps, curto=1.0, longo=10.0, base=252):
+    """
+    Deslocamento (bps) aplicado à curva em cada prazo
+
+    - 'paralelo': todos os prazos sobem bps
+    - 'inclinacao': rotação linear entre os anos curto e longo; curta cai bps/2 e
+      longa sobe bps/2 (bps > 0 = steepener, bps < 0 = flattener)
+    - 'borboleta': pontas sobem bps/2 e o miolo cai bps/2
+
+    Args:
+        dias: Prazos em dias úteis (array de qualquer forma)
+        tipo: 'paralelo', 'inclinacao' ou 'borboleta'
+        bps: Intensidade do choque em bps
+        curto, longo: Prazos (anos) que delimitam a rotação
+
+    Returns:
+        Array de deslocamentos em bps com a forma de dias
+    """
+    anos = np.asarray(dias, dtype=np.float64) / base
+    peso = np.clip((anos - curto) / (longo - curto), 0.0, 1.0) - 0.5
+    if tipo == 'paralelo':
+        return np.full(anos.shape, float(bps))
+    if tipo == 'inclinacao':
+        return bps * peso
+    if tipo == 'borboleta':
+        return bps * (2 * np.abs(peso) - 0.5)
+    raise ValueError(f"Tipo de cenário desconhecido: {tipo}")
+
+def reprecificar_curva_cenarios(prazos, valores, curva, cenarios=None, curva_ativo='pre', spreads_bps=0.0, base=252):
+    """
+    Reavaliação completa: redesconta os fluxos de N títulos em S curvas deslocadas
+
+    Cada fluxo é descontado a (1 + zero(t) + spread + deslocamento(t)) ^ (-t),
+    calculado de uma vez no tensor (S, N, M), sem laço por título.
+
+    Args:
+        prazos: Matriz (N, M) de prazos em anos (montar_matriz_fluxos)
+        valores: Matriz (N, M) de fluxos (0 nas posições vazias)
+        curva: YieldCurve da data-base
+        cenarios: Lista de (nome, tipo, bps) (padrão: CENARIOS_CURVA_PADRAO)
+        curva_ativo: 'pre'/'ipca', escalar ou array (N,)
+        spreads_bps: Spread de cada título sobre a curva, escalar ou array (N,)
+
+    Returns:
+        Dicionário com cenarios (nomes), valor_base (N,), valor_cenarios (N, S)
+        e variacao_pct (N, S)
+    """
+    cenarios = CENARIOS_CURVA_PADRAO if cenarios is None else cenarios
+    prazos, valores = _padronizar_fluxos(prazos, valores)
+    dias = prazos * base
+    taxa = _taxas_curva_spread(dias, curva, curva_ativo, spreads_bps)
+
+    choques = np.stack([deslocamento_curva(dias, tipo, bps, base=base) for _, tipo, bps in cenarios]) / 10000
+    valor_base = (valores * np.power(1 + taxa, -prazos)).sum(axis=1)
+    valor_cenarios = _valor_presente_choques(prazos, valores, taxa, choques).T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variacao = np.where(valor_base[:, None] > 0, (valor_cenarios / valor_base[:, None] - 1) * 100, np.nan)
+    return {
+        'cenarios': [nome for nome, _, _ in cenarios],
+        'valor_base': valor_base,
+        'valor_cenarios': valor_cenarios,
+        'variacao_pct': variacao,
+    }
+
+def _taxas_curva_spread(dias, curva, curva_ativo, spreads_bps):
+    """Taxa zero (decimal) de cada fluxo na curva do ativo, somada ao spread"""
+    n = dias.shape[0]
+    curva_ativo = np.broadcast_to(np.asarray(curva_ativo, dtype=object), (n,))
+    zero = np.full(dias.shape, np.nan)
+    for nome in set(curva_ativo):
+        linhas = curva_ativo == nome
+        zero[linhas] = curva.zero_rate(dias[linhas], nome) / 100
+    return zero + np.broadcast_to(np.asarray(spreads_bps, dtype=np.float64), (n,))[:, None] / 10000
+
+def _valor_presente_choques(prazos, valores, taxa, choques):
+    """Valor presente (K, N) dos fluxos (N, M) sob K choques (K, N, M) em decimal"""
+    return (valores[None] * np.power(1 + taxa[None] + choques, -prazos[None])).sum(axis=2)
+
+# Vértices-chave (dias úteis) para key rate duration: 6M, 1A, 2A, 3A, 4A, 5A, 7A e 10A
+VERTICES_CHAVE = (126, 252, 504, 756, 1008, 1260, 1764, 2520)
+
+def pesos_vertices_chave(dias, vertices=VERTICES_CHAVE):
+    """
+    Pesos triangulares de cada vértice-chave em cada prazo
+
+    Cada vértice afeta linearmente os prazos até os vértices vizinhos; antes do
+    primeiro e depois do último o peso é integral. Os pesos somam 1 em qualquer
+    prazo, então a soma das key rate durations é a duration efetiva.
+
+    Args:
+        dias: Prazos em dias úteis (array de qualquer forma)
+        vertices: Vértices-chave em dias úteis, crescentes
+
+    Returns:
+        Array (K, *dias.shape) de pesos
+    """
+    dias = np.asarray(dias, dtype=np.float64)
+    vertices = np.asarray(vertices, dtype=np.float64)
+    identidade = np.eye(len(vertices))
+    return np.stack([np.interp(dias, vertices, identidade[k]) for k in range(len(vertices))])
+
+def calcular_key_rate_durations(prazos, valores, curva, curva_ativo='pre', spreads_bps=0.0,
+                                vertices=VERTICES_CHAVE, choque_bps=1.0, base=252):
+    """
+    Key rate durations de N títulos em todos os vértices-chave de uma vez
+
+    Cada vértice é deslocado +/- choque_bps (pesos triangulares) e os fluxos são
+    redescontados na curva do ativo mais o spread; KRD = -(V+ - V-) / (2 V Δy).
+
+    Args:
+        prazos: Matriz (N, M) de prazos em anos
+        valores: Matriz (N, M) de fluxos
+        curva: YieldCurve da data-base
+        curva_ativo: 'pre'/'ipca', escalar ou array (N,)
+        spreads_bps: Spread de cada título sobre a curva
+        vertices: Vértices-chave em dias úteis
+        choque_bps: Tamanho do choque em cada vértice
+
+    Returns:
+        Matriz (N, K) de key rate durations (NaN onde o valor presente é nulo)
+    """
+    prazos, valores = _padronizar_fluxos(prazos, valores)
+    dias = prazos * base
+    taxa = _taxas_curva_spread(dias, curva, curva_ativo, spreads_bps)
+
+    delta = choque_bps / 10000
+    pesos = pesos_vertices_chave(dias, vertices) * delta
+    valor_base = (valores * np.power(1 + taxa, -prazos)).sum(axis=1)
+    alta = _valor_presente_choques(prazos, valores, taxa, pesos)
+    baixa = _valor_presente_choques(prazos, valores, taxa, -pesos)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        krd = -(alta - baixa) / (2 * delta * valor_base[None, :])
+    return np.where(valor_base[:, None] > 0, krd.T + 0.0, np.nan)
+
+class YieldCurve:
+    """
+    Curva de juros ANBIMA (ETTJ) com operações vetorizadas.
+
+    Os prazos são os vértices da curva em dias úteis (coluna 'dias_corridos' de
+    curvas_anbima) e as taxas estão em % a.a., base 252, capitalização exponencial.
+    A interpolação é linear nas taxas, com extrapolação flat nas pontas (mesma
+    convenção de data_engine.interpolar_taxa_curva).
+
+    Args:
+        dias: Vértices da curva (dias úteis)
+        taxa_pre: Taxas da curva prefixada (% a.a.)
+        taxa_ipca: Taxas reais da curva IPCA (% a.a.)
+        inflacao_implicita: Inflação implícita (% a.a.), se disponível
+        data_referencia: Data da curva
+    """
+    CURVAS = {'pre': 'taxa_pre', 'ipca': 'taxa_ipca', 'inflacao': 'inflacao_implicita'}
+
+    def __init__(self, dias, taxa_pre, taxa_ipca=None, inflacao_implicita=None, data_referencia=None, base=252):
+        self.data_referencia = data_referencia
+        self.base = base
+        dias = np.asarray(dias, dtype=np.float64)
+        self._vertices = {}
+        for nome, taxas in (('pre', taxa_pre), ('ipca', taxa_ipca), ('inflacao', inflacao_implicita)):
+            if taxas is None:
+                continue
+            taxas = np.asarray(taxas, dtype=np.float64)
+            ok = ~np.isnan(dias) & ~np.isnan(taxas)
+            if not ok.any():
+                continue
+            ordem = np.argsort(dias[ok], kind='stable')
+            d = dias[ok][ordem]
+            t = taxas[ok][ordem] / 100
+            d.flags.writeable = False
+            t.flags.writeable = False
+            self._vertices[nome] = (d, t)
+        if 'pre' not in self._vertices and 'ipca' not in self._vertices:
+            raise ValueError("Curva sem taxas válidas")
+
+    @classmethod
+    def from_dataframe(cls, df_curva):
+        """Cria a curva a partir do DataFrame de curvas_anbima (uma data)"""
+        def col(nome):
+            return df_curva[nome].to_numpy(dtype=np.float64) if nome in df_curva.columns else None
+        data_ref = df_curva['data_referencia'].iloc[0] if 'data_referencia' in df_curva.columns and len(df_curva) else None
+        return cls(col('dias_corridos'), col('taxa_pre'), col('taxa_ipca'), col('inflacao_implicita'), data_ref)
+
+    @property
+    def curvas(self):
+        """Curvas disponíveis ('pre', 'ipca', 'inflacao')"""
+        return list(self._vertices)
+
+    def vertices(self, curva='pre'):
+        """Vértices (dias úteis) da curva"""
+        return self._get(curva)[0]
+
+    def _get(self, curva):
+        nome = curva
+        if curva not in self._vertices:
+            nome = next((k for k, v in self.CURVAS.items() if v == curva), curva)
+        if nome not in self._vertices:
+            raise KeyError(f"Curva '{curva}' indisponível")
+        return self._vertices[nome]
+
+    def _taxa(self, dias, curva):
+        d, t = self._get(curva)
+        return np.interp(np.asarray(dias, dtype=np.float64), d, t)
+
+    def zero_rate(self, dias, curva='pre'):
+        """
+        Taxa zero interpolada para cada prazo
+
+        Args:
+            dias: Prazo(s) em dias úteis (escalar ou array de qualquer forma)
+            curva: 'pre' ou 'ipca' (aceita também o nome da coluna, ex: 'taxa_pre')
+
+        Returns:
+            Taxa(s) em % a.a.
+        """
+        return self._taxa(dias, curva) * 100
+
+    def discount_factor(self, dias, curva='pre', spread_bps=0.0):
+        """
+        Fator de desconto (1 + taxa + spread) ^ (-dias/252)
+
+        Args:
+            dias: Prazo(s) em dias úteis
+            curva: 'pre' ou 'ipca'
+            spread_bps: Spread somado à taxa zero (bps), escalar ou array compatível
+
+        Returns:
+            Fator(es) de desconto
+        """
+        dias = np.asarray(dias, dtype=np.float64)
+        taxa = self._taxa(dias, curva) + np.asarray(spread_bps, dtype=np.float64) / 10000
+        return np.power(1 + taxa, -dias / self.base)
+
+    def forward_rate(self, dias_inicio, dias_fim, curva='pre'):
+        """
+        Taxa a termo entre dois prazos
+
+        Args:
+            dias_inicio: Início do período (dias úteis)
+            dias_fim: Fim do período (dias úteis), maior que o início
+
+        Returns:
+            Taxa a termo em % a.a. (NaN onde dias_fim <= dias_inicio)
+        """
+        d0 = np.asarray(dias_inicio, dtype=np.float64)
+        d1 = np.asarray(dias_fim, dtype=np.float64)
+        fd0 = self.discount_factor(d0, curva)
+        fd1 = self.discount_factor(d1, curva)
+        valido = d1 > d0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fwd = (np.power(fd0 / fd1, self.base / np.where(valido, d1 - d0, 1.0)) - 1) * 100
+        return np.where(valido, fwd, np.nan)
+
+    def implied_inflation(self, dias):
+        """
+        Inflação implícita para cada prazo
+
+        Usa a coluna publicada pela ANBIMA quando existe; caso contrário,
+        deriva (1 + pré) / (1 + IPCA) - 1.
+
+        Returns:
+            Inflação implícita em % a.a.
+        """
+        if 'inflacao' in self._vertices:
+            return self._taxa(dias, 'inflacao') * 100
+        return ((1 + self._taxa(dias, 'pre')) / (1 + self._taxa(dias, 'ipca')) - 1) * 100
@@ -0,0 +1,205 @@
+"""
+Métricas - Instrumentação dos Caminhos Quentes
+Mede latência, linhas de entrada/saída e acerto de cache das funções do
+data_engine e das leituras SQL (storage, spreads e cash_flows). As medições
+ficam em um buffer circular em memória (por processo, as TAMANHO_BUFFER mais
+recentes) e, se a variável
+BONDTRACK_METRICAS_DB apontar para um arquivo SQLite, também na tabela
+metricas_desempenho desse arquivo, gravadas em lotes (o restante ao abrir o painel
+Performance da Auditoria e no fim do processo).
+
+Use um banco separado: gravar nos bancos do app muda a versão dos dados e
+invalida os caches do engine. BONDTRACK_METRICAS=0 desliga a instrumentação.
+
+Uso:
+    @metricas.instrumentar()
+    def funcao(df, ...): ...
+
+    with metricas.medir("sql mercado_secundario") as m:
+        df = pd.read_sql(...)
+        m.linhas_saida = len(df)
+"""
+import atexit
+import functools
+import os
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+import pandas as pd
+
+ATIVO = os.environ.get("BONDTRACK_METRICAS", "1") != "0"
+TAMANHO_BUFFER = 5000
+TABELA_METRICAS = "metricas_desempenho"
+LOTE_GRAVACAO = 200
+
+Registro = namedtuple("Registro", ["data_hora", "funcao", "duracao_ms", "linhas_entrada", "linhas_saida", "cache"])
+
+_BUFFER = deque(maxlen=TAMANHO_BUFFER)
+_PENDENTES = []
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+def _linhas(valor):
+    """Linhas de um DataFrame, ou do primeiro DataFrame de uma tupla (ex.: (df, erro)); None se não há"""
+    if isinstance(valor, pd.DataFrame):
+        return len(valor)
+    if isinstance(valor, tuple):
+        for item in valor:
+            if isinstance(item, pd.DataFrame):
+                return len(item)
+    return None
+
+
+def _pilha():
+    if not hasattr(_LOCAL, "pilha"):
+        _LOCAL.pilha = []
+    return _LOCAL.pilha
+
+
+class medir:
+    """
+    Context manager que registra a duração do bloco
+
+    Os atributos linhas_entrada, linhas_saida e cache ("hit"/"miss") podem ser
+    preenchidos dentro do bloco. Um bloco que levanta exceção também é registrado.
+    """
+
+    def __init__(self, funcao, linhas_entrada=None):
+        self.funcao = funcao
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida = None
+        self.cache = None
+
+    def __enter__(self):
+        _pilha().append(self)
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duracao_ms = (time.perf_counter() - self._inicio) * 1000
+        _pilha().pop()
+        if ATIVO:
+            registrar(self.funcao, duracao_ms, self.linhas_entrada, self.linhas_saida, self.cache)
+        return False
+
+
+def instrumentar(nome=None):
+    """
+    Decorador: registra cada chamada com as linhas do primeiro DataFrame recebido
+    e do DataFrame devolvido. Aplicado sobre uma função com cache_por_versao, o
+    acerto de cache vem do próprio cache (marcar_cache).
+    """
+    def decorador(func):
+        funcao = nome or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ATIVO:
+                return func(*args, **kwargs)
+            entrada = next((len(a) for a in args if isinstance(a, pd.DataFrame)), None)
+            with medir(funcao, entrada) as m:
+                resultado = func(*args, **kwargs)
+                m.linhas_saida = _linhas(resultado)
+            return resultado
+        return wrapper
+    return decorador
+
+
+def marcar_cache(funcao, acerto):
+    """Informa à medição em andamento de funcao se a chamada veio do cache"""
+    pilha = _pilha()
+    if pilha and pilha[-1].funcao == funcao:
+        pilha[-1].cache = "hit" if acerto else "miss"
+
+
+def registrar(funcao, duracao_ms, linhas_entrada=None, linhas_saida=None, cache=None):
+    """Acrescenta uma medição ao buffer (e à fila da tabela, se configurada)"""
+    registro = Registro(datetime.now().isoformat(timespec="milliseconds"), funcao, duracao_ms,
+                        linhas_entrada, linhas_saida, cache)
+    with _LOCK:
+        _BUFFER.append(registro)
+        if os.environ.get("BONDTRACK_METRICAS_DB"):
+            _PENDENTES.append(registro)
+            gravar = len(_PENDENTES) >= LOTE_GRAVACAO
+        else:
+            gravar = False
+    if gravar:
+        gravar_pendentes()
+
+
+def gravar_pendentes(db_path=None):
+    """
+    Grava na tabela metricas_desempenho as medições ainda não gravadas
+
+    Returns:
+        Número de medições gravadas (0 sem banco configurado)
+    """
+    db_path = db_path or os.environ.get("BONDTRACK_METRICAS_DB")
+    with _LOCK:
+        if not db_path or not _PENDENTES:
+            return 0
+        lote = list(_PENDENTES)
+        _PENDENTES.clear()
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute(f"""CREATE TABLE IF NOT EXISTS {TABELA_METRICAS} (
+                data_hora TEXT, funcao TEXT, duracao_ms REAL,
+                linhas_entrada INTEGER, linhas_saida INTEGER, cache TEXT)""")
+            conn.executemany(f"INSERT INTO {TABELA_METRICAS} VALUES (?, ?, ?, ?, ?, ?)", lote)
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0
+    return len(lote)
+
+
+# Sem isso, as medições do último lote incompleto (até LOTE_GRAVACAO - 1) se perdem
+atexit.register(gravar_pendentes)
+
+
+def registros():
+    """Medições do buffer como DataFrame (da mais antiga para a mais recente)"""
+    with _LOCK:
+        dados = list(_BUFFER)
+    df = pd.DataFrame(dados, columns=Registro._fields)
+    for coluna in ["duracao_ms", "linhas_entrada", "linhas_saida"]:
+        df[coluna] = pd.to_numeric(df[coluna], errors="coerce")
+    return df
+
+
+def resumo(df=None):
+    """
+    Estatísticas por função: chamadas, p50/p95/máximo (ms), tempo total,
+    linhas (mediana) e taxa de acerto de cache, do maior tempo total para o menor
+
+    Args:
+        df: Medições (padrão: o buffer deste processo)
+    """
+    df = registros() if df is None else df
+    if df.empty:
+        return pd.DataFrame()
+    grupos = df.groupby("funcao")
+    resultado = pd.DataFrame({
+        "chamadas": grupos.size(),
+        "p50_ms": grupos["duracao_ms"].quantile(0.5),
+        "p95_ms": grupos["duracao_ms"].quantile(0.95),
+        "max_ms": grupos["duracao_ms"].max(),
+        "total_ms": grupos["duracao_ms"].sum(),
+        "linhas_entrada": grupos["linhas_entrada"].median(),
+        "linhas_saida": grupos["linhas_saida"].median(),
+        "acerto_cache": df.assign(acerto=df["cache"].map({"hit": 1.0, "miss": 0.0}))
+                          .groupby("funcao")["acerto"].mean() * 100,
+    })
+    return resultado.sort_values("total_ms", ascending=False).reset_index()
+
+
+def limpar():
+    """Esvazia o buffer em memória (medições já gravadas na tabela ficam)"""
+    with _LOCK:
+        _BUFFER.clear()
@@ -0,0 +1,212 @@
+"""
+Parquet Store - Histórico Colunar Particionado por Data
+Cópia das tabelas históricas do SQLite em arquivos Parquet, uma partição por data
+(<raiz>/<tabela>/data=YYYY-MM-DD/part-0.parquet), gravada pelo ETL. A leitura usa
+pyarrow.dataset: só as colunas pedidas são lidas (projeção) e os filtros de data
+e de código descartam partições e row groups antes de ler (predicate pushdown).
+
+Backend opcional: sem pyarrow, disponivel() devolve False e o data_engine
+continua lendo do SQLite. O pyarrow só é importado no primeiro uso, para não
+pesar na abertura de páginas que não leem histórico.
+"""
+import importlib.util
+import json
+import os
+import shutil
+import sqlite3
+
+import pandas as pd
+
+try:
+    from .spreads import data_para_iso
+    from . import metricas
+except ImportError:
+    from spreads import data_para_iso
+    import metricas
+
+# Preenchidos por _carregar_pyarrow()
+pa = ds = pq = None
+
+COLUNA_PARTICAO = "data"
+MANIFESTO = "_manifesto.json"
+DATAS_POR_LEITURA = 250
+
+# tabela -> (arquivo do banco, coluna de data)
+TABELAS = {
+    "mercado_secundario": ("debentures_anbima.db", "data_referencia"),
+    "negociacao_snd": ("debentures_anbima.db", "data_base"),
+    "spreads_historico": ("debentures_anbima.db", "data_referencia"),
+    "curvas_anbima": ("curvas_anbima.db", "data_referencia"),
+}
+
+TIPOS_SQLITE = {"INTEGER": "int64", "REAL": "float64", "NUMERIC": "float64", "FLOAT": "float64"}
+
+
+def pyarrow_instalado():
+    """True se o pyarrow está instalado (sem importá-lo)"""
+    return pq is not None or importlib.util.find_spec("pyarrow") is not None
+
+
+def _carregar_pyarrow():
+    """Importa o pyarrow na primeira chamada; False se não está instalado"""
+    global pa, ds, pq
+    if pq is None:
+        try:
+            import pyarrow
+            import pyarrow.dataset
+            import pyarrow.parquet
+        except ImportError:
+            return False
+        pa, ds, pq = pyarrow, pyarrow.dataset, pyarrow.parquet
+    return True
+
+
+def _esquema(conn, tabela):
+    """Esquema Arrow a partir dos tipos declarados no SQLite (o mesmo em todas as partições)"""
+    campos = []
+    for _, nome, tipo, *_ in conn.execute(f"PRAGMA table_info({tabela})"):
+        tipo_pa = TIPOS_SQLITE.get(str(tipo).upper())
+        campos.append(pa.field(nome, pa.int64() if tipo_pa == "int64" else pa.float64() if tipo_pa else pa.string()))
+    return pa.schema(campos)
+
+
+def _assinaturas(conn, tabela, coluna_data, esquema):
+    """
+    Assinatura de cada data (contagem + somas das colunas numéricas) para detectar mudanças
+
+    Returns:
+        ({data ISO: assinatura}, {data ISO: valores gravados na coluna de data})
+    """
+    numericas = [f.name for f in esquema if pa.types.is_floating(f.type) or pa.types.is_integer(f.type)]
+    agregados = ", ".join(["COUNT(*)"] + [f"TOTAL({c})" for c in numericas])
+    assinaturas, originais = {}, {}
+    for data, *valores in conn.execute(f"SELECT {coluna_data}, {agregados} FROM {tabela} GROUP BY {coluna_data}"):
+        if data is None:
+            continue
+        chave = data_para_iso(data)
+        assinatura = ":".join(f"{v:.6f}" if isinstance(v, float) else str(v) for v in valores)
+        # Mesma data gravada em formatos diferentes (DD/MM/YYYY e ISO) vai para a mesma partição
+        assinaturas[chave] = f"{assinaturas[chave]}|{assinatura}" if chave in assinaturas else assinatura
+        originais.setdefault(chave, []).append(data)
+    return assinaturas, originais
+
+
+def _diretorio(raiz, tabela, data_iso=None):
+    caminho = os.path.join(raiz, tabela)
+    return os.path.join(caminho, f"{COLUNA_PARTICAO}={data_iso}") if data_iso else caminho
+
+
+def _gravar_particao(df, esquema, destino, particao):
+    """Grava uma partição em diretório temporário e troca, para o leitor nunca ver partição pela metade"""
+    if "codigo" in df.columns:
+        df = df.sort_values("codigo", kind="stable")
+    dados = pa.Table.from_pandas(df, schema=esquema, preserve_index=False)
+    temporario = os.path.join(destino, "_tmp_" + os.path.basename(particao))
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+    pq.write_table(dados, os.path.join(temporario, "part-0.parquet"), row_group_size=50_000)
+    shutil.rmtree(particao, ignore_errors=True)
+    os.replace(temporario, particao)
+
+
+def exportar_tabela(db_path, tabela, coluna_data, raiz, forcar=False):
+    """
+    Atualiza a cópia Parquet de uma tabela, partição a partição
+
+    Só são regravadas as datas novas ou cuja assinatura mudou; partições de datas
+    que não existem mais no banco são removidas. Cada partição é ordenada por
+    codigo, para que o filtro por código aproveite as estatísticas dos row groups.
+
+    Args:
+        db_path: Banco SQLite de origem
+        tabela: Nome da tabela
+        coluna_data: Coluna com a data de referência (DD/MM/YYYY ou ISO)
+        raiz: Diretório raiz do store
+        forcar: Regrava todas as partições
+
+    Returns:
+        Número de partições gravadas
+    """
+    if not _carregar_pyarrow():
+        raise ImportError("pyarrow não instalado")
+
+    destino = _diretorio(raiz, tabela)
+    caminho_manifesto = os.path.join(destino, MANIFESTO)
+    manifesto = {}
+    if os.path.exists(caminho_manifesto) and not forcar:
+        with open(caminho_manifesto, encoding="utf-8") as f:
+            manifesto = json.load(f)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        esquema = _esquema(conn, tabela)
+        atuais, originais = _assinaturas(conn, tabela, coluna_data, esquema)
+        pendentes = sorted(d for d, a in atuais.items() if manifesto.get(d) != a)
+        os.makedirs(destino, exist_ok=True)
+
+        for lote in range(0, len(pendentes), DATAS_POR_LEITURA):
+            datas_lote = pendentes[lote:lote + DATAS_POR_LEITURA]
+            # Uma consulta por lote de datas (a tabela não tem índice por data), pelos valores como gravados
+            chaves = [valor for d in datas_lote for valor in originais[d]]
+            df_lote = pd.read_sql(f"SELECT * FROM {tabela} WHERE {coluna_data} IN ({', '.join('?' * len(chaves))})",
+                                  conn, params=chaves)
+            for data_iso, df in df_lote.groupby(df_lote[coluna_data].map(data_para_iso), sort=False):
+                _gravar_particao(df, esquema, destino, _diretorio(raiz, tabela, data_iso))
+                manifesto[data_iso] = atuais[data_iso]
+    finally:
+        conn.close()
+
+    for data_iso in set(manifesto) - set(atuais):
+        shutil.rmtree(_diretorio(raiz, tabela, data_iso), ignore_errors=True)
+        manifesto.pop(data_iso)
+
+    with open(caminho_manifesto, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=0, sort_keys=True)
+    return len(pendentes)
+
+
+def disponivel(raiz, tabela):
+    """True se pyarrow está instalado e a tabela já foi exportada"""
+    if not pyarrow_instalado():
+        return False
+    destino = _diretorio(raiz, tabela)
+    return os.path.isdir(destino) and any(n.startswith(f"{COLUNA_PARTICAO}=") for n in os.listdir(destino))
+
+
+def ler_tabela(raiz, tabela, colunas=None, inicio=None, fim=None, codigos=None):
+    """
+    Lê um intervalo de datas de uma tabela exportada
+
+    Args:
+        raiz: Diretório raiz do store
+        tabela: Nome da tabela
+        colunas: Colunas a ler (padrão: todas)
+        inicio, fim: Limites de data (DD/MM/YYYY ou ISO), inclusivos
+        codigos: Lista de códigos (padrão: todos)
+
+    Returns:
+        DataFrame com a coluna 'data' (ISO) e as colunas pedidas
+    """
+    if not _carregar_pyarrow():
+        raise ImportError("pyarrow não instalado")
+    particionamento = ds.partitioning(pa.schema([(COLUNA_PARTICAO, pa.string())]), flavor="hive")
+    dataset = ds.dataset(_diretorio(raiz, tabela), format="parquet", partitioning=particionamento,
+                         exclude_invalid_files=True, ignore_prefixes=[".", "_"])
+
+    condicoes = []
+    if inicio:
+        condicoes.append(ds.field(COLUNA_PARTICAO) >= data_para_iso(inicio))
+    if fim:
+        condicoes.append(ds.field(COLUNA_PARTICAO) <= data_para_iso(fim))
+    if codigos is not None:
+        condicoes.append(ds.field("codigo").isin([str(c) for c in codigos]))
+    filtro = None
+    for condicao in condicoes:
+        filtro = condicao if filtro is None else filtro & condicao
+
+    if colunas is not None:
+        colunas = [COLUNA_PARTICAO] + [c for c in colunas if c != COLUNA_PARTICAO]
+    with metricas.medir(f"parquet {tabela}") as medicao:
+        df = dataset.to_table(columns=colunas, filter=filtro).to_pandas()
+        medicao.linhas_saida = len(df)
+    return df
@@ -0,0 +1,231 @@
+"""
+Carteiras - Posições (codigo, quantidade) sobre o universo de ativos
+
+A carteira é cruzada com o universo do dia por um índice de códigos; os
+atributos estáticos (duration, convexidade, spread) ficam em arrays alinhados às
+posições e só o preço precisa ser refeito quando o mercado anda.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import financial_math as fm
+    from .cash_flows import para_numero
+except ImportError:
+    import financial_math as fm
+    from cash_flows import para_numero
+
+COLUNAS_CODIGO = ["codigo", "codigo_ativo", "ativo", "ticker", "code"]
+COLUNAS_QUANTIDADE = ["quantidade", "quantity", "qtd", "qtde", "quant"]
+COLUNAS_PU = ["pu", "preco", "preço", "price", "pu_indicativo"]
+
+
+def _achar_coluna(colunas, candidatas):
+    normalizadas = {str(c).strip().lower(): c for c in colunas}
+    return next((normalizadas[c] for c in candidatas if c in normalizadas), None)
+
+
+def _ler_tabela(arquivo):
+    nome = getattr(arquivo, "name", arquivo if isinstance(arquivo, str) else "")
+    if isinstance(arquivo, bytes):
+        arquivo = io.BytesIO(arquivo)
+    if str(nome).lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(arquivo)
+    return pd.read_csv(arquivo, sep=None, engine="python")
+
+
+def _ler_codigo_valor(arquivo, candidatas, nome_valor):
+    df = _ler_tabela(arquivo)
+    col_codigo = _achar_coluna(df.columns, COLUNAS_CODIGO)
+    col_valor = _achar_coluna(df.columns, candidatas)
+    if col_codigo is None or col_valor is None:
+        raise ValueError(f"Arquivo deve ter colunas de código e {nome_valor}")
+    tabela = pd.DataFrame({
+        "codigo": df[col_codigo].astype(str).str.strip().str.upper(),
+        nome_valor: para_numero(df[col_valor]),
+    }).dropna()
+    return tabela[tabela["codigo"] != ""]
+
+
+def ler_carteira(arquivo):
+    """
+    Lê um arquivo de posições (CSV ou Excel) com código e quantidade
+
+    Aceita caminho ou objeto de arquivo (ex: st.file_uploader). Códigos repetidos
+    são somados.
+
+    Args:
+        arquivo: Caminho, bytes ou objeto de arquivo
+
+    Returns:
+        DataFrame com codigo (maiúsculo, sem espaços) e quantidade
+    """
+    carteira = _ler_codigo_valor(arquivo, COLUNAS_QUANTIDADE, "quantidade")
+    return carteira.groupby("codigo", as_index=False, sort=False)["quantidade"].sum()
+
+
+def ler_precos(arquivo):
+    """
+    Lê um arquivo de preços (codigo, pu) para Carteira.atualizar_precos
+
+    Returns:
+        DataFrame com codigo e pu (último valor de cada código)
+    """
+    precos = _ler_codigo_valor(arquivo, COLUNAS_PU, "pu")
+    return precos.drop_duplicates("codigo", keep="last")
+
+
+def _coluna(df, nome, padrao=np.nan):
+    if nome in df.columns:
+        return pd.to_numeric(df[nome], errors="coerce").to_numpy(dtype=np.float64)
+    return np.full(len(df), padrao)
+
+
+class Carteira:
+    """
+    Carteira indexada ao universo de ativos, com métricas vetorizadas
+
+    A junção é feita uma vez (pd.Index.get_indexer); atualizar_precos só
+    reindexa os PUs pelas mesmas posições e refaz as somas.
+
+    Args:
+        posicoes: DataFrame com codigo e quantidade (ler_carteira)
+        universo: DataFrame do dia (load_data, com spreads se houver)
+        risco: DataFrame opcional com codigo, duration_modificada e convexidade
+            (data_engine.calcular_risco_fluxos)
+    """
+
+    def __init__(self, posicoes, universo, risco=None):
+        self.posicoes = posicoes.reset_index(drop=True)
+        universo = universo.drop_duplicates("codigo")
+        self._indice = pd.Index(universo["codigo"])
+        pos = self._indice.get_indexer(self.posicoes["codigo"])
+        self.encontrado = pos >= 0
+        self._pos = pos[self.encontrado]
+
+        self.codigos = self.posicoes["codigo"].to_numpy()[self.encontrado]
+        self.quantidade = self.posicoes["quantidade"].to_numpy(dtype=np.float64)[self.encontrado]
+        self.emissor = universo["emissor"].to_numpy()[self._pos] if "emissor" in universo.columns else None
+
+        # Atributos estáticos (não mudam com o preço)
+        taxa = _coluna(universo, "taxa")[self._pos] / 100
+        self.duration = np.nan_to_num(_coluna(universo, "duration")[self._pos])
+        self.spread_bps = _coluna(universo, "spread_bps")[self._pos]
+        # Sem fluxos: duration modificada pela taxa e convexidade de zero-cupom
+        self.duration_modificada = self.duration / (1 + np.nan_to_num(taxa))
+        self.convexidade = self.duration * (self.duration + 1) / (1 + np.nan_to_num(taxa)) ** 2
+        if risco is not None and not risco.empty:
+            idx_risco = pd.Index(risco["codigo"]).get_indexer(self.codigos)
+            ok = idx_risco >= 0
+            self.duration_modificada[ok] = risco["duration_modificada"].to_numpy(dtype=np.float64)[idx_risco[ok]]
+            self.convexidade[ok] = risco["convexidade"].to_numpy(dtype=np.float64)[idx_risco[ok]]
+
+        # Sem PU fica NaN: a posição sai do valor de mercado e aparece em sem_preco
+        self.pu = _coluna(universo, "pu")[self._pos]
+        self._recalcular()
+
+    @property
+    def nao_encontrados(self):
+        """Códigos da carteira ausentes do universo"""
+        return self.posicoes["codigo"].to_numpy()[~self.encontrado].tolist()
+
+    @property
+    def sem_preco(self):
+        """Códigos encontrados no universo, mas sem PU (fora do valor de mercado e das métricas)"""
+        return self.codigos[np.isnan(self.pu)].tolist()
+
+    def atualizar_precos(self, precos):
+        """
+        Atualiza só os PUs e refaz as métricas (sem nova junção)
+
+        Args:
+            precos: DataFrame com codigo e pu, ou array alinhado ao universo original
+        """
+        if isinstance(precos, pd.DataFrame):
+            novo = pd.Series(pd.to_numeric(precos["pu"], errors="coerce").to_numpy(), index=precos["codigo"])
+            novo = novo[~novo.index.duplicated()].reindex(self._indice).to_numpy(dtype=np.float64)[self._pos]
+            self.pu = np.where(np.isnan(novo), self.pu, novo)
+        else:
+            self.pu = np.asarray(precos, dtype=np.float64)[self._pos]
+        self._recalcular()
+        return self
+
+    def _recalcular(self):
+        self.valor_mercado = self.quantidade * self.pu
+        total = np.nansum(self.valor_mercado)
+        self.peso = np.nan_to_num(self.valor_mercado / total) if total else np.zeros_like(self.valor_mercado)
+        self.dv01 = self.quantidade * fm.calcular_dv01(self.pu, self.duration_modificada)
+
+    def metricas(self):
+        """
+        Totais da carteira
+
+        Returns:
+            Dicionário com valor_mercado, duration, duration_modificada, dv01,
+            convexidade, spread_bps (ponderados por valor de mercado) e contagens
+        """
+        spread_ok = ~np.isnan(self.spread_bps)
+        peso_spread = self.peso[spread_ok].sum()
+        return {
+            "valor_mercado": float(np.nansum(self.valor_mercado)),
+            "duration": float(fm.calcular_duration_portfolio(self.peso, self.duration)),
+            "duration_modificada": float(fm.calcular_duration_portfolio(self.peso, self.duration_modificada)),
+            "dv01": float(np.nansum(self.dv01)),
+            "convexidade": float(fm.calcular_duration_portfolio(self.peso, self.convexidade)),
+            "spread_bps": float((self.peso[spread_ok] * self.spread_bps[spread_ok]).sum() / peso_spread) if peso_spread else np.nan,
+            "posicoes": int(len(self.posicoes)),
+            "nao_encontrados": int((~self.encontrado).sum()),
+            "sem_preco": int(np.isnan(self.pu).sum()),
+        }
+
+    def exposicao_vertices(self, matriz_krd):
+        """
+        DV01 da carteira por vértice da curva (hedge por vértice)
+
+        Args:
+            matriz_krd: DataFrame de key rate durations indexado por codigo, uma
+                coluna por vértice (data_engine.load_matriz_key_rate)
+
+        Returns:
+            DataFrame com vertice (dias úteis), dv01 e a fração do valor de mercado
+            coberta pela matriz
+        """
+        if matriz_krd is None or matriz_krd.empty:
+            return pd.DataFrame(columns=["vertice", "dv01", "cobertura_pct"])
+        linhas = pd.Index(matriz_krd.index).get_indexer(self.codigos)
+        ok = (linhas >= 0) & ~np.isnan(self.pu)
+        krd = matriz_krd.to_numpy(dtype=np.float64)[linhas[ok]]
+        dv01 = fm.calcular_dv01(self.quantidade[ok] * self.pu[ok], 1.0) @ krd
+        total = np.nansum(self.valor_mercado)
+        return pd.DataFrame({
+            "vertice": matriz_krd.columns,
+            "dv01": dv01,
+            "cobertura_pct": self.valor_mercado[ok].sum() / total * 100 if total else 0.0,
+        })
+
+    def contribuicoes(self):
+        """
+        Contribuição de cada posição para as métricas da carteira
+
+        Returns:
+            DataFrame por código com quantidade, pu, valor_mercado, peso (%) e as
+            contribuições de duration, DV01, convexidade e spread
+        """
+        df = pd.DataFrame({
+            "codigo": self.codigos,
+            "quantidade": self.quantidade,
+            "pu": self.pu,
+            "valor_mercado": self.valor_mercado,
+            "peso_pct": self.peso * 100,
+            "duration": self.duration,
+            "contrib_duration": self.peso * self.duration,
+            "dv01": self.dv01,
+            "contrib_convexidade": self.peso * self.convexidade,
+            "spread_bps": self.spread_bps,
+            "contrib_spread_bps": self.peso * self.spread_bps,
+        })
+        if self.emissor is not None:
+            df.insert(1, "emissor", self.emissor)
+        return df
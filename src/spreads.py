@@ -0,0 +1,538 @@
+"""
+Spreads - Persistência dos Spreads por Ativo e Data
+Tabela spreads_historico (uma linha por data_referencia + codigo), gravada pelo
+ETL de spreads e lida pelas páginas sem recálculo. A tabela spreads_controle
+guarda uma assinatura das fontes de cada data (taxas, negócios e curva) para que
+o ETL só recalcule as datas em que algo mudou.
+"""
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import metricas
+except ImportError:
+    import metricas
+
+TABELA_SPREADS = "spreads_historico"
+TABELA_CONTROLE = "spreads_controle"
+COLUNAS_SPREADS = ["data_referencia", "codigo", "tipo_curva", "taxa", "duration", "taxa_benchmark",
+                   "spread_bps", "z_spread_bps", "z_convergiu"]
+TIPOS_COLUNAS = {"tipo_curva": "TEXT", "taxa": "REAL", "duration": "REAL", "taxa_benchmark": "REAL",
+                 "spread_bps": "REAL", "z_spread_bps": "REAL", "z_convergiu": "INTEGER"}
+
+# (banco, tabela, coluna de data, agregados) que definem os spreads de uma data
+FONTES_ASSINATURA = [
+    ("debentures", "mercado_secundario", "data_referencia", "COUNT(*), TOTAL(taxa_indicativa), TOTAL(pu)"),
+    ("debentures", "negociacao_snd", "data_base", "COUNT(*)"),
+    ("curvas", "curvas_anbima", "data_referencia", "COUNT(*), TOTAL(taxa_pre), TOTAL(taxa_ipca)"),
+]
+
+
+def data_para_iso(data_ref):
+    """DD/MM/YYYY ou ISO -> YYYY-MM-DD"""
+    try:
+        return datetime.strptime(data_ref, "%d/%m/%Y").strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        return str(data_ref)[:10]
+
+
+def _criar_tabela(conn):
+    colunas = ",\n            ".join(f"{c} {t}" for c, t in TIPOS_COLUNAS.items())
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_SPREADS} (
+            data_referencia TEXT NOT NULL,
+            codigo TEXT NOT NULL,
+            {colunas},
+            data_atualizacao TEXT,
+            PRIMARY KEY (data_referencia, codigo)
+        )
+    """)
+    # Bancos criados antes das colunas de I-spread
+    existentes = {r[1] for r in conn.execute(f"PRAGMA table_info({TABELA_SPREADS})")}
+    for col, tipo in TIPOS_COLUNAS.items():
+        if col not in existentes:
+            conn.execute(f"ALTER TABLE {TABELA_SPREADS} ADD COLUMN {col} {tipo}")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABELA_SPREADS}_codigo ON {TABELA_SPREADS} (codigo, data_referencia)")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_CONTROLE} (
+            data_referencia TEXT PRIMARY KEY,
+            assinatura TEXT,
+            data_atualizacao TEXT
+        )
+    """)
+
+
+def _existe(conn, tabela):
+    """Leitores não criam tabelas: criar ou alterar o esquema muda a versão dos dados e invalida os caches"""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)).fetchone() is not None
+
+
+def salvar_spreads(db_path, df_spreads, data_ref, assinatura=None):
+    """
+    Grava (substitui) os spreads de uma data
+
+    Args:
+        db_path: Banco SQLite
+        df_spreads: DataFrame com codigo e as colunas de COLUNAS_SPREADS
+        data_ref: Data dos spreads (DD/MM/YYYY ou ISO; gravada em ISO)
+        assinatura: Assinatura das fontes usada (assinaturas_fontes), registrada no controle
+
+    Returns:
+        Número de linhas gravadas
+    """
+    data_iso = data_para_iso(data_ref)
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    df = df_spreads.copy()
+    df["data_referencia"] = data_iso
+    for col in COLUNAS_SPREADS:
+        if col not in df.columns:
+            df[col] = None
+    df = df[COLUNAS_SPREADS].astype(object).where(df[COLUNAS_SPREADS].notna(), None)
+    df["data_atualizacao"] = agora
+
+    colunas = list(df.columns)
+    conn = sqlite3.connect(db_path)
+    try:
+        _criar_tabela(conn)
+        with conn:
+            conn.execute(f"DELETE FROM {TABELA_SPREADS} WHERE data_referencia = ?", (data_iso,))
+            conn.executemany(
+                f"INSERT INTO {TABELA_SPREADS} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                df.itertuples(index=False, name=None))
+            conn.execute(f"INSERT OR REPLACE INTO {TABELA_CONTROLE} VALUES (?, ?, ?)", (data_iso, assinatura, agora))
+    finally:
+        conn.close()
+    return len(df)
+
+
+def assinaturas_fontes(db_debentures, db_curvas):
+    """
+    Assinatura de cada data a partir das tabelas de origem
+
+    Uma consulta agregada por tabela (GROUP BY data); tabelas ausentes são
+    ignoradas. Se as taxas, os negócios ou a curva de uma data mudarem, a
+    assinatura muda.
+
+    Returns:
+        Dicionário {data ISO: assinatura}
+    """
+    partes = {}
+    bancos = {"debentures": db_debentures, "curvas": db_curvas}
+    for banco, tabela, col_data, agregados in FONTES_ASSINATURA:
+        try:
+            conn = sqlite3.connect(bancos[banco])
+            try:
+                linhas = conn.execute(f"SELECT {col_data}, {agregados} FROM {tabela} GROUP BY {col_data}").fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            continue
+        for data, *valores in linhas:
+            chave = data_para_iso(data)
+            partes.setdefault(chave, {})[tabela] = ":".join(f"{v:.6f}" if isinstance(v, float) else str(v) for v in valores)
+    return {d: "|".join(f"{t}={v}" for t, v in sorted(p.items())) for d, p in partes.items()}
+
+
+def assinaturas_gravadas(db_path):
+    """Assinaturas das datas já calculadas {data ISO: assinatura}"""
+    if not os.path.exists(db_path):
+        return {}
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _existe(conn, TABELA_CONTROLE):
+            return {}
+        with metricas.medir(f"sql {TABELA_CONTROLE}") as medicao:
+            gravadas = dict(conn.execute(f"SELECT data_referencia, assinatura FROM {TABELA_CONTROLE}").fetchall())
+            medicao.linhas_saida = len(gravadas)
+        return gravadas
+    finally:
+        conn.close()
+
+
+def carregar_spreads(db_path, data_ref):
+    """
+    Spreads gravados para uma data
+
+    Returns:
+        DataFrame com codigo e as colunas de spread (vazio se não houver)
+    """
+    colunas = [c for c in COLUNAS_SPREADS if c != "data_referencia"]
+    if not os.path.exists(db_path):
+        return pd.DataFrame(columns=colunas)
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _existe(conn, TABELA_SPREADS):
+            return pd.DataFrame(columns=colunas)
+        with metricas.medir(f"sql {TABELA_SPREADS}") as medicao:
+            df = pd.read_sql(f"SELECT {', '.join(colunas)} FROM {TABELA_SPREADS} WHERE data_referencia = ?",
+                             conn, params=(data_para_iso(data_ref),))
+            medicao.linhas_saida = len(df)
+        return df
+    finally:
+        conn.close()
+
+
+def carregar_historico_spreads(db_path, codigos=None, inicio=None, fim=None):
+    """
+    Série histórica de spreads em uma única consulta (usa o índice por codigo)
+
+    Args:
+        db_path: Banco SQLite
+        codigos: Lista de códigos (padrão: todos)
+        inicio, fim: Limites de data (DD/MM/YYYY ou ISO), inclusivos
+
+    Returns:
+        DataFrame com data_referencia (datetime) e as colunas de spread, ordenado
+        por codigo e data
+    """
+    filtros, params = [], []
+    if codigos is not None:
+        codigos = list(codigos)
+        filtros.append(f"codigo IN ({', '.join('?' * len(codigos))})")
+        params += codigos
+    if inicio:
+        filtros.append("data_referencia >= ?")
+        params.append(data_para_iso(inicio))
+    if fim:
+        filtros.append("data_referencia <= ?")
+        params.append(data_para_iso(fim))
+    where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+
+    df = pd.DataFrame(columns=COLUNAS_SPREADS)
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            if _existe(conn, TABELA_SPREADS):
+                with metricas.medir(f"sql {TABELA_SPREADS}") as medicao:
+                    df = pd.read_sql(f"SELECT {', '.join(COLUNAS_SPREADS)} FROM {TABELA_SPREADS} {where} "
+                                     f"ORDER BY codigo, data_referencia", conn, params=params)
+                    medicao.linhas_saida = len(df)
+        finally:
+            conn.close()
+    df["data_referencia"] = pd.to_datetime(df["data_referencia"])
+    return df
+
+
+# --- ESTATÍSTICAS MÓVEIS ---
+
+TABELA_ESTATISTICAS = "spreads_estatisticas"
+METRICAS_ESTATISTICAS = ["spread_bps", "z_spread_bps", "taxa"]
+JANELAS_ESTATISTICAS = [30, 90, 252]
+# Histogramas de largura fixa (sketch de percentis): (início, fim, número de faixas)
+FAIXAS_HISTOGRAMA = {
+    "spread_bps": (-2000.0, 3000.0, 400),
+    "z_spread_bps": (-2000.0, 3000.0, 400),
+    "taxa": (-5.0, 35.0, 400),
+}
+PERCENTIS = [10, 50, 90]
+
+
+# Colunas lidas pelo app (no banco versionado) e o estado incremental (arquivo local, fora do git)
+TIPOS_ESTATISTICAS = {
+    "codigo": "TEXT NOT NULL", "metrica": "TEXT NOT NULL", "janela": "INTEGER NOT NULL",
+    "data_referencia": "TEXT", "valor_atual": "REAL", "n": "INTEGER", "media": "REAL", "desvio": "REAL",
+    "minimo": "REAL", "maximo": "REAL", "p10": "REAL", "p50": "REAL", "p90": "REAL", "zscore": "REAL",
+    "percentil_atual": "REAL", "data_atualizacao": "TEXT",
+}
+TIPOS_ESTADO = {"soma": "REAL", "soma_quadrados": "REAL", "histograma": "BLOB"}
+
+
+def caminho_estado_estatisticas(db_path):
+    """
+    Banco local com o estado incremental das estatísticas (somas e histogramas)
+
+    Fica em <pasta do banco>/estado/, fora dos bancos versionados (no GitHub
+    Actions, mantido entre execuções pelo actions/cache): sem ele, o próximo
+    atualizar_estatisticas refaz tudo desde a primeira data.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "estado", "spreads_estatisticas.db")
+
+
+def _criar_tabela_estatisticas(conn, estado=False):
+    tipos = {**TIPOS_ESTATISTICAS, **(TIPOS_ESTADO if estado else {})}
+    if not estado and "histograma" in {r[1] for r in conn.execute(f"PRAGMA table_info({TABELA_ESTATISTICAS})")}:
+        # Layout antigo, com os histogramas no banco versionado: recriada só com as estatísticas
+        conn.execute(f"DROP TABLE {TABELA_ESTATISTICAS}")
+        conn.commit()
+        conn.execute("VACUUM")
+    colunas = ",\n            ".join(f"{c} {t}" for c, t in tipos.items())
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_ESTATISTICAS} (
+            {colunas},
+            PRIMARY KEY (codigo, metrica, janela)
+        )
+    """)
+    if not estado:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABELA_ESTATISTICAS}_metrica ON {TABELA_ESTATISTICAS} (metrica, janela)")
+
+
+def _ler_estado(estado_path):
+    """Estado gravado pela última atualização (vazio se o arquivo ou a tabela não existem)"""
+    vazio = pd.DataFrame(columns=[*TIPOS_ESTATISTICAS, *TIPOS_ESTADO])
+    if not os.path.exists(estado_path):
+        return vazio
+    conn = sqlite3.connect(estado_path)
+    try:
+        if not _existe(conn, TABELA_ESTATISTICAS):
+            return vazio
+        return pd.read_sql(f"SELECT * FROM {TABELA_ESTATISTICAS}", conn)
+    finally:
+        conn.close()
+
+
+def _gravar(conn, df):
+    colunas = list(df.columns)
+    with conn:
+        conn.execute(f"DELETE FROM {TABELA_ESTATISTICAS}")
+        conn.executemany(
+            f"INSERT INTO {TABELA_ESTATISTICAS} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+            df.itertuples(index=False, name=None))
+
+
+def _faixa(metrica, valores):
+    """Índice da faixa do histograma de cada valor (valores fora ficam nas pontas)"""
+    ini, fim, n = FAIXAS_HISTOGRAMA[metrica]
+    return np.clip(((valores - ini) / (fim - ini) * n).astype(np.int64), 0, n - 1)
+
+
+class _EstadoJanela:
+    """Somas, extremos e histograma de uma (métrica, janela) para todos os ativos"""
+
+    def __init__(self, metrica, janela, n_faixas):
+        self.metrica, self.janela = metrica, janela
+        self.codigos = []
+        self.linha = {}
+        self.n = np.zeros(0)
+        self.soma = np.zeros(0)
+        self.soma2 = np.zeros(0)
+        self.minimo = np.zeros(0)
+        self.maximo = np.zeros(0)
+        self.hist = np.zeros((0, n_faixas), dtype=np.int32)
+        self.atual = np.zeros(0)
+
+    def linhas(self, codigos):
+        """Posição de cada código, criando linhas para códigos novos"""
+        novos = [c for c in dict.fromkeys(codigos) if c not in self.linha]
+        if novos:
+            k = len(novos)
+            for c in novos:
+                self.linha[c] = len(self.codigos)
+                self.codigos.append(c)
+            self.n = np.concatenate([self.n, np.zeros(k)])
+            self.soma = np.concatenate([self.soma, np.zeros(k)])
+            self.soma2 = np.concatenate([self.soma2, np.zeros(k)])
+            self.minimo = np.concatenate([self.minimo, np.full(k, np.nan)])
+            self.maximo = np.concatenate([self.maximo, np.full(k, np.nan)])
+            self.hist = np.vstack([self.hist, np.zeros((k, self.hist.shape[1]), dtype=np.int32)])
+            self.atual = np.concatenate([self.atual, np.full(k, np.nan)])
+        return np.array([self.linha[c] for c in codigos], dtype=np.int64)
+
+    def entrar(self, pos, valores):
+        self.n[pos] += 1
+        self.soma[pos] += valores
+        self.soma2[pos] += valores ** 2
+        self.minimo[pos] = np.fmin(self.minimo[pos], valores)
+        self.maximo[pos] = np.fmax(self.maximo[pos], valores)
+        np.add.at(self.hist, (pos, _faixa(self.metrica, valores)), 1)
+
+    def sair(self, pos, valores):
+        """Remove valores que saíram da janela; devolve as linhas cujo mínimo/máximo se perdeu"""
+        self.n[pos] -= 1
+        self.soma[pos] -= valores
+        self.soma2[pos] -= valores ** 2
+        np.add.at(self.hist, (pos, _faixa(self.metrica, valores)), -1)
+        vazias = pos[self.n[pos] <= 0]
+        self.n[vazias] = self.soma[vazias] = self.soma2[vazias] = 0
+        self.minimo[vazias] = self.maximo[vazias] = np.nan
+        perdeu = (self.n[pos] > 0) & ((valores <= self.minimo[pos]) | (valores >= self.maximo[pos]))
+        return pos[perdeu]
+
+    def resumo(self):
+        """DataFrame com as estatísticas derivadas de cada ativo"""
+        n = self.n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            media = np.where(n > 0, self.soma / n, np.nan)
+            var = np.where(n > 1, (self.soma2 - n * media ** 2) / (n - 1), np.nan)
+            desvio = np.sqrt(np.clip(var, 0, None))
+            zscore = np.where(desvio > 0, (self.atual - media) / desvio, np.nan)
+
+        ini, fim, n_faixas = FAIXAS_HISTOGRAMA[self.metrica]
+        largura = (fim - ini) / n_faixas
+        acumulado = np.cumsum(self.hist, axis=1)
+        df = pd.DataFrame({
+            "codigo": self.codigos, "metrica": self.metrica, "janela": self.janela,
+            "valor_atual": self.atual, "n": n.astype(np.int64), "media": media, "desvio": desvio,
+            "minimo": self.minimo, "maximo": self.maximo, "zscore": zscore,
+        })
+        linhas = np.arange(len(n))
+        for p in PERCENTIS:
+            # Interpolação linear dentro da primeira faixa em que o acumulado atinge p%
+            alvo = (p / 100) * np.maximum(n, 1)
+            faixa = (acumulado >= alvo[:, None]).argmax(axis=1)
+            antes = acumulado[linhas, faixa] - self.hist[linhas, faixa]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fracao = np.clip((alvo - antes) / self.hist[linhas, faixa], 0, 1)
+            valor = np.clip(ini + (faixa + np.nan_to_num(fracao, nan=0.5)) * largura, self.minimo, self.maximo)
+            df[f"p{p}"] = np.where(n > 0, valor, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            faixa_atual = _faixa(self.metrica, np.nan_to_num(self.atual))
+            abaixo = acumulado[linhas, faixa_atual] - self.hist[linhas, faixa_atual] / 2
+            df["percentil_atual"] = np.where((n > 0) & ~np.isnan(self.atual), abaixo / n * 100, np.nan)
+        df["soma"], df["soma_quadrados"] = self.soma, self.soma2
+        df["histograma"] = [h.astype(np.int16).tobytes() for h in self.hist]
+        return df
+
+    @classmethod
+    def de_tabela(cls, metrica, janela, df):
+        """Reconstrói o estado a partir das linhas gravadas"""
+        estado = cls(metrica, janela, FAIXAS_HISTOGRAMA[metrica][2])
+        if df.empty:
+            return estado
+        estado.codigos = df["codigo"].tolist()
+        estado.linha = {c: i for i, c in enumerate(estado.codigos)}
+        estado.n = np.array(df["n"], dtype=np.float64)
+        estado.soma = np.array(df["soma"], dtype=np.float64)
+        estado.soma2 = np.array(df["soma_quadrados"], dtype=np.float64)
+        estado.minimo = np.array(df["minimo"], dtype=np.float64)
+        estado.maximo = np.array(df["maximo"], dtype=np.float64)
+        estado.atual = np.array(df["valor_atual"], dtype=np.float64)
+        estado.hist = np.vstack([np.frombuffer(h, dtype=np.int16) for h in df["histograma"]]).astype(np.int32)
+        return estado
+
+
+def atualizar_estatisticas(db_path, forcar=False, estado_path=None):
+    """
+    Atualiza as estatísticas móveis (30/90/252 datas) de spread, Z-spread e taxa
+
+    Cada data nova entra nas somas, extremos e histogramas de cada janela e a
+    data que sai da janela é subtraída; só são lidas as datas novas e as que
+    ainda estão dentro da maior janela. Mínimo/máximo perdidos na saída são
+    recalculados apenas para os ativos afetados. Se alguma data já processada
+    foi recalculada pelo ETL de spreads, o estado é refeito desde o início.
+
+    O banco recebe só as estatísticas; somas e histogramas (o estado que permite
+    a atualização incremental) ficam em estado_path, fora dos bancos versionados.
+    Sem esse arquivo (ex.: cache do CI expirado), ou com um estado de outra
+    versão das estatísticas gravadas, tudo é refeito desde o início.
+
+    Args:
+        db_path: Banco SQLite com spreads_historico
+        forcar: Refaz tudo desde a primeira data
+        estado_path: Banco do estado (padrão: caminho_estado_estatisticas(db_path))
+
+    Returns:
+        Número de datas processadas
+    """
+    estado_path = estado_path or caminho_estado_estatisticas(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        _criar_tabela(conn)
+        _criar_tabela_estatisticas(conn)
+        datas = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT data_referencia FROM {TABELA_SPREADS} ORDER BY data_referencia")]
+        gravado = _ler_estado(estado_path)
+
+        ultima = gravado["data_referencia"].max() if not gravado.empty else None
+        if ultima is not None and not forcar:
+            alteradas = conn.execute(
+                f"SELECT COUNT(*) FROM {TABELA_CONTROLE} WHERE data_referencia <= ? AND data_atualizacao > ?",
+                (ultima, gravado["data_atualizacao"].min())).fetchone()[0]
+            # Estado de outra versão das estatísticas gravadas (ex.: banco atualizado por outra máquina)
+            no_banco = conn.execute(f"SELECT MAX(data_referencia) FROM {TABELA_ESTATISTICAS}").fetchone()[0]
+            forcar = alteradas > 0 or ultima not in datas or no_banco != ultima
+        if forcar:
+            gravado, ultima = gravado.iloc[0:0], None
+
+        novas = [i for i, d in enumerate(datas) if ultima is None or d > ultima]
+        if not novas and not forcar:
+            return 0
+
+        # Uma leitura com as datas novas e as que ainda podem sair das janelas
+        inicio = max(0, novas[0] - max(JANELAS_ESTATISTICAS)) if novas else len(datas)
+        historico = pd.read_sql(
+            f"SELECT data_referencia, codigo, {', '.join(METRICAS_ESTATISTICAS)} FROM {TABELA_SPREADS} "
+            f"WHERE data_referencia >= ?", conn, params=(datas[inicio] if novas else "9999",))
+        codigos = np.array(sorted(historico["codigo"].unique()), dtype=object)
+        matrizes = {
+            m: np.array(historico.pivot(index="data_referencia", columns="codigo", values=m)
+                        .reindex(index=datas[inicio:], columns=codigos), dtype=np.float64)
+            for m in METRICAS_ESTATISTICAS
+        }
+
+        estados = []
+        for m in METRICAS_ESTATISTICAS:
+            for j in JANELAS_ESTATISTICAS:
+                parte = gravado[(gravado["metrica"] == m) & (gravado["janela"] == j)]
+                estado = _EstadoJanela.de_tabela(m, j, parte)
+                pos = estado.linhas(codigos)
+                coluna = np.full(len(estado.codigos), -1, dtype=np.int64)
+                coluna[pos] = np.arange(len(pos))
+                estados.append((estado, matrizes[m], pos, coluna))
+
+        for i in novas:
+            k = i - inicio
+            for estado, matriz, pos, coluna in estados:
+                j = estado.janela
+                if k - j >= 0:
+                    sai = ~np.isnan(matriz[k - j])
+                    perdidos = estado.sair(pos[sai], matriz[k - j][sai])
+                    if len(perdidos):
+                        # Extremos recalculados nas datas que continuam na janela
+                        restante = matriz[k - j + 1:k, coluna[perdidos]]
+                        minimo = np.nanmin(restante, axis=0, initial=np.inf)
+                        maximo = np.nanmax(restante, axis=0, initial=-np.inf)
+                        estado.minimo[perdidos] = np.where(np.isinf(minimo), np.nan, minimo)
+                        estado.maximo[perdidos] = np.where(np.isinf(maximo), np.nan, maximo)
+                entra = ~np.isnan(matriz[k])
+                estado.entrar(pos[entra], matriz[k][entra])
+                estado.atual[:] = np.nan
+                estado.atual[pos] = matriz[k]
+
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        df = pd.concat([e.resumo() for e, _, _, _ in estados], ignore_index=True)
+        df = df[df["n"] > 0]
+        df["data_referencia"] = datas[-1] if datas else None
+        df["data_atualizacao"] = agora
+        df = df.astype(object).where(df.notna(), None)
+        _gravar(conn, df[list(TIPOS_ESTATISTICAS)])
+    finally:
+        conn.close()
+
+    # Estado depois das estatísticas: se esta gravação falhar, a próxima execução reprocessa as datas
+    os.makedirs(os.path.dirname(estado_path), exist_ok=True)
+    conn = sqlite3.connect(estado_path)
+    try:
+        _criar_tabela_estatisticas(conn, estado=True)
+        _gravar(conn, df[[*TIPOS_ESTATISTICAS, *TIPOS_ESTADO]])
+    finally:
+        conn.close()
+    return len(novas)
+
+
+def carregar_estatisticas(db_path, metrica="spread_bps", janela=90):
+    """
+    Estatísticas móveis gravadas de uma métrica/janela
+
+    Returns:
+        DataFrame com codigo, valor_atual, n, media, desvio, minimo, maximo,
+        p10, p50, p90, zscore e percentil_atual
+    """
+    colunas = ["codigo", "valor_atual", "n", "media", "desvio", "minimo", "maximo", "p10", "p50", "p90",
+               "zscore", "percentil_atual"]
+    if not os.path.exists(db_path):
+        return pd.DataFrame(columns=colunas)
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _existe(conn, TABELA_ESTATISTICAS):
+            return pd.DataFrame(columns=colunas)
+        with metricas.medir(f"sql {TABELA_ESTATISTICAS}") as medicao:
+            df = pd.read_sql(f"SELECT {', '.join(colunas)} FROM {TABELA_ESTATISTICAS} WHERE metrica = ? AND janela = ?",
+                             conn, params=(metrica, int(janela)))
+            medicao.linhas_saida = len(df)
+        return df
+    finally:
+        conn.close()
@@ -0,0 +1,462 @@
+"""
+Storage - Interface de Acesso aos Dados
+Operações de leitura usadas pelo data_engine (datas, snapshot de uma data,
+intervalos de histórico, curvas e agregados de volume) atrás de uma interface
+única. Implementações:
+
+- SQLiteStorage: bancos debentures_anbima.db / curvas_anbima.db (e o store
+  Parquet, quando disponível, para intervalos longos)
+- MemoriaStorage: DataFrames em memória, para testes e benchmarks
+
+As datas são trocadas em ISO (YYYY-MM-DD); as tabelas guardam DD/MM/YYYY ou ISO.
+"""
+import itertools
+import os
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    from .spreads import data_para_iso
+    from . import parquet_store
+    from . import metricas
+except ImportError:
+    from spreads import data_para_iso
+    import parquet_store
+    import metricas
+
+TABELA_CADASTRO = "cadastro_snd"
+TABELA_MERCADO = "mercado_secundario"
+TABELA_NEGOCIOS = "negociacao_snd"
+TABELA_CURVAS = "curvas_anbima"
+
+# Coluna de data de cada tabela histórica
+COLUNAS_DATA = {
+    TABELA_MERCADO: "data_referencia",
+    TABELA_NEGOCIOS: "data_base",
+    TABELA_CURVAS: "data_referencia",
+    "spreads_historico": "data_referencia",
+}
+
+COLUNAS_VOLUME = ["data_base", "volume_total", "total_negocios", "qtd_ativos", "quantidade"]
+
+# Séries de até tantos ativos ficam no SQLite quando a tabela tem índice por codigo: a busca
+# pelo índice é mais rápida que abrir uma partição Parquet por data (a virada fica entre 100 e
+# 200 ativos no benchmarks/bench_historico.py). Sem índice, o Parquet não perde em nenhum caso.
+LIMITE_CODIGOS_SQLITE = 100
+TABELAS_INDICE_CODIGO = {TABELA_NEGOCIOS, "spreads_historico"}
+
+
+def data_para_br(data):
+    """ISO ou DD/MM/YYYY -> DD/MM/YYYY"""
+    try:
+        return datetime.strptime(data_para_iso(data), "%Y-%m-%d").strftime("%d/%m/%Y")
+    except (TypeError, ValueError):
+        return str(data)
+
+
+def _sql_data_iso(coluna):
+    """Expressão SQL que normaliza uma coluna DD/MM/YYYY ou ISO para ISO"""
+    return (f"CASE WHEN {coluna} LIKE '__/__/____' THEN substr({coluna}, 7, 4) || '-' || "
+            f"substr({coluna}, 4, 2) || '-' || substr({coluna}, 1, 2) ELSE {coluna} END")
+
+
+class Storage(ABC):
+    """
+    Interface de leitura dos dados; as páginas só falam com o data_engine, que fala com ela
+
+    Um backend que não implementa todos os métodos abstratos falha ao ser criado.
+    """
+
+    @abstractmethod
+    def versao(self):
+        """Identificador hashable que muda sempre que os dados mudam (chave dos caches do engine)"""
+
+    @abstractmethod
+    def get_datas(self):
+        """Datas com taxas ANBIMA ou negócios SND (ISO, da mais recente para a mais antiga)"""
+
+    @abstractmethod
+    def load_snapshot(self, data):
+        """Dados de uma data: (negociacao_snd, mercado_secundario, cadastro_snd) como DataFrames"""
+
+    @abstractmethod
+    def load_range(self, tabela, inicio=None, fim=None, codigos=None, colunas=None):
+        """
+        Linhas de uma tabela histórica em um intervalo de datas (inclusivo)
+
+        Returns:
+            DataFrame com a coluna 'data' (ISO) e as colunas pedidas (padrão: todas)
+        """
+
+    @abstractmethod
+    def get_datas_curva(self):
+        """Datas com curva ANBIMA (como gravadas, da mais recente para a mais antiga)"""
+
+    def ultima_data_curva(self):
+        """Data da curva mais recente (como gravada) ou None"""
+        datas = self.get_datas_curva()
+        return datas[0] if datas else None
+
+    @abstractmethod
+    def load_curva(self, data=None):
+        """Vértices da curva ANBIMA de uma data (padrão: a mais recente)"""
+
+    @abstractmethod
+    def volume_agregado(self, inicio=None, fim=None):
+        """Volume por data: data_base (ISO), volume_total, total_negocios, qtd_ativos, quantidade"""
+
+    @abstractmethod
+    def volume_por_ativo(self, data=None, limit=None):
+        """Negócios SND por ativo em uma data (padrão: a mais recente), por volume decrescente"""
+
+    @abstractmethod
+    def contar(self, tabela, data=None):
+        """Número de linhas da tabela (na data, se informada); None se a tabela não existe"""
+
+    @abstractmethod
+    def colunas(self, tabela):
+        """Colunas da tabela ([] se ela não existe)"""
+
+    @abstractmethod
+    def load_pagina(self, tabela, data=None, ordenar_por=None, ascendente=True, offset=0, limite=50):
+        """
+        Uma página de linhas da tabela (na data, se informada), ordenada no backend
+
+        Só as linhas da página são lidas; nulos ficam no fim em qualquer sentido.
+        Uma coluna de ordenação que não existe na tabela é ignorada.
+        """
+
+
+class SQLiteStorage(Storage):
+    """Bancos SQLite gravados pelos ETLs; intervalos longos vêm do Parquet quando há parquet_dir"""
+
+    def __init__(self, db_debentures, db_curvas, parquet_dir=None):
+        self.db_debentures = db_debentures
+        self.db_curvas = db_curvas
+        self.parquet_dir = parquet_dir
+
+    def _banco(self, tabela):
+        return self.db_curvas if tabela == TABELA_CURVAS else self.db_debentures
+
+    def versao(self):
+        """
+        (mtime, tamanho) dos bancos, dos arquivos WAL e dos manifestos Parquet
+
+        Toda carga dos ETLs grava nesses arquivos; um os.stat por arquivo é
+        barato o bastante para ser feito a cada leitura.
+        """
+        arquivos = [self.db_debentures, self.db_debentures + "-wal", self.db_curvas, self.db_curvas + "-wal"]
+        if self.parquet_dir:
+            arquivos += [os.path.join(self.parquet_dir, t, parquet_store.MANIFESTO) for t in parquet_store.TABELAS]
+        versao = []
+        for arquivo in arquivos:
+            try:
+                info = os.stat(arquivo)
+                versao.append((info.st_mtime_ns, info.st_size))
+            except OSError:
+                versao.append(None)
+        return tuple(versao)
+
+    def _ler(self, db_path, sql, params=()):
+        """read_sql em uma conexão de curta duração; DataFrame vazio se o banco não existe"""
+        if not os.path.exists(db_path):
+            return pd.DataFrame()
+        tabela = re.search(r"FROM\s+(\w+)", sql, re.IGNORECASE)
+        with metricas.medir(f"sql {tabela.group(1) if tabela else '?'}") as medicao:
+            conn = sqlite3.connect(db_path)
+            try:
+                df = pd.read_sql(sql, conn, params=params)
+            finally:
+                conn.close()
+            medicao.linhas_saida = len(df)
+        return df
+
+    def get_datas(self):
+        datas = set()
+        for tabela in (TABELA_NEGOCIOS, TABELA_MERCADO):
+            coluna = COLUNAS_DATA[tabela]
+            try:
+                df = self._ler(self.db_debentures, f"SELECT DISTINCT {coluna} FROM {tabela}")
+                datas.update(df[coluna].dropna().tolist() if not df.empty else [])
+            except Exception:
+                pass
+        iso = set()
+        for d in datas:
+            for formato in ("%Y-%m-%d", "%d/%m/%Y"):
+                try:
+                    iso.add(datetime.strptime(d, formato).strftime("%Y-%m-%d"))
+                    break
+                except (TypeError, ValueError):
+                    pass
+        return sorted(iso, reverse=True)
+
+    def load_snapshot(self, data):
+        if not os.path.exists(self.db_debentures):
+            raise FileNotFoundError("Banco de dados não encontrado.")
+        data_iso, data_br = data_para_iso(data), data_para_br(data)
+        df_snd = df_anbima = df_cadastro = pd.DataFrame()
+        try:
+            df_snd = self._ler(self.db_debentures, f"SELECT * FROM {TABELA_NEGOCIOS} WHERE data_base = ?", (data_iso,))
+        except Exception:
+            pass
+        try:
+            df_anbima = self._ler(self.db_debentures, f"SELECT * FROM {TABELA_MERCADO} WHERE data_referencia IN (?, ?)",
+                                  (data_br, data_iso))
+        except Exception:
+            pass
+        try:
+            df_cadastro = self._ler(self.db_debentures, f"SELECT * FROM {TABELA_CADASTRO}")
+        except Exception:
+            pass
+        return df_snd, df_anbima, df_cadastro
+
+    def load_range(self, tabela, inicio=None, fim=None, codigos=None, colunas=None):
+        poucos = (codigos is not None and len(codigos) <= LIMITE_CODIGOS_SQLITE
+                  and tabela in TABELAS_INDICE_CODIGO)
+        if self.parquet_dir and not poucos and parquet_store.disponivel(self.parquet_dir, tabela):
+            try:
+                return parquet_store.ler_tabela(self.parquet_dir, tabela, colunas, inicio, fim, codigos)
+            except Exception:
+                pass
+
+        data_iso = _sql_data_iso(COLUNAS_DATA[tabela])
+        filtros, params = [], []
+        if codigos is not None:
+            codigos = list(codigos)
+            filtros.append(f"codigo IN ({', '.join('?' * len(codigos))})")
+            params += codigos
+        if inicio:
+            filtros.append(f"{data_iso} >= ?")
+            params.append(data_para_iso(inicio))
+        if fim:
+            filtros.append(f"{data_iso} <= ?")
+            params.append(data_para_iso(fim))
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        selecao = ", ".join(colunas) if colunas is not None else "*"
+        return self._ler(self._banco(tabela), f"SELECT {data_iso} AS data, {selecao} FROM {tabela} {where}", params)
+
+    def get_datas_curva(self):
+        try:
+            df = self._ler(self.db_curvas, f"SELECT DISTINCT data_referencia FROM {TABELA_CURVAS}")
+        except Exception:
+            return []
+        if df.empty:
+            return []
+        return sorted(df["data_referencia"].dropna().tolist(), key=data_para_iso, reverse=True)
+
+    def ultima_data_curva(self):
+        """
+        Resolve a data da curva mais recente sem ler a tabela inteira.
+        Usa a chave 'ultima_atualizacao' gravada pelo ETL; se ausente ou sem linhas,
+        varre apenas as datas distintas (índice idx_curvas_data).
+        Obs: MAX(data_referencia) não serve, pois as datas estão em DD/MM/YYYY.
+        """
+        if not os.path.exists(self.db_curvas):
+            return None
+        conn = sqlite3.connect(self.db_curvas)
+        try:
+            row = conn.execute("SELECT valor FROM metadata WHERE chave = 'ultima_atualizacao'").fetchone()
+            if row and row[0]:
+                existe = conn.execute(f"SELECT 1 FROM {TABELA_CURVAS} WHERE data_referencia = ? LIMIT 1", (row[0],)).fetchone()
+                if existe:
+                    return row[0]
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+        return super().ultima_data_curva()
+
+    def load_curva(self, data=None):
+        if not data:
+            data = self.ultima_data_curva()
+            if not data:
+                return pd.DataFrame()
+        try:
+            return self._ler(self.db_curvas, f"SELECT * FROM {TABELA_CURVAS} WHERE data_referencia IN (?, ?)",
+                             (data_para_br(data), data_para_iso(data)))
+        except Exception:
+            return pd.DataFrame()
+
+    def volume_agregado(self, inicio=None, fim=None):
+        filtros, params = [], []
+        if inicio:
+            filtros.append("data_base >= ?")
+            params.append(data_para_iso(inicio))
+        if fim:
+            filtros.append("data_base <= ?")
+            params.append(data_para_iso(fim))
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        try:
+            return self._ler(self.db_debentures, f"""
+                SELECT data_base, TOTAL(volume_total) AS volume_total, TOTAL(numero_negocios) AS total_negocios,
+                       COUNT(DISTINCT codigo) AS qtd_ativos, TOTAL(quantidade) AS quantidade
+                FROM {TABELA_NEGOCIOS} {where} GROUP BY data_base ORDER BY data_base
+            """, params)
+        except Exception:
+            return pd.DataFrame(columns=COLUNAS_VOLUME)
+
+    def volume_por_ativo(self, data=None, limit=None):
+        try:
+            if data:
+                filtro, params = "data_base = ?", [data_para_iso(data)]
+            else:
+                filtro, params = f"data_base = (SELECT MAX(data_base) FROM {TABELA_NEGOCIOS})", []
+            limite = f" LIMIT {int(limit)}" if limit else ""
+            return self._ler(self.db_debentures, f"SELECT * FROM {TABELA_NEGOCIOS} WHERE {filtro} "
+                                                 f"ORDER BY volume_total DESC{limite}", params)
+        except Exception:
+            return pd.DataFrame()
+
+    def contar(self, tabela, data=None):
+        db_path = self._banco(tabela)
+        if not os.path.exists(db_path):
+            return None
+        conn = sqlite3.connect(db_path)
+        try:
+            if data and tabela in COLUNAS_DATA:
+                return int(conn.execute(f"SELECT count(*) FROM {tabela} WHERE {COLUNAS_DATA[tabela]} IN (?, ?)",
+                                        (data_para_br(data), data_para_iso(data))).fetchone()[0])
+            return int(conn.execute(f"SELECT count(*) FROM {tabela}").fetchone()[0])
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+
+    def colunas(self, tabela):
+        db_path = self._banco(tabela)
+        if not os.path.exists(db_path):
+            return []
+        conn = sqlite3.connect(db_path)
+        try:
+            return [linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})")]
+        except sqlite3.Error:
+            return []
+        finally:
+            conn.close()
+
+    def load_pagina(self, tabela, data=None, ordenar_por=None, ascendente=True, offset=0, limite=50):
+        colunas = self.colunas(tabela)
+        if not colunas:
+            return pd.DataFrame()
+        sql, params = f"SELECT * FROM {tabela}", []
+        if data and tabela in COLUNAS_DATA:
+            sql += f" WHERE {COLUNAS_DATA[tabela]} IN (?, ?)"
+            params += [data_para_br(data), data_para_iso(data)]
+        # Nome da coluna validado contra o esquema antes de entrar no SQL
+        if ordenar_por in colunas:
+            # A coluna de data pode estar em DD/MM/YYYY: ordena pela data em ISO, não pelo texto
+            chave = _sql_data_iso(f'"{ordenar_por}"') if ordenar_por == COLUNAS_DATA.get(tabela) else f'"{ordenar_por}"'
+            sql += f' ORDER BY "{ordenar_por}" IS NULL, {chave} {"ASC" if ascendente else "DESC"}'
+        sql += " LIMIT ? OFFSET ?"
+        params += [int(limite), int(offset)]
+        return self._ler(self._banco(tabela), sql, params)
+
+
+class MemoriaStorage(Storage):
+    """
+    Tabelas em DataFrames (mesmos nomes e colunas do SQLite), para testes e benchmarks
+
+    Args:
+        tabelas: Dicionário {nome da tabela: DataFrame}
+    """
+
+    _versoes = itertools.count(1)
+
+    def __init__(self, tabelas):
+        self._versao = next(MemoriaStorage._versoes)
+        self.tabelas = {}
+        for nome, df in tabelas.items():
+            df = df.copy()
+            if nome in COLUNAS_DATA and not df.empty:
+                df["_data_iso"] = df[COLUNAS_DATA[nome]].map(data_para_iso)
+            self.tabelas[nome] = df
+
+    def versao(self):
+        """Cada instância é uma versão (as tabelas não mudam depois de criadas)"""
+        return ("memoria", self._versao)
+
+    def _tabela(self, nome):
+        return self.tabelas.get(nome, pd.DataFrame())
+
+    def _na_data(self, nome, data):
+        df = self._tabela(nome)
+        if df.empty:
+            return df
+        return df[df["_data_iso"] == data_para_iso(data)].drop(columns="_data_iso").reset_index(drop=True)
+
+    def get_datas(self):
+        datas = set()
+        for nome in (TABELA_NEGOCIOS, TABELA_MERCADO):
+            df = self._tabela(nome)
+            if not df.empty:
+                datas.update(df["_data_iso"].dropna())
+        return sorted(datas, reverse=True)
+
+    def load_snapshot(self, data):
+        return (self._na_data(TABELA_NEGOCIOS, data), self._na_data(TABELA_MERCADO, data),
+                self._tabela(TABELA_CADASTRO).copy())
+
+    def load_range(self, tabela, inicio=None, fim=None, codigos=None, colunas=None):
+        df = self._tabela(tabela)
+        if df.empty:
+            return pd.DataFrame(columns=["data"] + list(colunas or []))
+        mascara = pd.Series(True, index=df.index)
+        if inicio:
+            mascara &= df["_data_iso"] >= data_para_iso(inicio)
+        if fim:
+            mascara &= df["_data_iso"] <= data_para_iso(fim)
+        if codigos is not None:
+            mascara &= df["codigo"].isin(list(codigos))
+        df = df[mascara].rename(columns={"_data_iso": "data"})
+        colunas = list(colunas) if colunas is not None else [c for c in df.columns if c != "data"]
+        return df[["data"] + colunas].reset_index(drop=True)
+
+    def get_datas_curva(self):
+        df = self._tabela(TABELA_CURVAS)
+        if df.empty:
+            return []
+        return sorted(df["data_referencia"].dropna().unique().tolist(), key=data_para_iso, reverse=True)
+
+    def load_curva(self, data=None):
+        data = data or self.ultima_data_curva()
+        return self._na_data(TABELA_CURVAS, data) if data else pd.DataFrame()
+
+    def volume_agregado(self, inicio=None, fim=None):
+        df = self.load_range(TABELA_NEGOCIOS, inicio, fim)
+        if df.empty:
+            return pd.DataFrame(columns=COLUNAS_VOLUME)
+        return (df.groupby("data_base", sort=True)
+                  .agg(volume_total=("volume_total", "sum"), total_negocios=("numero_negocios", "sum"),
+                       qtd_ativos=("codigo", "nunique"), quantidade=("quantidade", "sum"))
+                  .reset_index())
+
+    def volume_por_ativo(self, data=None, limit=None):
+        datas = self._tabela(TABELA_NEGOCIOS)
+        if datas.empty:
+            return pd.DataFrame()
+        df = self._na_data(TABELA_NEGOCIOS, data or datas["_data_iso"].max())
+        df = df.sort_values("volume_total", ascending=False, ignore_index=True)
+        return df.head(int(limit)) if limit else df
+
+    def contar(self, tabela, data=None):
+        if tabela not in self.tabelas:
+            return None
+        if data and tabela in COLUNAS_DATA:
+            return len(self._na_data(tabela, data))
+        return len(self.tabelas[tabela])
+
+    def colunas(self, tabela):
+        return [c for c in self._tabela(tabela).columns if c != "_data_iso"]
+
+    def load_pagina(self, tabela, data=None, ordenar_por=None, ascendente=True, offset=0, limite=50):
+        if tabela not in self.tabelas:
+            return pd.DataFrame()
+        df = self._na_data(tabela, data) if data and tabela in COLUNAS_DATA else self.tabelas[tabela][self.colunas(tabela)]
+        if ordenar_por in df.columns:
+            chave = (lambda s: s.map(data_para_iso, na_action="ignore")) if ordenar_por == COLUNAS_DATA.get(tabela) else None
+            df = df.sort_values(ordenar_por, ascending=ascendente, na_position="last", kind="stable", key=chave)
+        return df.iloc[int(offset):int(offset) + int(limite)].reset_index(drop=True)
@@ -0,0 +1,168 @@
+"""
+Universo Gravado - Universo Enriquecido das Datas Mais Recentes no Banco
+Tabela universo_enriquecido com o resultado de data_engine.calcular_universo
+(merge SND + ANBIMA + cadastro, limpeza, spreads e Z-spreads) das datas mais
+recentes, gravada no banco versionado pela última etapa do main_etl: o app
+publicado lê o frame pronto em vez de refazer o merge na primeira visita.
+
+A tabela universo_controle guarda, por data, as colunas e os tipos do frame e
+uma assinatura das fontes (agregados das tabelas de origem na data). O frame
+só é usado se a assinatura ainda bate com o banco; se alguma fonte mudou
+depois da gravação (ex.: um ETL rodado isoladamente), o app calcula de novo.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    from .spreads import data_para_iso, FONTES_ASSINATURA, TABELA_SPREADS
+    from .storage import data_para_br
+    from . import metricas
+except ImportError:
+    from spreads import data_para_iso, FONTES_ASSINATURA, TABELA_SPREADS
+    from storage import data_para_br
+    import metricas
+
+TABELA_UNIVERSO = "universo_enriquecido"
+TABELA_CONTROLE = "universo_controle"
+N_DATAS = 2  # Datas mais recentes gravadas (as que a primeira visita abre)
+
+# Incremente ao mudar o cálculo do universo no data_engine: invalida o que já foi gravado
+VERSAO_CALCULO = 1
+
+
+def _agregado(conn, sql, params=()):
+    """Agregados de uma consulta como texto; '-' se a tabela ou coluna não existe"""
+    try:
+        valores = conn.execute(sql, params).fetchone()
+    except sqlite3.Error:
+        return "-"
+    return ":".join(f"{v:.6f}" if isinstance(v, float) else str(v) for v in valores)
+
+
+def assinatura_fontes(db_debentures, db_curvas, data_ref):
+    """
+    Assinatura das fontes do universo de uma data
+
+    Agregados (os mesmos das assinaturas do ETL de spreads) de mercado_secundario,
+    negociacao_snd e curvas_anbima na data, Z-spreads gravados, cadastro_snd e
+    VERSAO_CALCULO. Sem curva na data, entra a data da curva mais recente (a
+    usada no cálculo).
+    """
+    datas = (data_para_br(data_ref), data_para_iso(data_ref))
+    bancos = {"debentures": db_debentures, "curvas": db_curvas}
+    partes = [f"v{VERSAO_CALCULO}"]
+    for banco, tabela, coluna, agregados in FONTES_ASSINATURA:
+        if not os.path.exists(bancos[banco]):
+            partes.append(f"{tabela}=-")
+            continue
+        conn = sqlite3.connect(bancos[banco])
+        try:
+            valor = _agregado(conn, f"SELECT {agregados} FROM {tabela} WHERE {coluna} IN (?, ?)", datas)
+            if tabela == "curvas_anbima" and valor.startswith("0:"):
+                curvas = conn.execute(f"SELECT DISTINCT {coluna} FROM {tabela}").fetchall()
+                valor += f"@{max((data_para_iso(d) for d, in curvas), default='-')}"
+        except sqlite3.Error:
+            valor = "-"
+        finally:
+            conn.close()
+        partes.append(f"{tabela}={valor}")
+
+    if os.path.exists(db_debentures):
+        conn = sqlite3.connect(db_debentures)
+        try:
+            partes.append(f"{TABELA_SPREADS}=" + _agregado(
+                conn, f"SELECT COUNT(*), TOTAL(spread_bps), TOTAL(z_spread_bps) FROM {TABELA_SPREADS} "
+                      f"WHERE data_referencia = ?", (datas[1],)))
+            cadastro = _agregado(conn, "SELECT COUNT(*), MAX(data_atualizacao) FROM cadastro_snd")
+            if cadastro == "-":
+                cadastro = _agregado(conn, "SELECT COUNT(*) FROM cadastro_snd")
+            partes.append(f"cadastro_snd={cadastro}")
+        finally:
+            conn.close()
+    return "|".join(partes)
+
+
+def salvar_universos(db_path, universos):
+    """
+    Regrava as tabelas com os universos informados (as datas anteriores saem)
+
+    Args:
+        db_path: Banco SQLite (o versionado)
+        universos: Lista de (data_ref, DataFrame, assinatura)
+
+    Returns:
+        Número de linhas gravadas
+    """
+    universos = [(d, df, a) for d, df, a in universos if df is not None and not df.empty]
+    agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    controle = [(data_para_iso(d), str(df["data_referencia"].iloc[0]), json.dumps(list(df.columns)),
+                 json.dumps({c: str(t) for c, t in df.dtypes.items()}), a, agora)
+                for d, df, a in universos]
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(f"DROP TABLE IF EXISTS {TABELA_UNIVERSO}")
+        conn.execute(f"DROP TABLE IF EXISTS {TABELA_CONTROLE}")
+        conn.execute(f"""
+            CREATE TABLE {TABELA_CONTROLE} (
+                data_referencia TEXT PRIMARY KEY,
+                data_gravada TEXT,
+                colunas TEXT,
+                tipos TEXT,
+                assinatura TEXT,
+                data_atualizacao TEXT
+            )
+        """)
+        if universos:
+            pd.concat([df for _, df, _ in universos], ignore_index=True).to_sql(
+                TABELA_UNIVERSO, conn, index=False)
+            conn.execute(f"CREATE INDEX idx_{TABELA_UNIVERSO}_data ON {TABELA_UNIVERSO} (data_referencia)")
+        conn.executemany(f"INSERT INTO {TABELA_CONTROLE} VALUES (?, ?, ?, ?, ?, ?)", controle)
+        conn.commit()
+    finally:
+        conn.close()
+    return sum(len(df) for _, df, _ in universos)
+
+
+def carregar_universo(db_path, data_ref, assinatura):
+    """
+    Universo gravado de uma data, se a assinatura das fontes ainda é a mesma
+
+    Returns:
+        DataFrame com as colunas e tipos do frame gravado, ou None (sem tabela,
+        sem a data ou assinatura diferente)
+    """
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            linha = conn.execute(f"SELECT data_gravada, colunas, tipos, assinatura FROM {TABELA_CONTROLE} "
+                                 f"WHERE data_referencia = ?", (data_para_iso(data_ref),)).fetchone()
+        except sqlite3.Error:
+            return None
+        if linha is None or linha[3] != assinatura:
+            return None
+        colunas, tipos = json.loads(linha[1]), json.loads(linha[2])
+        selecao = ", ".join(f'"{c}"' for c in colunas)
+        with metricas.medir(f"sql {TABELA_UNIVERSO}") as medicao:
+            df = pd.read_sql(f"SELECT {selecao} FROM {TABELA_UNIVERSO} WHERE data_referencia = ?",
+                             conn, params=(linha[0],))
+            medicao.linhas_saida = len(df)
+    finally:
+        conn.close()
+
+    # Colunas numéricas voltam com o tipo gravado (uma coluna só com NULL viria como object)
+    for col, tipo in tipos.items():
+        if tipo.startswith(("float", "int", "bool")):
+            df[col] = df[col].astype(tipo)
+        elif tipo.startswith("datetime"):
+            df[col] = pd.to_datetime(df[col])
+        elif tipo == "object":
+            df[col] = df[col].astype(object)
+    df["data_referencia"] = data_ref
+    return df
@@ -3,9 +3,17 @@ Visuals - Módulo de Geração de Gráficos
 Responsável por criar os objetos de figura Plotly para o App.
 Blindado contra colunas ausentes e erros de renderização.
 """
-import plotly.express as px
+import functools
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+
+# plotly.express (~50 ms para importar) só é carregado nas funções que o usam
 import plotly.graph_objects as go
+import plotly.io as pio
 import pandas as pd
+import numpy as np
 
 # Paleta de Cores BondTrack (Dark Mode)
 COLOR_SCHEME = {
@@ -28,22 +36,210 @@ LAYOUT_DARK = {
     "yaxis": {"gridcolor": "#2d3139"}
 }
 
+# Scatter de alto volume: WebGL acima de LIMITE_PONTOS_WEBGL pontos e amostragem
+# por densidade acima de MAX_PONTOS_SCATTER (grade de até GRADE_AMOSTRAGEM x GRADE_AMOSTRAGEM)
+LIMITE_PONTOS_WEBGL = 1000
+MAX_PONTOS_SCATTER = 5000
+GRADE_AMOSTRAGEM = 40
+
+# --- CACHE DE FIGURAS ---
+# JSON da figura por (função, versão dos dados, assinatura das colunas lidas do frame, parâmetros).
+# Compartilhado entre sessões do processo; o menos usado sai ao passar do limite.
+MAX_FIGURAS_CACHE = 64
+_CACHE_FIGURAS = OrderedDict()
+_LOCK_FIGURAS = threading.Lock()
+
+def _versao_dados():
+    """Versão dos dados do engine (None se o engine não estiver disponível)"""
+    try:
+        try:
+            from . import data_engine
+        except ImportError:
+            import data_engine
+        return data_engine.versao_dados()
+    except Exception:
+        return None
+
+def _assinatura_frame(df, colunas):
+    """Assinatura de um DataFrame pelo conteúdo (linhas e índice) só das colunas que o gráfico lê"""
+    presentes = [c for c in dict.fromkeys(colunas) if c in df.columns]
+    hashes = pd.util.hash_pandas_object(df[presentes], index=True).to_numpy()
+    digest = hashlib.blake2b(hashes.tobytes(), digest_size=16)
+    digest.update(repr(presentes).encode())
+    return ("df", len(df), digest.hexdigest())
+
+def _assinatura(valor):
+    """Assinatura hashável de um argumento; DataFrames entram pelo conteúdo de todas as colunas"""
+    if isinstance(valor, pd.DataFrame):
+        return _assinatura_frame(valor, valor.columns)
+    if isinstance(valor, (list, tuple, set, pd.Index, pd.Series)):
+        return tuple(_assinatura(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _assinatura(v)) for k, v in valor.items()))
+    return repr(valor)
+
+def cache_figura(colunas):
+    """
+    Memoiza o JSON da figura gerada; repetir a chamada com os mesmos dados e
+    parâmetros (ex.: rerun por um widget que não afeta o gráfico) só reconstrói
+    a figura a partir do JSON, sem refazer agregações e traces.
+    Cada chamada recebe uma figura nova, que a página pode alterar livremente.
+
+    Args:
+        colunas: Colunas do argumento df que o gráfico lê, ou função que as
+            devolve a partir dos argumentos da chamada (dict, com os padrões).
+            Só elas entram na chave: as demais colunas do frame não são hasheadas.
+    """
+    def decorador(func):
+        parametros = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                chamada = parametros.bind(*args, **kwargs)
+                chamada.apply_defaults()
+                argumentos = dict(chamada.arguments)
+                lidas = colunas(argumentos) if callable(colunas) else colunas
+                df = argumentos.pop("df")
+                chave = (func.__name__, _versao_dados(), _assinatura_frame(df, lidas), _assinatura(argumentos))
+            except Exception:
+                return func(*args, **kwargs)
+
+            with _LOCK_FIGURAS:
+                json_fig = _CACHE_FIGURAS.get(chave)
+                if json_fig is not None:
+                    _CACHE_FIGURAS.move_to_end(chave)
+            if json_fig is not None:
+                return pio.from_json(json_fig)
+
+            fig = func(*args, **kwargs)
+            with _LOCK_FIGURAS:
+                _CACHE_FIGURAS[chave] = fig.to_json()
+                while len(_CACHE_FIGURAS) > MAX_FIGURAS_CACHE:
+                    _CACHE_FIGURAS.popitem(last=False)
+            return fig
+        return wrapper
+    return decorador
+
+def limpar_cache_figuras():
+    """Descarta todas as figuras em cache"""
+    with _LOCK_FIGURAS:
+        _CACHE_FIGURAS.clear()
+
+def _amostra_por_densidade(x, y, max_pontos, semente=0):
+    """
+    Posições de uma amostra de no máximo max_pontos que preserva a densidade do scatter
+
+    Divide o plano em uma grade e sorteia de cada célula ocupada 1 ponto (regiões
+    esparsas e outliers continuam visíveis) mais uma cota do restante proporcional
+    à sua contagem. A grade é reduzida para que o mínimo por célula use no máximo
+    metade de max_pontos. A semente fixa mantém a amostra estável entre reruns.
+    """
+    n = len(x)
+    if n <= max_pontos:
+        return np.arange(n)
+    grade = max(1, min(GRADE_AMOSTRAGEM, int(np.sqrt(max_pontos / 2))))
+
+    def faixa(v):
+        lo, hi = np.nanmin(v), np.nanmax(v)
+        if hi <= lo: return np.zeros(len(v), dtype=np.int64)
+        return np.minimum(((v - lo) / (hi - lo) * grade).astype(np.int64), grade - 1)
+
+    celula = faixa(x) * grade + faixa(y)
+    contagem = np.bincount(celula, minlength=grade ** 2)
+    cota = (contagem > 0).astype(np.int64)
+    # Arredondado para baixo: o total nunca passa de max_pontos
+    excedente = contagem - cota
+    cota += np.floor(excedente * ((max_pontos - cota.sum()) / excedente.sum())).astype(np.int64)
+
+    # Ordem aleatória dentro de cada célula; fica a cota dos primeiros de cada uma
+    ordem = np.random.default_rng(semente).permutation(n)
+    ordem = ordem[np.argsort(celula[ordem], kind="stable")]
+    celulas_ordenadas = celula[ordem]
+    inicio_celula = np.searchsorted(celulas_ordenadas, celulas_ordenadas, side="left")
+    posicao_na_celula = np.arange(n) - inicio_celula
+    return np.sort(ordem[posicao_na_celula < cota[celulas_ordenadas]])
+
+def _scatter_alto_volume(df, x_col, y_col, color_col, hover_name, title, height, max_pontos, destaques):
+    """Scatter em WebGL (Scattergl) a partir dos arrays das colunas, sem copiar o frame"""
+    x = pd.to_numeric(df[x_col], errors="coerce").to_numpy(dtype=float)
+    y = pd.to_numeric(df[y_col], errors="coerce").to_numpy(dtype=float)
+    validos = np.isfinite(x) & np.isfinite(y)
+
+    n = len(df)
+    categorias = df[color_col].astype(str).to_numpy() if color_col in df.columns else np.full(n, "Geral", dtype=object)
+    codigos = df[hover_name].astype(str).to_numpy() if hover_name in df.columns else np.full(n, "", dtype=object)
+    emissores = df["emissor"].astype(str).to_numpy() if "emissor" in df.columns else np.full(n, "N/D", dtype=object)
+
+    # Destaques ficam sempre no gráfico, fora da amostragem
+    destacado = validos & np.isin(codigos, [str(c) for c in destaques]) if destaques else np.zeros(n, dtype=bool)
+    base = np.flatnonzero(validos & ~destacado)
+    total = len(base) + int(destacado.sum())
+    if max_pontos and len(base) > max_pontos:
+        base = base[_amostra_por_densidade(x[base], y[base], max_pontos)]
+
+    hover = "<b>%{customdata[0]}</b><br>Emissor: %{customdata[1]}<br>Duration: %{x:.2f}<br>Taxa: %{y:.2f}%<extra>%{fullData.name}</extra>"
+    fig = go.Figure()
+    for categoria in pd.unique(categorias[base]):
+        pos = base[categorias[base] == categoria]
+        fig.add_trace(go.Scattergl(
+            x=x[pos], y=y[pos], mode="markers", name=str(categoria),
+            marker=dict(size=6, opacity=0.75, color=COLOR_SCHEME.get(categoria, COLOR_SCHEME["Outros"])),
+            customdata=np.column_stack([codigos[pos], emissores[pos]]),
+            hovertemplate=hover
+        ))
+    pos = np.flatnonzero(destacado)
+    if len(pos):
+        fig.add_trace(go.Scattergl(
+            x=x[pos], y=y[pos], mode="markers+text", name="Destaques",
+            text=codigos[pos], textposition="top center",
+            marker=dict(size=12, color="#FECB52", line=dict(width=1.5, color="white")),
+            customdata=np.column_stack([codigos[pos], emissores[pos]]),
+            hovertemplate=hover
+        ))
+
+    exibidos = len(base) + len(pos)
+    if exibidos < total:
+        title = f"{title} (amostra de {exibidos:,} de {total:,} ativos)".replace(",", ".")
+    fig.update_layout(title=title, xaxis_title="Duration (anos)", yaxis_title="Taxa (%)",
+                      height=height, **LAYOUT_DARK)
+    return fig
+
+@cache_figura(lambda a: [a["x_col"], a["y_col"], a["color_col"], a["size_col"], a["symbol_col"], a["hover_name"], "emissor"])
 def create_scatter_risco_retorno(df, x_col="duration", y_col="taxa", color_col="categoria_grafico", 
                                  size_col="pu_size", symbol_col="FONTE", hover_name="codigo",
-                                 title="Mapa Risco x Retorno", height=600):
+                                 title="Mapa Risco x Retorno", height=600,
+                                 alto_volume=None, max_pontos=MAX_PONTOS_SCATTER, destaques=None):
     """
     Cria scatter plot de risco vs retorno de forma segura.
+
+    Modo alto volume (automático acima de LIMITE_PONTOS_WEBGL pontos, ou forçado
+    com alto_volume=True): Scattergl sem símbolos/tamanhos, amostragem por
+    densidade acima de max_pontos (None desliga) e os códigos em destaques
+    sempre visíveis, marcados por cima dos demais.
     """
     if df.empty:
         return go.Figure()
 
-    # --- PROTEÇÃO CONTRA COLUNAS FALTANTES ---
-    df_plot = df.copy()
-    
     # 1. Garante colunas de Eixo X e Y
-    if x_col not in df_plot.columns or y_col not in df_plot.columns:
+    if x_col not in df.columns or y_col not in df.columns:
         return go.Figure().add_annotation(text="Dados insuficientes para o gráfico", showarrow=False)
 
+    if alto_volume is None:
+        alto_volume = len(df) > LIMITE_PONTOS_WEBGL
+    if alto_volume:
+        try:
+            return _scatter_alto_volume(df, x_col, y_col, color_col, hover_name, title, height, max_pontos, destaques)
+        except Exception as e:
+            fig = go.Figure()
+            fig.add_annotation(text=f"Erro ao renderizar gráfico: {e}", showarrow=False)
+            return fig
+
+    # --- PROTEÇÃO CONTRA COLUNAS FALTANTES ---
+    # Só as colunas usadas no gráfico; frame próprio, que pode receber colunas sem alterar o df
+    df_plot = df[[c for c in dict.fromkeys([x_col, y_col, color_col, size_col, symbol_col, hover_name, "emissor"])
+                  if c in df.columns]].copy(deep=False)
+
     # 2. Garante Cor (Categoria)
     if color_col not in df_plot.columns:
         df_plot[color_col] = "Geral"
@@ -71,6 +267,8 @@ def create_scatter_risco_retorno(df, x_col="duration", y_col="taxa", color_col="
         if col in df_plot.columns:
             hover_data[col] = True
             
+    import plotly.express as px
+
     try:
         fig = px.scatter(
             df_plot, 
@@ -93,6 +291,15 @@ def create_scatter_risco_retorno(df, x_col="duration", y_col="taxa", color_col="
         # Se não usou coluna de tamanho, define um tamanho fixo visível
         if not final_size_col:
             fig.update_traces(marker=dict(size=10))
+
+        if destaques and hover_name in df_plot.columns:
+            df_dest = df_plot[df_plot[hover_name].astype(str).isin([str(c) for c in destaques])]
+            if not df_dest.empty:
+                fig.add_trace(go.Scatter(
+                    x=df_dest[x_col], y=df_dest[y_col], mode="markers+text", name="Destaques",
+                    text=df_dest[hover_name], textposition="top center", hoverinfo="skip",
+                    marker=dict(size=14, color="rgba(0,0,0,0)", line=dict(width=2, color="#FECB52"))
+                ))
         
         return fig
 
@@ -102,6 +309,7 @@ def create_scatter_risco_retorno(df, x_col="duration", y_col="taxa", color_col="
         fig.add_annotation(text=f"Erro ao renderizar gráfico: {e}", showarrow=False)
         return fig
 
+@cache_figura(["indexador", "cluster_duration", "taxa"])
 def create_heatmap_indexador(df, indexadores, cluster_duration_order=None):
     """
     Cria heatmap de taxa média por indexador e duration
@@ -168,6 +376,7 @@ def create_heatmap_indexador(df, indexadores, cluster_duration_order=None):
     except Exception:
         return go.Figure()
 
+@cache_figura(["duration", "taxa", "codigo", "emissor"])
 def create_curva_juros(df, indexador, color="#00CC96"):
     """
     Cria curva de juros para um indexador específico
@@ -238,6 +447,8 @@ def create_pie_distribuicao(df, values_col='codigo', names_col='categoria_grafic
     """Cria gráfico de pizza seguro"""
     if df.empty or names_col not in df.columns: return go.Figure()
     
+    import plotly.express as px
+
     try:
         contagem = df[names_col].value_counts().reset_index()
         contagem.columns = [names_col, 'count']
@@ -255,6 +466,7 @@ def create_pie_distribuicao(df, values_col='codigo', names_col='categoria_grafic
         return fig
     except: return go.Figure()
 
+@cache_figura(lambda a: [a["x_col"], a["y_col"]])
 def create_box_plot_categoria(df, x_col='categoria_grafico', y_col='taxa', title="Distribuição"):
     """
     Cria box plot por categoria de forma segura.
@@ -268,6 +480,8 @@ def create_box_plot_categoria(df, x_col='categoria_grafico', y_col='taxa', title
         fig.add_annotation(text="Dados insuficientes para o gráfico", showarrow=False)
         return fig
     
+    import plotly.express as px
+
     try:
         # Filtra valores válidos
         df_plot = df[[x_col, y_col]].dropna()